@@ -0,0 +1,14 @@
+"""
+Бенчмарки сервиса обновления расписания.
+Не требуют сети и БД, каждый модуль запускается отдельно: python -m apps.common.benchmarks.<модуль>
+Все бенчмарки с сохранением результатов в JSON: python -m apps.common.benchmarks.suite
+"""
+import os
+
+
+def setup_django() -> None:
+    """Настраивает Django для бенчмарков, импортирующих модели (подключение к БД не выполняется)."""
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "vstu_schedule.settings")
+    django.setup()
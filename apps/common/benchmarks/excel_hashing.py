@@ -0,0 +1,147 @@
+"""
+Сравнение способов подсчёта хэша файлов Excel: время и пиковая память на книгу разного размера.
+Книги .xlsx и .xls генерируются во временной директории, для .xls нужен xlwt из группы зависимостей dev.
+Без xlwt книги .xls пропускаются, это отмечается в выводе и в ограничениях результатов (get_limitations).
+Запуск: python -m apps.common.benchmarks.excel_hashing [--rows N ...] [--repeat N]
+"""
+import argparse
+import importlib.util
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+from openpyxl import Workbook
+
+from apps.common.services.timetable_update.version_core.hashing import (
+    get_excel_file_hash,
+    get_legacy_excel_file_hash,
+)
+
+METHODS: list[tuple[str, Callable[[Path], str]]] = [
+    ("legacy", get_legacy_excel_file_hash),
+    ("streaming", get_excel_file_hash),
+]
+
+
+COLUMNS = 12
+
+
+def make_row(row: int, columns: int = COLUMNS) -> list:
+    """Возвращает строку, похожую на строку расписания: текст, числа и пустые ячейки."""
+    return [f"Группа {row % 40}-{col}" if col % 3 else (row * col if col else None) for col in range(columns)]
+
+
+def make_workbook(path: Path, rows: int, columns: int = COLUMNS) -> Path:
+    """Создаёт книгу .xlsx с двумя листами, похожую на расписание."""
+    wb = Workbook(write_only=True)
+    for sheet_index in range(2):
+        sheet = wb.create_sheet(f"Лист{sheet_index + 1}")
+        for row in range(rows // 2):
+            sheet.append(make_row(row, columns))
+    wb.save(path)
+    return path
+
+
+def make_xls_workbook(path: Path, rows: int, columns: int = COLUMNS) -> Path | None:
+    """Создаёт такую же книгу в формате .xls. Возвращает None, если xlwt не установлен."""
+    try:
+        import xlwt
+    except ImportError:
+        return None
+
+    wb = xlwt.Workbook()
+    for sheet_index in range(2):
+        sheet = wb.add_sheet(f"Лист{sheet_index + 1}")
+        for row in range(rows // 2):
+            for col, value in enumerate(make_row(row, columns)):
+                if value is not None:
+                    sheet.write(row, col, value)
+    wb.save(str(path))
+    return path
+
+
+# Формат книги -> функция создания
+FORMATS: dict[str, Callable[[Path, int], Path | None]] = {
+    "xlsx": make_workbook,
+    "xls": make_xls_workbook,
+}
+
+
+# Формат книги -> модуль, без которого книги этого формата не создаются
+FORMAT_WRITERS: dict[str, str] = {
+    "xls": "xlwt",
+}
+
+
+def get_limitations(formats: list[str] | None = None) -> list[str]:
+    """Возвращает ограничения результатов: форматы, пропущенные из-за неустановленной библиотеки записи."""
+    limitations = []
+    for book_format in formats or list(FORMATS):
+        writer = FORMAT_WRITERS.get(book_format)
+        if writer is not None and importlib.util.find_spec(writer) is None:
+            limitations.append(f".{book_format} workbooks are skipped: {writer} is not installed")
+    return limitations
+
+
+def measure(method: Callable[[Path], str], path: Path, repeat: int) -> dict[str, float]:
+    """Возвращает медианное время подсчёта хэша (мс) и пиковую память (КиБ) для одной книги."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        method(path)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    method(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"time_ms": statistics.median(times) * 1000, "peak_kib": peak / 1024}
+
+
+def run(sizes: list[int], repeat: int = 3, formats: list[str] | None = None) -> list[dict]:
+    """
+    Измеряет все способы подсчёта хэша на книгах с указанным количеством строк.
+    Форматы, для которых нет библиотеки записи, пропускаются (см. get_limitations).
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for book_format in formats or list(FORMATS):
+            for rows in sizes:
+                path = FORMATS[book_format](Path(temp_dir) / f"book_{rows}.{book_format}", rows)
+                if path is None:
+                    break
+                for name, method in METHODS:
+                    results.append({
+                        "method": name,
+                        "format": book_format,
+                        "rows": rows,
+                        "cells": rows * COLUMNS,
+                        **measure(method, path, repeat),
+                    })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000], help="размеры книг в строках")
+    parser.add_argument("--repeat", type=int, default=3, help="количество повторов подсчёта для каждой книги")
+    parser.add_argument("--formats", nargs="+", choices=list(FORMATS), help="форматы книг (по умолчанию все)")
+    args = parser.parse_args()
+
+    for note in get_limitations(args.formats):
+        print(f"Note: {note}", file=sys.stderr)
+    print(f"{'method':<12}{'format':<8}{'rows':>8}{'cells':>10}{'time, ms':>12}{'peak, KiB':>12}")
+    for row in run(args.rows, args.repeat, args.formats):
+        print(
+            f"{row['method']:<12}{row['format']:<8}{row['rows']:>8}{row['cells']:>10}"
+            f"{row['time_ms']:>12.1f}{row['peak_kib']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Стоимость классификации одного файла по пути: прежний алгоритм FileData (регулярные выражения собираются
+при каждом вызове, SequenceMatcher для каждой пары слов, без кэшей) и FileClassifier,
+а также создания FileData с получением исправленного пути и тегов.
+Проверяет, что результаты совпадают. Пути генерируются в формате сайта ВолгГТУ.
+Запуск: python -m apps.common.benchmarks.file_classification [--paths N] [--repeat N]
+"""
+import argparse
+import random
+import re
+import statistics
+import time
+from urllib.parse import unquote
+
+from apps.common.benchmarks import setup_django
+from apps.common.benchmarks.string_matching import legacy_analyze
+from apps.common.services.timetable_update.version_core.file_classifier import (
+    CONFIDENCE_VALUE,
+    COURSE_WORDS,
+    DEGREE_WORDS,
+    EDUCATION_FORM_WORDS,
+    FACULTY_WORDS,
+    SENTENCE_DELIMITERS,
+    WORDS_TO_DELETE,
+    FileClassification,
+    FileClassifier,
+)
+
+SCHEDULES = ["Расписание занятий", "Расписание экзаменов", "Расписание сессии"]
+DEGREES = ["Бакалавриат, специалитет", "Магистратура", "Аспирантура", "Бакалавриат", "Специалитет"]
+FACULTIES = [
+    "Факультет автоматизированных систем, транспорта и вооружений",
+    "Факультет электроники и вычислительной техники",
+    "Химико-технологический факультет",
+    "Факультет технологии конструкционных материалов",
+    "Факультет технологии пищевых производств",
+    "Факультет экономики и управления",
+    "Факультет автомобильного транспорта",
+    "Вечерний факультет",
+    "Иностранный факультет",
+    "Инженерный факультет",
+]
+FORMS = ["Очная форма обучения", "Очно-заочная форма обучения", "Заочная форма обучения", "Очная"]
+ABBREVIATIONS = ["ФАСТИВ", "ФЭВТ", "ХТФ", "ФТКМ", "ФТПП", "ФЭУ", "АТФ", "ВФ", "ФПИК"]
+COURSES = ["1 курс", "2 курс", "3 курс", "4 курс", "1-2 курс", "курс 3", "5 курс", "1,2 курс"]
+
+
+def make_paths(count: int, seed: int = 0) -> list[str]:
+    """Генерирует пути файлов расписания: расписание / степень / факультет / форма обучения / файл."""
+    rng = random.Random(seed)
+    paths = []
+    for _ in range(count):
+        semester = f"{rng.choice(['весна', 'осень'])} {rng.randint(2019, 2026)}"
+        name = f"{rng.choice(ABBREVIATIONS)} {rng.choice(COURSES)} ({semester})"
+        if rng.random() < 0.1:
+            name = rng.choice(["Копия ", "Автосохраненный "]) + name
+        if rng.random() < 0.1:
+            name += " - "
+        parts = ["Расписания", rng.choice(SCHEDULES), rng.choice(DEGREES), rng.choice(FACULTIES), rng.choice(FORMS)]
+        if rng.random() < 0.2:
+            parts.pop(rng.randint(2, 4))
+        paths.append("/".join(parts) + "/" + name + rng.choice([".xlsx", ".xls", ".pdf"]))
+    return paths
+
+
+# ------------------- ПРЕЖНИЙ АЛГОРИТМ FileData ------------------- #
+
+def legacy_split(string: str) -> list[str]:
+    return re.split("|".join(map(re.escape, SENTENCE_DELIMITERS)), string)
+
+
+def legacy_remove_extra_spaces(string: str) -> str:
+    return re.sub(r"\s+", " ", string).strip()
+
+
+def legacy_matched_words(words: list[str], vocabulary: list[str]) -> list[str]:
+    return [word for word, (_, ratio) in legacy_analyze(words, vocabulary).items() if CONFIDENCE_VALUE <= ratio <= 1]
+
+
+def legacy_correct_file_name(file_name: str) -> str:
+    name = legacy_remove_extra_spaces(file_name)
+    for word in legacy_matched_words(legacy_split(name), WORDS_TO_DELETE):
+        name = name.replace(word, "")
+    while True:
+        before = name
+        name = re.sub(r"-\s*$", "", name)
+        name = re.sub(r"\(\s*\)", "", name)
+        name = legacy_remove_extra_spaces(name)
+        if name == before:
+            break
+    return name
+
+
+def legacy_best_segment(segments: list[str], vocabulary: list[str]) -> str:
+    best, best_score = "", 0
+    for segment in segments:
+        score = len(legacy_matched_words(legacy_split(segment.lower()), vocabulary))
+        if score > best_score:
+            best, best_score = segment, score
+    return best
+
+
+def legacy_course_list(name: str) -> list[int]:
+    parts = legacy_split(name.lower())
+    result = []
+    for i, part in enumerate(parts):
+        if any(cw in part for cw in COURSE_WORDS) and i + 1 < len(parts):
+            try:
+                for chunk in parts[i + 1].split(","):
+                    chunk = chunk.strip()
+                    if "-" in chunk:
+                        bounds = chunk.split("-")
+                        result.extend(range(int(bounds[0]), int(bounds[-1]) + 1))
+                    elif chunk.isdigit():
+                        result.append(int(chunk))
+            except Exception:
+                pass
+    return sorted(set(result))
+
+
+def legacy_classify(path: str) -> FileClassification:
+    name = re.sub(r"\.[А-ЯЁA-Zа-яёa-z]*$", "", unquote(path.split("/")[-1]))
+    segments = path.split("/")
+    return FileClassification(
+        name,
+        legacy_correct_file_name(name),
+        legacy_best_segment(segments, DEGREE_WORDS),
+        legacy_best_segment(segments, EDUCATION_FORM_WORDS),
+        legacy_best_segment(segments, FACULTY_WORDS),
+        tuple(legacy_course_list(name)),
+    )
+
+
+# ------------------- ИЗМЕРЕНИЕ ------------------- #
+
+def build_file_data(paths: list[str]) -> None:
+    """Создаёт FileData для каждого пути и получает всё, что нужно для записи Resource в БД."""
+    from apps.common.services.timetable_update.version_core.file_data import FileData
+
+    for path in paths:
+        file_data = FileData(path, "https://www.vstu.ru/upload/" + path.rsplit("/", 1)[-1], "2025-01-01 00:00:00")
+        file_data.get_correct_path()
+        file_data.get_name()
+        file_data._get_tags("Расписание занятий")
+
+
+def measure(classify_all, paths: list[str], repeat: int) -> float:
+    """Возвращает медианное время классификации одного файла, мкс."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        classify_all(paths)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) / len(paths) * 1e6
+
+
+def run(path_count: int = 10000, repeat: int = 3) -> list[dict]:
+    """
+    Проверяет совпадение результатов и измеряет стоимость классификации одного файла.
+    Для измерения FileData Django должен быть настроен (setup_django).
+    """
+    paths = make_paths(path_count)
+    expected = [legacy_classify(path) for path in paths]
+    if FileClassifier().classify_many(paths) != expected:
+        raise AssertionError("FileClassifier results differ from the legacy algorithm")
+
+    uncached = FileClassifier(cache_size=0)
+    warm = FileClassifier()
+    warm.classify_many(paths)
+    methods = [
+        ("legacy", lambda items: [legacy_classify(path) for path in items]),
+        # Без кэшей сегментов: только скомпилированные выражения и FuzzyMatcher
+        ("classifier_uncached", lambda items: [uncached.classify(path) for path in items]),
+        # Новый классификатор на каждый повтор: кэши сегментов заполняются во время измерения
+        ("classifier_cold", lambda items: FileClassifier().classify_many(items)),
+        ("classifier_warm", warm.classify_many),
+        # Общий классификатор FileData после первого повтора уже прогрет
+        ("file_data", build_file_data),
+    ]
+
+    results = []
+    baseline = None
+    for name, method in methods:
+        elapsed = measure(method, paths, repeat)
+        baseline = baseline or elapsed
+        results.append({"method": name, "us_per_file": elapsed, "speedup": baseline / elapsed})
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--paths", type=int, default=10000, help="количество путей в синтетическом корпусе")
+    parser.add_argument("--repeat", type=int, default=3, help="количество повторов измерения")
+    args = parser.parse_args()
+    setup_django()
+
+    print(f"{'method':<22}{'us/file':>12}{'speedup':>10}")
+    for row in run(args.paths, args.repeat):
+        print(f"{row['method']:<22}{row['us_per_file']:>12.1f}{row['speedup']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
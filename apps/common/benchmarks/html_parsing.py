@@ -0,0 +1,90 @@
+"""
+Сравнение способов разбора HTML страниц сайта: время разбора и пиковая память на страницу.
+Страницы в fixtures/pages синтетические (сгенерированы по образцу сайта, а не сохранены с него),
+для результатов на реальных страницах передайте директорию с сохранёнными страницами (--pages).
+Запуск: python -m apps.common.benchmarks.html_parsing [--pages DIR] [--repeat N]
+"""
+import argparse
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from apps.common.services.timetable_update.version_core.html_backend import HtmlParserBackend
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "pages"
+SYNTHETIC_PAGES_NOTE = (
+    "fixtures/pages/index.html and faculty.html are synthetic pages modelled on the site, not recorded from it; "
+    "run the benchmark module with --pages DIR of saved pages for representative results"
+)
+
+# (парсер, только основной контент)
+BACKENDS = [
+    ("html.parser", False),
+    ("html.parser", True),
+    ("lxml", False),
+    ("lxml", True),
+]
+
+
+def parse_page(backend: HtmlParserBackend, html: str) -> int:
+    """Разбирает страницу и обходит основной контент так же, как WebParser. Возвращает количество узлов."""
+    content = backend.find_content(html)
+    return sum(1 for _ in content.descendants)
+
+
+def measure(backend: HtmlParserBackend, html: str, repeat: int) -> dict[str, float]:
+    """Возвращает медианное время разбора (мс) и пиковую память (КиБ) для одной страницы."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse_page(backend, html)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    parse_page(backend, html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"time_ms": statistics.median(times) * 1000, "peak_kib": peak / 1024}
+
+
+def get_limitations(pages_dir: Path = FIXTURES_DIR) -> list[str]:
+    """Возвращает ограничения результатов: синтетические страницы и пропущенные неустановленные парсеры."""
+    limitations = [SYNTHETIC_PAGES_NOTE] if pages_dir.resolve() == FIXTURES_DIR.resolve() else []
+    for features in dict.fromkeys(features for features, _ in BACKENDS):
+        if not HtmlParserBackend.is_available(features):
+            limitations.append(f"HTML parser {features!r} is not installed, its results are missing")
+    return limitations
+
+
+def run(pages_dir: Path = FIXTURES_DIR, repeat: int = 20) -> list[dict]:
+    """Измеряет все доступные способы разбора на всех страницах из директории."""
+    pages = sorted(pages_dir.glob("*.html"))
+    results = []
+    for features, only_content in BACKENDS:
+        if not HtmlParserBackend.is_available(features):
+            continue
+        backend = HtmlParserBackend(features, only_content)
+        for page in pages:
+            html = page.read_text(encoding="utf-8")
+            results.append({"backend": backend.get_name(), "page": page.name, **measure(backend, html, repeat)})
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=Path, default=FIXTURES_DIR, help="директория с сохранёнными HTML страницами")
+    parser.add_argument("--repeat", type=int, default=20, help="количество повторов разбора каждой страницы")
+    args = parser.parse_args()
+
+    for note in get_limitations(args.pages):
+        print(f"Note: {note}", file=sys.stderr)
+    print(f"{'backend':<22}{'page':<24}{'time, ms':>10}{'peak, KiB':>12}")
+    for row in run(args.pages, args.repeat):
+        print(f"{row['backend']:<22}{row['page']:<24}{row['time_ms']:>10.2f}{row['peak_kib']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
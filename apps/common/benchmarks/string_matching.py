@@ -0,0 +1,148 @@
+"""
+Сравнение поиска похожих слов в StringListAnalyzer: прежний перебор всех пар через difflib.SequenceMatcher
+и FuzzyMatcher. Проверяет, что результаты совпадают, и выводит время на один анализ
+сегментов путей и на один анализ списков слов разного размера.
+Запуск: python -m apps.common.benchmarks.string_matching [--segments N] [--sizes N ...] [--repeat N]
+"""
+import argparse
+import difflib
+import random
+import statistics
+import time
+
+from apps.common.services.timetable_update.version_core.stringlistanalyzer import StringListAnalyzer
+
+# Словари того же вида, что у FileData: степени, формы обучения, слова факультетов
+VOCABULARIES = [
+    ["бакалавриат", "специалитет", "магистратура", "аспирантура", "степень"],
+    ["форма", "очная", "очно-заочная", "заочная"],
+    [
+        "факультет", "автоматизированных", "систем", "транспорта", "вооружений",
+        "автомобильного", "технологии", "конструкционных", "материалов", "пищевых",
+        "производств", "экономика", "управление", "электроника", "вычислительная",
+        "техника", "xимико-технологический", "иностранный", "вечерний",
+        "технологический", "инженерный", "кадры",
+    ],
+]
+SEGMENT_WORDS = [
+    "Расписание", "занятий", "экзаменов", "Бакалавриат", "Магистратура", "Очная", "Заочная", "форма", "обучения",
+    "Факультет", "автоматизированных", "систем", "транспорта", "и", "вооружений", "ФАСТИВ", "ФЭВТ", "курс",
+    "группы", "ИВТ-363", "ПрИн-466", "весна", "2025", "копия", "Автосохраненный", "электроники", "вычислительной",
+    "техники", "Химико-технологический", "факультет", "ХТФ", "(1)", "1-2", "3",
+]
+DELIMITERS = ["_", " ", "(", ")", ",", ".", '"']
+
+
+def legacy_analyze(analyze_strings: list[str], compare_strings: list[str]) -> dict[str, tuple[str, float]]:
+    """Прежний алгоритм StringListAnalyzer: SequenceMatcher.quick_ratio для каждой пары строк."""
+    result: dict[str, tuple[str, float]] = {}
+    for analyze_string in analyze_strings:
+        for compare_string in compare_strings:
+            ratio = difflib.SequenceMatcher(None, analyze_string, compare_string).quick_ratio()
+            if ratio > result.get(analyze_string, ("", -1))[1]:
+                result[analyze_string] = (compare_string, ratio)
+    return result
+
+
+def indexed_analyze(analyze_strings: list[str], compare_strings: list[str]) -> dict[str, tuple[str, float]]:
+    """StringListAnalyzer с FuzzyMatcher."""
+    analyzer = StringListAnalyzer(analyze_strings, compare_strings)
+    return {
+        string: (analyzer.get_similar_string(string), analyzer.get_ratio_for_string(string))
+        for string in analyzer.get_strings_by_ratio_in_range(0, 1)
+    }
+
+
+def threshold_analyze(analyze_strings: list[str], compare_strings: list[str]) -> list[str]:
+    """StringListAnalyzer с FuzzyMatcher и порогом, как в FileData."""
+    analyzer = StringListAnalyzer(analyze_strings, compare_strings, min_ratio=0.8)
+    return analyzer.get_strings_by_ratio_in_range(0.8, 1)
+
+
+def make_segments(count: int, seed: int = 0) -> list[list[str]]:
+    """Генерирует сегменты путей файлов, разбитые на слова так же, как в FileData."""
+    rng = random.Random(seed)
+    segments = []
+    for _ in range(count):
+        segment = " ".join(rng.choice(SEGMENT_WORDS) for _ in range(rng.randint(2, 7))).lower()
+        for delimiter in DELIMITERS[1:]:
+            segment = segment.replace(delimiter, DELIMITERS[0])
+        segments.append(segment.split(DELIMITERS[0]))
+    return segments
+
+
+def measure(method, segments: list[list[str]], repeat: int) -> float:
+    """Возвращает медианное время анализа одного сегмента со всеми словарями, мкс."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for words in segments:
+            for vocabulary in VOCABULARIES:
+                method(words, vocabulary)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) / len(segments) * 1e6
+
+
+def measure_lists(method, words: list[str], vocabulary: list[str], repeat: int) -> float:
+    """Возвращает медианное время анализа одного списка слов, мс."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        method(words, vocabulary)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def run_list_sizes(sizes: list[int], repeat: int = 5) -> list[dict]:
+    """Измеряет анализ списков из указанного количества слов со словарём факультетов."""
+    rng = random.Random(0)
+    vocabulary = VOCABULARIES[-1]
+    results = []
+    for size in sizes:
+        words = [rng.choice(SEGMENT_WORDS).lower() + str(rng.randint(0, size)) for _ in range(size)]
+        baseline = measure_lists(legacy_analyze, words, vocabulary, repeat)
+        results.append({"method": "sequence_matcher", "size": size, "time_ms": baseline, "speedup": 1.0})
+        elapsed = measure_lists(indexed_analyze, words, vocabulary, repeat)
+        results.append({"method": "fuzzy_matcher", "size": size, "time_ms": elapsed, "speedup": baseline / elapsed})
+    return results
+
+
+def run(segment_count: int = 2000, repeat: int = 5) -> list[dict]:
+    """Проверяет совпадение результатов и измеряет время всех способов."""
+    segments = make_segments(segment_count)
+    for words in segments:
+        for vocabulary in VOCABULARIES:
+            expected = legacy_analyze(words, vocabulary)
+            if indexed_analyze(words, vocabulary) != expected:
+                raise AssertionError(f"Results differ for {words} / {vocabulary}")
+            matched = [word for word, (_, ratio) in expected.items() if ratio >= 0.8]
+            if threshold_analyze(words, vocabulary) != matched:
+                raise AssertionError(f"Threshold results differ for {words} / {vocabulary}")
+
+    baseline = measure(legacy_analyze, segments, repeat)
+    results = [{"method": "sequence_matcher", "us_per_segment": baseline, "speedup": 1.0}]
+    for name, method in [("fuzzy_matcher", indexed_analyze), ("fuzzy_matcher_min_ratio", threshold_analyze)]:
+        elapsed = measure(method, segments, repeat)
+        results.append({"method": name, "us_per_segment": elapsed, "speedup": baseline / elapsed})
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--segments", type=int, default=2000, help="количество сегментов путей")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="размеры списков слов")
+    parser.add_argument("--repeat", type=int, default=5, help="количество повторов измерения")
+    args = parser.parse_args()
+
+    print(f"{'method':<26}{'us/segment':>12}{'speedup':>10}")
+    for row in run(args.segments, args.repeat):
+        print(f"{row['method']:<26}{row['us_per_segment']:>12.1f}{row['speedup']:>10.2f}")
+
+    print()
+    print(f"{'method':<26}{'words':>8}{'time, ms':>12}{'speedup':>10}")
+    for row in run_list_sizes(args.sizes, args.repeat):
+        print(f"{row['method']:<26}{row['size']:>8}{row['time_ms']:>12.2f}{row['speedup']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
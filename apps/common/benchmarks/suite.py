@@ -0,0 +1,161 @@
+"""
+Запуск всех бенчмарков сервиса обновления расписания с сохранением результатов в JSON
+и сравнением с результатами другого коммита. Сети и БД не требуется.
+Запуск: python -m apps.common.benchmarks.suite [--only NAME ...] [--output FILE] [--compare FILE] [--threshold X]
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+from collections.abc import Callable
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import NamedTuple
+
+from apps.common.benchmarks import (
+    excel_hashing,
+    file_classification,
+    html_parsing,
+    setup_django,
+    string_matching,
+    web_parser,
+)
+
+
+class Benchmark(NamedTuple):
+    """Бенчмарк набора"""
+
+    run: Callable[[], list[dict]]  # Запуск с параметрами набора
+    key: tuple[str, ...]  # Поля строки результата, по которым строки сопоставляются при сравнении
+    metric: str  # Поле с измеренным временем (меньше - лучше)
+    # Ограничения результатов (синтетические данные, пропущенные варианты), сохраняются в отчёт
+    limitations: Callable[[], list[str]] = list
+
+
+# Параметры подобраны так, чтобы весь набор выполнялся за несколько минут
+BENCHMARKS: dict[str, Benchmark] = {
+    "string_matching": Benchmark(
+        lambda: string_matching.run(segment_count=500, repeat=3), ("method",), "us_per_segment"
+    ),
+    "string_list_sizes": Benchmark(
+        lambda: string_matching.run_list_sizes([10, 100, 1000], repeat=3), ("method", "size"), "time_ms"
+    ),
+    "file_classification": Benchmark(
+        lambda: file_classification.run(path_count=2000, repeat=1), ("method",), "us_per_file"
+    ),
+    # 1,2 тыс. - 96 тыс. ячеек
+    "excel_hashing": Benchmark(
+        lambda: excel_hashing.run([100, 1000, 8000], repeat=1),
+        ("method", "format", "rows"),
+        "time_ms",
+        excel_hashing.get_limitations,
+    ),
+    "html_parsing": Benchmark(
+        lambda: html_parsing.run(repeat=10), ("backend", "page"), "time_ms", html_parsing.get_limitations
+    ),
+    "web_parser": Benchmark(lambda: web_parser.run(repeat=3), ("backend",), "time_ms", html_parsing.get_limitations),
+}
+
+
+def get_commit() -> str | None:
+    """Возвращает хэш текущего коммита или None, если git недоступен."""
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def run(names: list[str] | None = None) -> dict:
+    """Запускает бенчмарки (по умолчанию все) и возвращает отчёт для сохранения в JSON."""
+    setup_django()
+    report = {
+        "commit": get_commit(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": {},
+    }
+    for name in names or list(BENCHMARKS):
+        benchmark = BENCHMARKS[name]
+        print(f"Running {name}...", file=sys.stderr)
+        limitations = benchmark.limitations()
+        for note in limitations:
+            print(f"  Note: {note}", file=sys.stderr)
+        report["benchmarks"][name] = {
+            "key": list(benchmark.key),
+            "metric": benchmark.metric,
+            "limitations": limitations,
+            "results": benchmark.run(),
+        }
+    return report
+
+
+def compare(report: dict, baseline: dict, threshold: float = 0.1) -> list[dict]:
+    """
+    Сопоставляет строки результатов с базовым отчётом по ключевым полям.
+    :param report: текущий отчёт
+    :param baseline: отчёт, с которым выполняется сравнение
+    :param threshold: относительное увеличение времени, начиная с которого строка считается регрессией
+    :return: строки сравнения с отношением нового времени к базовому
+    """
+    rows = []
+    for name, current in report["benchmarks"].items():
+        previous = baseline.get("benchmarks", {}).get(name)
+        if previous is None:
+            continue
+        key_fields, metric = current["key"], current["metric"]
+        previous_values = {
+            tuple(row.get(field) for field in key_fields): row[metric] for row in previous["results"]
+        }
+        for row in current["results"]:
+            key = tuple(row.get(field) for field in key_fields)
+            old = previous_values.get(key)
+            if not old:
+                continue
+            ratio = row[metric] / old
+            rows.append({
+                "benchmark": name,
+                "key": "/".join(str(part) for part in key),
+                "metric": metric,
+                "old": old,
+                "new": row[metric],
+                "ratio": ratio,
+                "regression": ratio > 1 + threshold,
+            })
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="запустить только эти бенчмарки")
+    parser.add_argument("--output", type=Path, help="файл JSON (по умолчанию benchmark-<коммит>.json)")
+    parser.add_argument("--compare", type=Path, help="файл JSON с результатами другого коммита")
+    parser.add_argument("--threshold", type=float, default=0.1, help="допустимое относительное замедление")
+    args = parser.parse_args()
+
+    report = run(args.only)
+    output = args.output or Path(f"benchmark-{(report['commit'] or 'local')[:8]}.json")
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"Results saved to {output}")
+
+    if args.compare is None:
+        return
+
+    baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+    rows = compare(report, baseline, args.threshold)
+    print(f"Compared with {(baseline.get('commit') or 'unknown')[:8]}:")
+    print(f"{'benchmark':<22}{'key':<42}{'old':>12}{'new':>12}{'change':>10}")
+    for row in rows:
+        mark = "  REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['benchmark']:<22}{row['key']:<42}{row['old']:>12.2f}{row['new']:>12.2f}"
+            f"{row['ratio'] - 1:>+10.1%}{mark}"
+        )
+    if any(row["regression"] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
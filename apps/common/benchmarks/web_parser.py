@@ -0,0 +1,94 @@
+"""
+Обход сохранённых страниц сайта через WebParser без сети: время обхода, количество страниц и найденных файлов
+для разных способов разбора HTML. Начальная страница отдаётся из index.html, все дочерние - из faculty.html.
+Запуск: python -m apps.common.benchmarks.web_parser [--pages DIR] [--repeat N]
+"""
+import argparse
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import requests
+
+from apps.common.benchmarks import setup_django
+from apps.common.benchmarks.html_parsing import BACKENDS, FIXTURES_DIR, get_limitations
+from apps.common.services.timetable_update.version_core.crawl_budget import CrawlBudget
+from apps.common.services.timetable_update.version_core.html_backend import HtmlParserBackend
+
+START_URL = "https://www.vstu.ru/student/raspisaniya/zanyatiy/"
+
+
+class FixtureClient:
+    """HTTP-клиент с интерфейсом HttpClient, отдающий сохранённые страницы вместо запросов к сайту"""
+
+    def __init__(self, pages_dir: Path) -> None:
+        self.__index = (pages_dir / "index.html").read_bytes()
+        self.__child = (pages_dir / "faculty.html").read_bytes()
+        self.requests_count = 0
+
+    def get(self, url: str, headers: dict[str, str] | None = None, stream: bool = False) -> requests.Response:
+        self.requests_count += 1
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.headers["Content-Type"] = "text/html; charset=utf-8"
+        response._content = self.__index if url == START_URL else self.__child
+        return response
+
+
+def crawl(backend: HtmlParserBackend, pages_dir: Path) -> tuple[int, int]:
+    """Обходит сохранённые страницы в один поток. Возвращает количество загруженных страниц и найденных файлов."""
+    from apps.common.services.timetable_update.version_core.parser import WebParser
+
+    client = FixtureClient(pages_dir)
+    files = list(WebParser.iter_files_from_webpage(
+        START_URL, client=client, html_backend=backend, budget=CrawlBudget(max_depth=1),
+    ))
+    return client.requests_count, len(files)
+
+
+def measure(backend: HtmlParserBackend, pages_dir: Path, repeat: int) -> dict[str, float]:
+    """Возвращает медианное время обхода (мс), пиковую память (КиБ), количество страниц и файлов."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pages, files = crawl(backend, pages_dir)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    crawl(backend, pages_dir)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"time_ms": statistics.median(times) * 1000, "peak_kib": peak / 1024, "pages": pages, "files": files}
+
+
+def run(pages_dir: Path = FIXTURES_DIR, repeat: int = 5) -> list[dict]:
+    """Измеряет обход для всех доступных способов разбора. Django должен быть настроен (setup_django)."""
+    results = []
+    for features, only_content in BACKENDS:
+        if not HtmlParserBackend.is_available(features):
+            continue
+        backend = HtmlParserBackend(features, only_content)
+        results.append({"backend": backend.get_name(), **measure(backend, pages_dir, repeat)})
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=Path, default=FIXTURES_DIR, help="директория с index.html и faculty.html")
+    parser.add_argument("--repeat", type=int, default=5, help="количество повторов обхода")
+    args = parser.parse_args()
+    setup_django()
+
+    for note in get_limitations(args.pages):
+        print(f"Note: {note}", file=sys.stderr)
+    print(f"{'backend':<22}{'pages':>7}{'files':>7}{'time, ms':>10}{'peak, KiB':>12}")
+    for row in run(args.pages, args.repeat):
+        print(f"{row['backend']:<22}{row['pages']:>7}{row['files']:>7}{row['time_ms']:>10.1f}{row['peak_kib']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.common.services.timetable_update.snapshot import restore_archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Восстанавливает локальное хранилище из zip-архива \"Локальное хранилище\" или \"Вся система\" "
+        "вместе с жёсткими ссылками BlobStore"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("archive", type=Path, help="Архив local_backup_*.zip или full_backup_*.zip")
+        parser.add_argument("destination", type=Path, help="Пустой или несуществующий каталог для восстановления")
+
+    def handle(self, *args, archive: Path, destination: Path, **options) -> None:
+        if not archive.is_file():
+            raise CommandError(f"Archive not found: {archive}")
+
+        try:
+            count = restore_archive(archive, destination)
+        except (FileExistsError, FileNotFoundError, KeyError, ValueError) as e:
+            raise CommandError(str(e)) from e
+        self.stdout.write(self.style.SUCCESS(f"Restored {count} files from {archive.name} to {destination}"))
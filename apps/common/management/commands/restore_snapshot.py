@@ -0,0 +1,31 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.common.services.timetable_update.snapshot import INCREMENTAL_DIR, get_latest_snapshot, restore_snapshot
+
+
+class Command(BaseCommand):
+    help = "Восстанавливает локальное хранилище из цепочки инкрементальных снимков"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("destination", type=Path, help="Пустой или несуществующий каталог для восстановления")
+        parser.add_argument(
+            "--snapshot",
+            help="Имя каталога снимка в STATIC_ROOT/snapshot/incremental (по умолчанию последний снимок)",
+        )
+
+    def handle(self, *args, destination: Path, snapshot: str | None, **options) -> None:
+        if snapshot:
+            snapshot_dir = Path(settings.STATIC_ROOT) / "snapshot" / INCREMENTAL_DIR / snapshot
+        else:
+            snapshot_dir = get_latest_snapshot()
+        if snapshot_dir is None or not snapshot_dir.is_dir():
+            raise CommandError(f"Snapshot not found: {snapshot or 'no incremental snapshots'}")
+
+        try:
+            count = restore_snapshot(snapshot_dir, destination)
+        except (FileExistsError, FileNotFoundError, ValueError) as e:
+            raise CommandError(str(e)) from e
+        self.stdout.write(self.style.SUCCESS(f"Restored {count} files from {snapshot_dir.name} to {destination}"))
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.9 on 2026-10-17 06:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HttpValidator',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('url', models.TextField(unique=True, verbose_name='URL страницы или файла')),
+                ('etag', models.CharField(blank=True, default=None, max_length=255, null=True, verbose_name='ETag')),
+                ('last_modified', models.CharField(blank=True, default=None, max_length=64, null=True, verbose_name='Last-Modified')),
+                ('content', models.TextField(blank=True, default=None, null=True, verbose_name='Основной контент страницы')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+            ],
+            options={
+                'verbose_name': 'HTTP-валидатор',
+                'verbose_name_plural': 'HTTP-валидаторы',
+                'db_table': 'http_validator',
+            },
+        ),
+    ]
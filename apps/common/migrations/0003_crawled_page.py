@@ -0,0 +1,28 @@
+# Generated by Django 6.0.9 on 2026-10-17 06:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0002_http_validator'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CrawledPage',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('url', models.TextField(unique=True, verbose_name='URL страницы')),
+                ('content_digest', models.CharField(max_length=64, verbose_name='SHA-256 хэш основного контента страницы')),
+                ('entries', models.JSONField(default=list, verbose_name='Элементы страницы')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+            ],
+            options={
+                'verbose_name': 'Разобранная страница',
+                'verbose_name_plural': 'Разобранные страницы',
+                'db_table': 'crawled_page',
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 6.0.9 on 2026-10-17 06:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_latest_version(apps, schema_editor):
+    """Заполняет ссылку на последнюю версию файла у существующих ресурсов одним запросом."""
+    Resource = apps.get_model("common", "Resource")
+    FileVersion = apps.get_model("common", "FileVersion")
+    latest = FileVersion.objects.filter(resource=OuterRef("pk")).order_by("-timestamp", "-id").values("id")[:1]
+    Resource.objects.update(latest_version=Subquery(latest))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0003_crawled_page'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resource',
+            name='latest_version',
+            field=models.ForeignKey(blank=True, default=None, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='common.fileversion', verbose_name='Последняя версия файла'),
+        ),
+        migrations.AddIndex(
+            model_name='fileversion',
+            index=models.Index(fields=['resource', '-timestamp'], name='file_version_resource_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fileversion',
+            index=models.Index(fields=['hashsum'], name='file_version_hashsum_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resource',
+            index=models.Index(fields=['path'], name='resource_path_idx'),
+        ),
+        migrations.RunPython(fill_latest_version, migrations.RunPython.noop),
+    ]
@@ -39,29 +39,51 @@ class Resource(models.Model):
         verbose_name="Теги",
     )
     deprecated = models.BooleanField(default=False, verbose_name="Ресурс устарел")
+    # Последняя версия файла: проверка изменения файла читает одну строку без сортировки истории версий
+    latest_version = models.ForeignKey(
+        "FileVersion",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        default=None,
+        related_name="+",
+        verbose_name="Последняя версия файла",
+    )
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._pending_tags: list["Tag"] = []
 
     def add_tags(self, *tags: "Tag") -> None:
+        """Связывает ресурс с тегами. Для несохранённого ресурса или тега связь запишется при сохранении ресурса."""
         for tag in tags:
-            if Tag.objects.filter(id=tag.id).exists():
+            if self.pk is not None and tag.pk is not None:
                 self.tags.add(tag)
             else:
                 self._pending_tags.append(tag)
 
     def save(self, *args, **kwargs) -> None:
         super().save(*args, **kwargs)
-        for tag in self._pending_tags:
+        self.save_pending_tags()
+
+    def save_pending_tags(self) -> None:
+        """Сохраняет теги, добавленные до сохранения ресурса."""
+        for tag in self.pop_pending_tags():
             saved_tag, _ = Tag.objects.get_or_create(name=tag.name, category=tag.category)
             self.tags.add(saved_tag)
-        self._pending_tags.clear()
+
+    def pop_pending_tags(self) -> list["Tag"]:
+        """Возвращает теги, ожидающие сохранения ресурса, и очищает их список (для массовой записи связей)."""
+        tags, self._pending_tags = self._pending_tags, []
+        return tags
 
     class Meta:
         db_table = "resource"
         verbose_name = "Ресурс"
         verbose_name_plural = "Ресурсы"
+        indexes = [
+            models.Index(fields=["path"], name="resource_path_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.name} ({self.path})"
@@ -92,11 +114,69 @@ class FileVersion(models.Model):
         db_table = "file_version"
         verbose_name = "Версия файла"
         verbose_name_plural = "Версии файлов"
+        indexes = [
+            models.Index(fields=["resource", "-timestamp"], name="file_version_resource_ts_idx"),
+            models.Index(fields=["hashsum"], name="file_version_hashsum_idx"),
+        ]
+
+    def save(self, *args, **kwargs) -> None:
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if adding:
+            # timestamp задаётся при создании, поэтому новая версия всегда последняя
+            Resource.objects.filter(pk=self.resource_id).update(latest_version=self)
 
     def __str__(self) -> str:
         return f"{self.resource.name} | {self.timestamp} | {self.hashsum[:8]}"
 
 
+class HttpValidator(models.Model):
+    """
+    Валидаторы HTTP-кэша (ETag / Last-Modified) для страницы или файла сайта.
+    Используются для условных запросов: при ответе 304 страница или файл не загружаются повторно.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    url = models.TextField(unique=True, verbose_name="URL страницы или файла")
+    etag = models.CharField(max_length=255, null=True, blank=True, default=None, verbose_name="ETag")
+    last_modified = models.CharField(max_length=64, null=True, blank=True, default=None, verbose_name="Last-Modified")
+    # Основной контент страницы, используемый при ответе 304 (для файлов не заполняется)
+    content = models.TextField(null=True, blank=True, default=None, verbose_name="Основной контент страницы")
+    updated = models.DateTimeField(auto_now=True, verbose_name="Дата обновления")
+
+    class Meta:
+        db_table = "http_validator"
+        verbose_name = "HTTP-валидатор"
+        verbose_name_plural = "HTTP-валидаторы"
+
+    def __str__(self) -> str:
+        return f"{self.url} ({self.etag or self.last_modified})"
+
+
+class CrawledPage(models.Model):
+    """
+    Результат разбора страницы сайта при обходе: хэш основного контента страницы
+    и найденные на ней файлы и ссылки на дочерние страницы.
+    Если контент страницы не изменился, найденные элементы берутся из этой записи без повторного разбора.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    url = models.TextField(unique=True, verbose_name="URL страницы")
+    content_digest = models.CharField(max_length=64, verbose_name="SHA-256 хэш основного контента страницы")
+    # Список элементов страницы: {"url": ..., "path": ..., "last_update": ...} для файлов
+    # и {"url": ..., "path": ..., "page": true} для дочерних страниц; path задан относительно пути страницы
+    entries = models.JSONField(default=list, verbose_name="Элементы страницы")
+    updated = models.DateTimeField(auto_now=True, verbose_name="Дата обновления")
+
+    class Meta:
+        db_table = "crawled_page"
+        verbose_name = "Разобранная страница"
+        verbose_name_plural = "Разобранные страницы"
+
+    def __str__(self) -> str:
+        return f"{self.url} ({self.content_digest[:8]})"
+
+
 class Setting(models.Model):
     """Настройки проекта в формате ключ-значение. Управляются через панель."""
 
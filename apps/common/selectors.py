@@ -0,0 +1,36 @@
+from collections.abc import Iterable
+from datetime import datetime
+from typing import NamedTuple
+
+from apps.common.models import FileVersion, Resource
+
+
+class LatestVersion(NamedTuple):
+    """Последняя версия файла ресурса: данные, нужные для проверки изменения файла"""
+
+    hashsum: str  # Хэш содержимого файла
+    last_changed: datetime | None  # Дата изменения по данным сайта
+    id: int | None  # id записи FileVersion (None, если версия ещё не сохранена)
+
+    @classmethod
+    def from_version(cls, version: FileVersion) -> "LatestVersion":
+        return cls(version.hashsum, version.last_changed, version.id)
+
+
+def get_latest_versions(resource_ids: Iterable[int] | None = None) -> dict[int, LatestVersion]:
+    """
+    Возвращает последнюю версию каждого ресурса одним запросом по ссылке Resource.latest_version,
+    без сортировки истории версий.
+    :param resource_ids: id ресурсов (по умолчанию все ресурсы)
+    :return: словарь id ресурса -> последняя версия (ресурсы без версий не включаются)
+    """
+    resources = Resource.objects.filter(latest_version__isnull=False)
+    if resource_ids is not None:
+        resources = resources.filter(id__in=list(resource_ids))
+
+    return {
+        resource_id: LatestVersion(hashsum, last_changed, version_id)
+        for resource_id, hashsum, last_changed, version_id in resources.values_list(
+            "id", "latest_version__hashsum", "latest_version__last_changed", "latest_version_id"
+        )
+    }
@@ -3,7 +3,7 @@ import shutil
 
 from django.conf import settings
 
-from apps.common.models import Resource, FileVersion, Tag
+from apps.common.models import Resource, FileVersion, Tag, HttpValidator, CrawledPage
 
 logger = logging.getLogger(__name__)
 
@@ -31,10 +31,12 @@ def clear_storage_by_component(component: str) -> None:
 
 
 def _clear_database() -> None:
-    """Удаляет все записи FileVersion, Resource, Tag из БД."""
+    """Удаляет все записи FileVersion, Resource, Tag, HttpValidator, CrawledPage из БД."""
     FileVersion.objects.all().delete()
     Resource.objects.all().delete()
     Tag.objects.all().delete()
+    HttpValidator.objects.all().delete()
+    CrawledPage.objects.all().delete()
     logger.info("Database cleared")
 
 
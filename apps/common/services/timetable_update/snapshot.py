@@ -1,13 +1,45 @@
+import hashlib
+import io
+import json
 import logging
+import os
 import shutil
+import zipfile
+from collections.abc import Callable, Iterator
 from datetime import datetime
 from pathlib import Path
+from typing import NamedTuple
 
 from django.conf import settings
 from django.core.management import call_command
 
+from apps.common.services.timetable_update.version_core.blob_store import BlobStore
+
 logger = logging.getLogger(__name__)
 
+INCREMENTAL_DIR = "incremental"  # Подкаталог снимков в STATIC_ROOT/snapshot
+MANIFEST_NAME = "manifest.json"
+OBJECTS_DIR = "objects"
+HASH_CHUNK_SIZE = 1024 * 1024
+DATABASE_MEMBER = "database_dump.json"
+# Файлы BlobStore, содержимое которых записано в архив по пути ресурса (жёсткие ссылки хранилища):
+# путь в архиве -> путь в архиве записанного файла. Ссылки восстанавливает restore_backup (restore_archive)
+HARDLINKS_MEMBER = "hardlinks.json"
+FULL_BACKUP_PREFIX = "local/"  # Каталог файлов хранилища в архиве "Вся система"
+# Файлы, которые уже сжаты: в архив добавляются без повторного сжатия (ZIP_STORED)
+COMPRESSED_SUFFIXES = frozenset({".xlsx", ".xlsm", ".docx", ".pptx", ".ods", ".odt", ".zip", ".gz", ".7z", ".rar",
+                                 ".pdf", ".png", ".jpg", ".jpeg"})
+
+
+class BackupProgress(NamedTuple):
+    """Ход создания архива после добавления очередного файла"""
+
+    member: str  # Имя добавленного файла в архиве
+    done_members: int  # Количество добавленных файлов
+    total_members: int  # Общее количество файлов архива
+    done_bytes: int  # Размер добавленных файлов хранилища
+    total_bytes: int  # Общий размер файлов хранилища (без дампа БД, размер которого заранее неизвестен)
+
 
 def _get_timestamp() -> str:
     return datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
@@ -19,11 +51,6 @@ def _create_backup_dir(subfolder_name: str) -> Path:
     return backup_dir
 
 
-def _zip_directory(source_dir: Path, destination_no_ext: Path) -> Path:
-    shutil.make_archive(str(destination_no_ext), "zip", str(source_dir))
-    return Path(str(destination_no_ext) + ".zip")
-
-
 def database_backup() -> Path:
     """Создаёт дамп БД в JSON и возвращает путь к файлу."""
     backup_dir = _create_backup_dir("database_backups")
@@ -34,56 +61,329 @@ def database_backup() -> Path:
     return backup_file
 
 
-def local_backup() -> Path:
-    """Создаёт zip-архив локального хранилища и возвращает путь к архиву."""
+def local_backup(progress: Callable[[BackupProgress], None] | None = None) -> Path:
+    """
+    Создаёт zip-архив локального хранилища и возвращает путь к архиву.
+    :param progress: функция, вызываемая после добавления каждого файла в архив
+    """
     backup_dir = _create_backup_dir("local_filesystem")
-    backup_file_no_ext = backup_dir / f"local_backup_{_get_timestamp()}"
-    archive = _zip_directory(settings.DATA_STORAGE_DIR, backup_file_no_ext)
-    logger.info(f"Local backup created: {archive}")
+    archive = backup_dir / f"local_backup_{_get_timestamp()}.zip"
+    file_count, total_bytes = _write_archive(archive, "", False, progress)
+    logger.info(f"Local backup created: {archive} ({file_count} files, {total_bytes} bytes)")
     return archive
 
 
-def full_backup() -> Path:
-    """Создаёт общий zip-архив (БД + локальные файлы)."""
+def full_backup(progress: Callable[[BackupProgress], None] | None = None) -> Path:
+    """
+    Создаёт общий zip-архив (БД + локальные файлы).
+    Дамп БД и файлы хранилища записываются в архив по одному, без временной копии хранилища.
+    :param progress: функция, вызываемая после добавления каждого файла в архив (например, для панели управления)
+    """
     backup_dir = _create_backup_dir("full_backup")
-    now = _get_timestamp()
+    archive = backup_dir / f"full_backup_{_get_timestamp()}.zip"
+    file_count, total_bytes = _write_archive(archive, FULL_BACKUP_PREFIX, True, progress)
+    logger.info(f"Full backup created: {archive} ({file_count} files, {total_bytes} bytes)")
+    return archive
+
+
+def _write_archive(
+    archive: Path, prefix: str, with_database: bool, progress: Callable[[BackupProgress], None] | None
+) -> tuple[int, int]:
+    """
+    Записывает в zip-архив дамп БД (если with_database) и файлы хранилища с префиксом prefix.
+    Все файлы вне BlobStore записываются в архив, поэтому распакованный архив содержит полное дерево ресурсов.
+    Файл BlobStore, содержимое которого уже записано по пути ресурса (жёсткая ссылка на последнюю версию),
+    не записывается повторно, а перечисляется в HARDLINKS_MEMBER (см. restore_archive).
+    Архив записывается под временным именем и переименовывается после записи всех файлов.
+    Возвращает количество и общий размер записанных файлов хранилища.
+    """
+    storage_dir = settings.DATA_STORAGE_DIR
+    files: list[tuple[Path, str, int]] = []  # Путь к файлу, путь в архиве, размер
+    hardlinks: dict[str, str] = {}  # Путь в архиве -> путь в архиве уже записанного содержимого
+    written: dict[tuple[int, int], str] = {}  # (устройство, inode) -> путь в архиве
+    storage_files = list(_iter_storage_files(storage_dir)) if storage_dir.is_dir() else []
+    # Файлы по путям ресурсов записываются раньше файлов BlobStore (сортировка устойчива)
+    storage_files.sort(key=lambda path: _is_blob(path.relative_to(storage_dir)))
+    for file_path in storage_files:
+        stat = file_path.stat()
+        name = prefix + file_path.relative_to(storage_dir).as_posix()
+        first_name = written.setdefault((stat.st_dev, stat.st_ino), name)
+        if first_name != name and _is_blob(file_path.relative_to(storage_dir)):
+            hardlinks[name] = first_name
+        else:
+            files.append((file_path, name, stat.st_size))
 
-    # Временная папка для сборки
-    temp_dir = backup_dir / f"temp_{now}"
-    temp_dir.mkdir()
+    total_members = len(files) + int(with_database) + int(bool(hardlinks))
+    total_bytes = sum(size for _, _, size in files)
+    done_members = done_bytes = 0
+    temp_archive = archive.with_name(archive.name + ".tmp")
+
+    def report(member: str) -> None:
+        nonlocal done_members
+        done_members += 1
+        if progress:
+            progress(BackupProgress(member, done_members, total_members, done_bytes, total_bytes))
 
     try:
-        # БД
-        db_file = temp_dir / "database_dump.json"
-        with db_file.open("w", encoding="utf-8") as f:
-            call_command("dumpdata", stdout=f)
+        with zipfile.ZipFile(temp_archive, "w", compression=zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
+            if with_database:
+                with zf.open(DATABASE_MEMBER, "w", force_zip64=True) as member:
+                    with io.TextIOWrapper(member, encoding="utf-8") as f:
+                        call_command("dumpdata", stdout=f)
+                report(DATABASE_MEMBER)
 
-        # Локальные файлы
-        local_dest = temp_dir / "local"
-        shutil.copytree(settings.DATA_STORAGE_DIR, local_dest)
+            for file_path, name, size in files:
+                compress_type = zipfile.ZIP_STORED if file_path.suffix.lower() in COMPRESSED_SUFFIXES else None
+                zf.write(file_path, name, compress_type=compress_type)
+                done_bytes += size
+                report(name)
 
-        archive = _zip_directory(temp_dir, backup_dir / f"full_backup_{now}")
-    finally:
-        shutil.rmtree(temp_dir, ignore_errors=True)
+            if hardlinks:
+                zf.writestr(HARDLINKS_MEMBER, json.dumps(hardlinks, ensure_ascii=False, indent=2))
+                report(HARDLINKS_MEMBER)
+        os.replace(temp_archive, archive)
+    except BaseException:
+        temp_archive.unlink(missing_ok=True)
+        raise
+    return len(files), total_bytes
 
-    logger.info(f"Full backup created: {archive}")
-    return archive
+
+def restore_archive(archive: Path, destination: Path) -> int:
+    """
+    Распаковывает файлы хранилища из архива local_backup или full_backup и восстанавливает жёсткие ссылки
+    файлов BlobStore по HARDLINKS_MEMBER (если ссылки не поддерживаются, файлы копируются).
+    Дамп БД из архива full_backup не распаковывается (загружается отдельно: manage.py loaddata).
+    Возвращает количество восстановленных файлов.
+    :param archive: zip-архив local_backup или full_backup
+    :param destination: пустой или несуществующий каталог, в который восстанавливаются файлы
+    """
+    if destination.exists() and any(destination.iterdir()):
+        raise FileExistsError(f"Destination is not empty: {destination}")
+
+    with zipfile.ZipFile(archive) as zf:
+        names = zf.namelist()
+        prefix = FULL_BACKUP_PREFIX if DATABASE_MEMBER in names else ""
+        hardlinks = json.loads(zf.read(HARDLINKS_MEMBER)) if HARDLINKS_MEMBER in names else {}
+
+        count = 0
+        for info in zf.infolist():
+            if info.is_dir() or not info.filename.startswith(prefix) or info.filename == HARDLINKS_MEMBER:
+                continue
+            dest_path = _get_restore_path(destination, info.filename[len(prefix):])
+            dest_path.parent.mkdir(parents=True, exist_ok=True)
+            with zf.open(info) as source, dest_path.open("wb") as target:
+                shutil.copyfileobj(source, target)
+            mtime = datetime(*info.date_time).timestamp()
+            os.utime(dest_path, (mtime, mtime))
+            count += 1
+
+    for name, first_name in hardlinks.items():
+        dest_path = _get_restore_path(destination, name[len(prefix):])
+        source_path = _get_restore_path(destination, first_name[len(prefix):])
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(source_path, dest_path)
+        except OSError:
+            shutil.copy2(source_path, dest_path)
+        count += 1
+
+    logger.info(f"Backup {archive.name} restored to {destination}: {count} files")
+    return count
+
+
+def _get_restore_path(destination: Path, relative_path: str) -> Path:
+    """Возвращает путь файла архива в каталоге восстановления, не допуская выхода за его пределы."""
+    dest_path = (destination / relative_path).resolve()
+    if not dest_path.is_relative_to(destination.resolve()):
+        raise ValueError(f"Archive member is outside the destination: {relative_path}")
+    return dest_path
+
+
+def _is_blob(relative_path: Path) -> bool:
+    """Проверяет, находится ли файл хранилища в BlobStore."""
+    return relative_path.parts[0] == BlobStore.BLOB_DIR
+
+
+def incremental_backup() -> Path:
+    """
+    Создаёт инкрементальный снимок локального хранилища и возвращает путь к его манифесту.
+    Манифест содержит все файлы хранилища (относительный путь, размер, mtime, sha256) и ссылку на предыдущий
+    снимок цепочки. В снимок копируются только файлы, содержимого которых нет в предыдущих снимках цепочки;
+    файлы с тем же размером и mtime, что и в предыдущем снимке, не хэшируются повторно.
+    """
+    backup_dir = _create_backup_dir(INCREMENTAL_DIR)
+    parent = get_latest_snapshot()
+    parent_files = {entry["path"]: entry for entry in _load_manifest(parent)["files"]} if parent else {}
+    known_hashes = {sha256 for _, manifest in _iter_chain(parent) for sha256 in manifest["stored"]}
+
+    snapshot_dir = _create_snapshot_dir(backup_dir)
+    files: list[dict] = []
+    stored: list[str] = []
+    hashed_count = stored_bytes = 0
+    inode_hashes: dict[tuple[int, int], str] = {}  # Жёсткие ссылки хранилища хэшируются один раз
+    try:
+        for file_path in _iter_storage_files(settings.DATA_STORAGE_DIR):
+            stat = file_path.stat()
+            relative_path = file_path.relative_to(settings.DATA_STORAGE_DIR).as_posix()
+            previous = parent_files.get(relative_path)
+            if previous and previous["size"] == stat.st_size and previous["mtime"] == stat.st_mtime:
+                sha256 = previous["sha256"]
+            elif (stat.st_dev, stat.st_ino) in inode_hashes:
+                sha256 = inode_hashes[(stat.st_dev, stat.st_ino)]
+            else:
+                sha256 = _get_sha256(file_path)
+                hashed_count += 1
+            inode_hashes[(stat.st_dev, stat.st_ino)] = sha256
+
+            if sha256 not in known_hashes:
+                object_path = _get_object_path(snapshot_dir, sha256)
+                object_path.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(file_path, object_path)
+                known_hashes.add(sha256)
+                stored.append(sha256)
+                stored_bytes += stat.st_size
+            files.append({"path": relative_path, "size": stat.st_size, "mtime": stat.st_mtime, "sha256": sha256})
+
+        manifest = {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "parent": parent.name if parent else None,
+            "files": files,
+            "stored": stored,
+        }
+        # Манифест записывается последним: снимок без манифеста не входит в цепочку
+        temp_manifest = snapshot_dir / f"{MANIFEST_NAME}.tmp"
+        temp_manifest.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+        os.replace(temp_manifest, snapshot_dir / MANIFEST_NAME)
+    except BaseException:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+        raise
+
+    logger.info(
+        f"Incremental backup created: {snapshot_dir} ({len(files)} files, {hashed_count} hashed, "
+        f"{len(stored)} stored, {stored_bytes} bytes, parent {manifest['parent']})"
+    )
+    return snapshot_dir / MANIFEST_NAME
+
+
+def get_latest_snapshot() -> Path | None:
+    """Возвращает каталог последнего завершённого инкрементального снимка или None."""
+    backup_dir = Path(settings.STATIC_ROOT) / "snapshot" / INCREMENTAL_DIR
+    if not backup_dir.is_dir():
+        return None
+    snapshots = sorted(path.parent for path in backup_dir.glob(f"*/{MANIFEST_NAME}"))
+    return snapshots[-1] if snapshots else None
+
+
+def restore_snapshot(snapshot_dir: Path, destination: Path) -> int:
+    """
+    Восстанавливает полное дерево файлов инкрементального снимка по цепочке снимков.
+    Файлы с одинаковым содержимым восстанавливаются жёсткими ссылками, как в хранилище.
+    Возвращает количество восстановленных файлов.
+    :param snapshot_dir: каталог снимка
+    :param destination: пустой или несуществующий каталог, в который восстанавливаются файлы
+    """
+    if destination.exists() and any(destination.iterdir()):
+        raise FileExistsError(f"Destination is not empty: {destination}")
+
+    files: list[dict] = []
+    objects: dict[str, Path] = {}  # sha256 -> файл содержимого в одном из снимков цепочки
+    for chain_dir, manifest in _iter_chain(snapshot_dir):
+        if chain_dir == snapshot_dir:
+            files = manifest["files"]
+        for sha256 in manifest["stored"]:
+            objects.setdefault(sha256, _get_object_path(chain_dir, sha256))
+
+    restored: dict[str, Path] = {}  # sha256 -> первый восстановленный файл
+    for entry in files:
+        dest_path = destination / entry["path"]
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        sha256 = entry["sha256"]
+        if sha256 in restored:
+            try:
+                os.link(restored[sha256], dest_path)
+                continue
+            except OSError:
+                pass
+        object_path = objects.get(sha256)
+        if object_path is None:
+            raise FileNotFoundError(f"Content of {entry['path']} is missing in snapshot chain: {sha256}")
+        shutil.copy2(object_path, dest_path)
+        if _get_sha256(dest_path) != sha256:
+            raise ValueError(f"Restored file is corrupted: {entry['path']}")
+        os.utime(dest_path, (entry["mtime"], entry["mtime"]))
+        restored[sha256] = dest_path
+
+    logger.info(f"Snapshot {snapshot_dir.name} restored to {destination}: {len(files)} files")
+    return len(files)
+
+
+def _create_snapshot_dir(backup_dir: Path) -> Path:
+    """
+    Создаёт каталог нового снимка. Имя содержит время с микросекундами, поэтому снимки сортируются по времени;
+    если каталог с таким именем уже существует, берётся следующее время.
+    """
+    while True:
+        snapshot_dir = backup_dir / f"incremental_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S-%f')}"
+        try:
+            snapshot_dir.mkdir()
+            return snapshot_dir
+        except FileExistsError:
+            continue
+
+
+def _load_manifest(snapshot_dir: Path) -> dict:
+    return json.loads((snapshot_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+
+
+def _iter_chain(snapshot_dir: Path | None) -> Iterator[tuple[Path, dict]]:
+    """Перебирает каталоги и манифесты снимков цепочки от snapshot_dir до первого снимка."""
+    while snapshot_dir is not None:
+        manifest = _load_manifest(snapshot_dir)
+        yield snapshot_dir, manifest
+        snapshot_dir = snapshot_dir.parent / manifest["parent"] if manifest["parent"] else None
+
+
+def _iter_storage_files(storage_dir: Path) -> Iterator[Path]:
+    """Перебирает файлы хранилища, кроме временных файлов BlobStore."""
+    temp_dir = storage_dir / BlobStore.TEMP_BLOB_DIR
+    for root, dirs, file_names in os.walk(storage_dir):
+        root_path = Path(root)
+        if root_path == temp_dir.parent:
+            dirs[:] = [name for name in dirs if root_path / name != temp_dir]
+        dirs.sort()
+        for name in sorted(file_names):
+            yield root_path / name
+
+
+def _get_object_path(snapshot_dir: Path, sha256: str) -> Path:
+    return snapshot_dir / OBJECTS_DIR / sha256[:2] / sha256
+
+
+def _get_sha256(file_path: Path) -> str:
+    sha256 = hashlib.sha256()
+    with file_path.open("rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            sha256.update(chunk)
+    return sha256.hexdigest()
 
 
-def make_snapshot(snapshot_type: str) -> str:
+def make_snapshot(snapshot_type: str, progress: Callable[[BackupProgress], None] | None = None) -> str:
     """
     Создаёт снимок системы по типу и возвращает относительный путь к файлу.
     Вызывается из Celery-задачи.
 
-    :param snapshot_type: "База данных", "Локальное хранилище", "Вся система"
+    :param snapshot_type: "База данных", "Локальное хранилище", "Вся система", "Инкрементальный снимок"
+    :param progress: функция хода создания архива "Локальное хранилище" и "Вся система" (см. full_backup)
     """
     match snapshot_type:
         case "База данных":
             file_path = database_backup()
         case "Локальное хранилище":
-            file_path = local_backup()
+            file_path = local_backup(progress)
         case "Вся система":
-            file_path = full_backup()
+            file_path = full_backup(progress)
+        case "Инкрементальный снимок":
+            file_path = incremental_backup()
         case _:
             raise ValueError(f"Неизвестный тип снимка: {snapshot_type!r}")
 
@@ -0,0 +1,210 @@
+import errno
+import logging
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from apps.common.models import FileVersion
+
+logger = logging.getLogger(__name__)
+
+
+class BlobStore:
+    """
+    Хранилище содержимого версий файлов по хэшу (FileVersion.hashsum).
+    Содержимое каждой версии хранится один раз в BLOB_DIR внутри DATA_STORAGE_DIR, в подкаталогах
+    по первым символам хэша: <BLOB_DIR>/ab/cd/<хэш><расширение>. Файл с уже сохранённым хэшом не записывается
+    повторно. По пути ресурса (resource.path/<имя файла>) создаётся жёсткая ссылка на последнюю версию,
+    поэтому предыдущие версии остаются доступными, а одинаковые файлы разных ресурсов не занимают место дважды.
+
+    Скачанный файл помещается в хранилище без копирования - жёсткой ссылкой на временный файл, который удаляется
+    после обработки всех ссылок на него (SharedDownloads). Файл копируется, только если временный каталог
+    находится на другом устройстве или жёсткие ссылки не поддерживаются: копия пишется в TEMP_BLOB_DIR
+    и переименовывается через os.replace, поэтому недописанный файл никогда не появляется под своим именем.
+    """
+
+    BLOB_DIR = ".blobs"
+    TEMP_BLOB_DIR = ".blobs/.tmp"
+    # Время, через которое временный файл считается оставшимся после аварийного завершения, секунды.
+    # Более новые файлы могут принадлежать другому запущенному обновлению и не удаляются
+    STALE_TEMP_AGE = 60 * 60
+    SHARD_LEVELS = 2  # Количество уровней подкаталогов
+    SHARD_WIDTH = 2  # Количество символов хэша в имени подкаталога
+
+    FSYNC_NONE = "none"  # Не вызывать fsync
+    FSYNC_FILE = "file"  # Записывать содержимое файла на диск до появления его имени в хранилище
+    FSYNC_FULL = "full"  # Дополнительно записывать на диск каталог с новым именем
+    FSYNC_POLICIES = (FSYNC_NONE, FSYNC_FILE, FSYNC_FULL)
+
+    # Ошибки os.link, при которых файл копируется: другое устройство или жёсткие ссылки не поддерживаются
+    LINK_FALLBACK_ERRORS = frozenset({errno.EXDEV, errno.EPERM, errno.ENOTSUP, errno.EMLINK})
+
+    def __init__(self, storage_dir: Path, fsync: str = FSYNC_FILE) -> None:
+        """
+        :param storage_dir: каталог хранилища (DATA_STORAGE_DIR)
+        :param fsync: политика fsync (FSYNC_NONE, FSYNC_FILE или FSYNC_FULL)
+        """
+        if fsync not in self.FSYNC_POLICIES:
+            logger.warning(f"Unknown fsync policy {fsync!r}, using {self.FSYNC_FILE!r}")
+            fsync = self.FSYNC_FILE
+
+        self.__storage_dir = storage_dir
+        self.__blob_dir = storage_dir / self.BLOB_DIR
+        self.__temp_dir = storage_dir / self.TEMP_BLOB_DIR
+        self.__fsync = fsync
+        self.__remove_stale_temp_files()
+        self.reset_stats()
+
+    @classmethod
+    def from_settings(cls) -> "BlobStore":
+        """Создаёт хранилище с параметрами из настроек Django."""
+        from django.conf import settings
+
+        return cls(settings.DATA_STORAGE_DIR, settings.TIMETABLE_STORAGE_FSYNC)
+
+    def get_blob_path(self, hashsum: str, suffix: str = "") -> Path:
+        """
+        Возвращает путь к содержимому файла с хэшом hashsum.
+        :param hashsum: хэш содержимого (может иметь префикс версии хэша, например "v2:")
+        :param suffix: расширение файла. Хэш файлов Excel считается по ячейкам, поэтому у .xls и .xlsx
+        с одинаковым содержимым хэш совпадает, а сами файлы - нет
+        """
+        prefix, _, digest = hashsum.rpartition(":")
+        name = f"{prefix}-{digest}" if prefix else digest
+        shards = [digest[i * self.SHARD_WIDTH:(i + 1) * self.SHARD_WIDTH] for i in range(self.SHARD_LEVELS)]
+        return self.__blob_dir.joinpath(*shards, name + suffix.lower())
+
+    def get_version_path(self, version: FileVersion) -> Path | None:
+        """Возвращает путь к сохранённому содержимому версии файла или None, если его нет в хранилище."""
+        blob_path = self.get_blob_path(version.hashsum, version.mimetype)
+        return blob_path if blob_path.is_file() else None
+
+    def put(self, file_path: Path, version: FileVersion) -> Path:
+        """
+        Сохраняет содержимое версии файла, если файла с таким хэшом ещё нет. Возвращает путь к содержимому.
+        :param file_path: путь к скачанному файлу (не изменяется и не удаляется)
+        :param version: версия файла с посчитанным хэшом
+        """
+        blob_path = self.get_blob_path(version.hashsum, version.mimetype)
+        size = file_path.stat().st_size
+        if blob_path.is_file():
+            self.__deduplicated_count += 1
+            self.__deduplicated_bytes += size
+            logger.debug(f"Blob already stored: {blob_path.name}")
+            return blob_path
+
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.__fsync != self.FSYNC_NONE:
+            self.__sync_file(file_path)
+        try:
+            os.link(file_path, blob_path)
+        except OSError as e:
+            if e.errno not in self.LINK_FALLBACK_ERRORS:
+                raise
+            self.__copy(file_path, blob_path)
+            self.__copied_count += 1
+        self.__sync_dir(blob_path.parent)
+        self.__stored_count += 1
+        self.__stored_bytes += size
+        logger.debug(f"Blob stored: {blob_path.name}")
+        return blob_path
+
+    def link(self, blob_path: Path, relative_path: Path | str) -> Path:
+        """
+        Создаёт по пути relative_path внутри хранилища жёсткую ссылку на содержимое blob_path,
+        заменяя прежний файл. Если файловая система не поддерживает жёсткие ссылки, файл копируется.
+        Возвращает путь к ссылке.
+        """
+        dest_path = self.__storage_dir / relative_path
+        if dest_path.is_file() and os.path.samefile(dest_path, blob_path):
+            return dest_path
+
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.__get_temp_path(dest_path.name)
+        try:
+            os.link(blob_path, temp_path)
+        except OSError:
+            self.__copy(blob_path, dest_path)
+            self.__copied_links += 1
+        else:
+            os.replace(temp_path, dest_path)
+        self.__sync_dir(dest_path.parent)
+        return dest_path
+
+    def reset_stats(self) -> None:
+        """Сбрасывает статистику хранилища перед новым запуском обновления."""
+        self.__stored_count = 0
+        self.__stored_bytes = 0
+        self.__deduplicated_count = 0
+        self.__deduplicated_bytes = 0
+        self.__copied_count = 0  # Файлы, скопированные с другого устройства
+        self.__copied_links = 0
+
+    def log_stats(self) -> None:
+        """Выводит статистику записи и дедупликации файлов в лог."""
+        logger.info(
+            f"Blob store: {self.__stored_count} files stored ({self.__stored_bytes} bytes), "
+            f"{self.__deduplicated_count} deduplicated ({self.__deduplicated_bytes} bytes saved)"
+        )
+        if self.__copied_count:
+            logger.info(f"{self.__copied_count} files copied: cannot link temp files into the storage directory")
+        if self.__copied_links:
+            logger.warning(f"Hard links are not supported, {self.__copied_links} files copied instead")
+
+    # ------------------- ПРИВАТНЫЕ МЕТОДЫ ------------------- #
+
+    def __remove_stale_temp_files(self) -> None:
+        """Удаляет временные файлы, оставшиеся после аварийного завершения."""
+        if not self.__temp_dir.is_dir():
+            return
+        # Время изменения метаданных: copy2 переносит mtime исходного файла на копию
+        expired = time.time() - self.STALE_TEMP_AGE
+        for temp_path in self.__temp_dir.iterdir():
+            try:
+                if temp_path.stat().st_ctime < expired:
+                    temp_path.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Failed to remove stale temp file {temp_path}: {e}")
+
+    def __get_temp_path(self, name: str) -> Path:
+        """Возвращает свободный путь во временном каталоге хранилища."""
+        self.__temp_dir.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(prefix=".", suffix=f"_{name}", dir=self.__temp_dir)
+        os.close(fd)
+        os.unlink(temp_name)
+        return Path(temp_name)
+
+    def __copy(self, source_path: Path, dest_path: Path) -> None:
+        """Копирует файл во временный каталог хранилища и переименовывает в dest_path."""
+        temp_path = self.__get_temp_path(dest_path.name)
+        try:
+            shutil.copy2(source_path, temp_path)
+            if self.__fsync != self.FSYNC_NONE:
+                self.__sync_file(temp_path)
+            os.replace(temp_path, dest_path)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+
+    @staticmethod
+    def __sync_file(file_path: Path) -> None:
+        """Записывает содержимое файла на диск."""
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def __sync_dir(self, dir_path: Path) -> None:
+        """Записывает на диск каталог (новые имена файлов в нём) при политике FSYNC_FULL."""
+        if self.__fsync != self.FSYNC_FULL or os.name != "posix":
+            return
+        fd = os.open(dir_path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
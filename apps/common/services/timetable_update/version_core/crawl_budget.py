@@ -0,0 +1,80 @@
+import logging
+from urllib.parse import urldefrag, urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Приводит ссылку к каноническому виду для сравнения: без фрагмента (#...),
+    со схемой и хостом в нижнем регистре, без порта по умолчанию и с путём "/" вместо пустого.
+    """
+    url, _ = urldefrag(url)
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or "").lower()
+    if parts.port is not None and parts.port != _DEFAULT_PORTS.get(scheme):
+        netloc += f":{parts.port}"
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+
+class CrawlBudget:
+    """
+    Ограничения обхода сайта за один запуск обновления: максимальная глубина вложенности страниц
+    и максимальное количество загружаемых страниц. Ведёт статистику пропущенных страниц.
+    Используется только из потока, управляющего обходом, поэтому не требует блокировок.
+    """
+
+    def __init__(self, max_depth: int = 10, max_pages: int = 0) -> None:
+        """
+        :param max_depth: максимальная глубина дочерних страниц относительно начальной
+        :param max_pages: максимальное количество загружаемых страниц за запуск (0 - без ограничения)
+        """
+        self.__max_depth = max_depth
+        self.__max_pages = max_pages
+        self.__fetched = 0  # Загружено страниц
+        self.__duplicates = 0  # Пропущено повторных ссылок на уже загруженные страницы
+        self.__too_deep = 0  # Пропущено страниц глубже max_depth
+        self.__over_budget = 0  # Пропущено страниц сверх max_pages
+
+    @classmethod
+    def from_settings(cls) -> "CrawlBudget":
+        """Создаёт ограничения обхода с параметрами из настроек Django."""
+        from django.conf import settings
+
+        return cls(settings.TIMETABLE_CRAWL_MAX_DEPTH, settings.TIMETABLE_CRAWL_MAX_PAGES)
+
+    def admit(self, visited: set[str], url: str, depth: int) -> bool:
+        """
+        Решает, нужно ли загружать страницу, и отмечает её как посещённую.
+        :param visited: канонические ссылки страниц, уже посещённых в этом обходе
+        :param url: ссылка на страницу
+        :param depth: глубина страницы относительно начальной
+        :return: True, если страницу нужно загрузить
+        """
+        key = canonicalize_url(url)
+        if key in visited:
+            self.__duplicates += 1
+            logger.debug(f"Skipped already visited page: {url}")
+            return False
+        if depth > self.__max_depth:
+            self.__too_deep += 1
+            logger.warning(f"Skipped page deeper than {self.__max_depth}: {url}")
+            return False
+        if self.__max_pages and self.__fetched >= self.__max_pages:
+            self.__over_budget += 1
+            logger.warning(f"Skipped page over budget of {self.__max_pages} pages: {url}")
+            return False
+
+        visited.add(key)
+        self.__fetched += 1
+        return True
+
+    def log_stats(self) -> None:
+        """Выводит статистику обхода в лог."""
+        logger.info(
+            f"Crawl: {self.__fetched} pages fetched, {self.__duplicates} fetches saved by URL dedupe, "
+            f"{self.__too_deep} skipped by depth, {self.__over_budget} skipped by page budget"
+        )
@@ -0,0 +1,74 @@
+import hashlib
+import logging
+import threading
+
+from apps.common.models import CrawledPage
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlCache:
+    """
+    Кэш результатов разбора страниц сайта по URL.
+    Загружается из БД одним запросом в начале обновления и сохраняется в конце.
+    Запись используется, только если хэш основного контента страницы совпадает с сохранённым.
+    """
+
+    # Версия формата записей: при изменении логики разбора страниц старые записи перестают совпадать
+    FORMAT_VERSION = "1"
+
+    def __init__(self, pages: dict[str, CrawledPage] | None = None) -> None:
+        self.__pages: dict[str, CrawledPage] = pages or {}
+        self.__changed: dict[str, CrawledPage] = {}  # Новые и изменившиеся записи для сохранения в БД
+        self.__hits = 0
+        self.__misses = 0
+        self.__lock = threading.Lock()
+
+    @classmethod
+    def load(cls) -> "CrawlCache":
+        """Загружает все записи кэша из БД."""
+        pages = {page.url: page for page in CrawledPage.objects.all()}
+        logger.info(f"Loaded {len(pages)} crawled pages")
+        return cls(pages)
+
+    @classmethod
+    def get_digest(cls, content_html: str) -> str:
+        """Возвращает хэш основного контента страницы."""
+        sha256 = hashlib.sha256(cls.FORMAT_VERSION.encode("utf-8"))
+        sha256.update(content_html.encode("utf-8"))
+        return sha256.hexdigest()
+
+    def get_entries(self, url: str, digest: str) -> list[dict] | None:
+        """
+        Возвращает сохранённые элементы страницы, если её контент не изменился, иначе None.
+        :param url: ссылка на страницу
+        :param digest: хэш текущего основного контента страницы
+        """
+        page = self.__pages.get(url)
+        with self.__lock:
+            if page is None or page.content_digest != digest:
+                self.__misses += 1
+                return None
+            self.__hits += 1
+        return page.entries
+
+    def put(self, url: str, digest: str, entries: list[dict]) -> None:
+        """Запоминает результат разбора страницы."""
+        page = CrawledPage(url=url, content_digest=digest, entries=entries)
+        with self.__lock:
+            self.__pages[url] = page
+            self.__changed[url] = page
+
+    def save(self) -> None:
+        """Сохраняет новые и изменившиеся записи в БД."""
+        if self.__changed:
+            CrawledPage.objects.bulk_create(
+                self.__changed.values(),
+                update_conflicts=True,
+                unique_fields=["url"],
+                update_fields=["content_digest", "entries", "updated"],
+            )
+
+        logger.info(
+            f"Crawl cache: {self.__hits} pages reused, {self.__misses} parsed, {len(self.__changed)} saved"
+        )
@@ -0,0 +1,222 @@
+import re
+from collections.abc import Iterable, Sequence
+from functools import lru_cache
+from typing import NamedTuple
+from urllib.parse import unquote
+
+from .fuzzy_matcher import FuzzyMatcher
+from .memo import LruMemo
+
+# Словари классификации файлов расписания
+CONFIDENCE_VALUE = 0.8
+DEGREE_WORDS = ["бакалавриат", "специалитет", "магистратура", "аспирантура", "степень"]
+EDUCATION_FORM_WORDS = ["форма", "очная", "очно-заочная", "заочная"]
+FACULTY_WORDS = [
+    "факультет", "автоматизированных", "систем", "транспорта", "вооружений",
+    "автомобильного", "технологии", "конструкционных", "материалов", "пищевых",
+    "производств", "экономика", "управление", "электроника", "вычислительная",
+    "техника", "xимико-технологический", "иностранный", "вечерний",
+    "технологический", "инженерный", "кадры",
+]
+WORDS_TO_DELETE = ["автосохраненный", "копия"]
+COURSE_WORDS = ["курс", "год"]
+SENTENCE_DELIMITERS = ["_", " ", "(", ")", ",", ".", '"']
+
+
+class FileClassification(NamedTuple):
+    """Результат классификации файла расписания по его пути на сайте"""
+
+    name: str  # Имя файла из пути без расширения
+    correct_name: str  # Имя файла без служебных слов ("копия" и т.п.)
+    degree: str  # Сегмент пути со степенью образования
+    education_form: str  # Сегмент пути с формой обучения
+    faculty: str  # Сегмент пути с факультетом
+    course: tuple[int, ...]  # Номера курсов из имени файла
+
+
+@lru_cache(maxsize=32)
+def _compile_split_pattern(delimiters: tuple[str, ...]) -> re.Pattern:
+    return re.compile("|".join(map(re.escape, delimiters)))
+
+
+class FileClassifier:
+    """
+    Классификатор файлов расписания по пути на сайте: степень, форма обучения, факультет, курсы и имя файла.
+    Создаётся один раз из словарей: регулярные выражения компилируются, а словари заранее обрабатываются FuzzyMatcher.
+    Результаты для сегментов путей кэшируются, так как сотни файлов находятся в нескольких десятках
+    одинаковых директорий. Словари копируются при создании: для новых словарей нужен новый классификатор.
+    Объект можно использовать из нескольких потоков.
+    """
+
+    _EXTENSION_PATTERN = re.compile(r"\.[А-ЯЁA-Zа-яёa-z]*$")
+    _TRAILING_DASH_PATTERN = re.compile(r"-\s*$")
+    _EMPTY_BRACKETS_PATTERN = re.compile(r"\(\s*\)")
+    _SPACES_PATTERN = re.compile(r"\s+")
+
+    _CACHE_NAMES = ("split", "correct_file_name", "degree", "education_form", "faculty")
+
+    def __init__(
+        self,
+        degree_words: Sequence[str] = DEGREE_WORDS,
+        education_form_words: Sequence[str] = EDUCATION_FORM_WORDS,
+        faculty_words: Sequence[str] = FACULTY_WORDS,
+        words_to_delete: Sequence[str] = WORDS_TO_DELETE,
+        course_words: Sequence[str] = COURSE_WORDS,
+        delimiters: Sequence[str] = SENTENCE_DELIMITERS,
+        confidence: float = CONFIDENCE_VALUE,
+        cache_size: int = 4096,
+    ) -> None:
+        """
+        :param degree_words: слова, по которым определяется степень образования
+        :param education_form_words: слова, по которым определяется форма обучения
+        :param faculty_words: слова, по которым определяется факультет
+        :param words_to_delete: служебные слова, удаляемые из имени файла
+        :param course_words: слова, после которых в имени файла указаны номера курсов
+        :param delimiters: разделители слов
+        :param confidence: минимальный коэффициент похожести слова на слово словаря
+        :param cache_size: максимальное количество записей в каждом кэше сегментов
+        """
+        self.__confidence = confidence
+        self.__course_words = tuple(course_words)
+        self.__split_pattern = _compile_split_pattern(tuple(delimiters))
+        self.__degree_matcher = FuzzyMatcher(tuple(degree_words))
+        self.__education_form_matcher = FuzzyMatcher(tuple(education_form_words))
+        self.__faculty_matcher = FuzzyMatcher(tuple(faculty_words))
+        self.__words_to_delete_matcher = FuzzyMatcher(tuple(words_to_delete))
+        self.__caches = {name: LruMemo(f"FileClassifier.{name}", cache_size) for name in self._CACHE_NAMES}
+
+    def classify(self, path: str) -> FileClassification:
+        """
+        Классифицирует файл по пути на сайте.
+        :param path: путь к файлу на сайте (сегменты через "/", последний - имя файла)
+        """
+        name = self.get_file_name_from_path(path)
+        segments = path.split("/")
+        return FileClassification(
+            name,
+            self.get_correct_file_name(name),
+            self.get_degree(segments),
+            self.get_education_form(segments),
+            self.get_faculty(segments),
+            tuple(self.get_course_list(name)),
+        )
+
+    def classify_many(self, paths: Iterable[str]) -> list[FileClassification]:
+        """Классифицирует несколько файлов, одинаковые пути классифицируются один раз."""
+        results: dict[str, FileClassification] = {}
+        classifications = []
+        for path in paths:
+            classification = results.get(path)
+            if classification is None:
+                classification = results[path] = self.classify(path)
+            classifications.append(classification)
+        return classifications
+
+    def get_file_name_from_path(self, path: str, dell_mimetype: bool = True) -> str:
+        """Возвращает имя файла из пути или URL (по умолчанию без расширения)."""
+        file_name = unquote(path.split("/")[-1])
+        if dell_mimetype:
+            file_name = self._EXTENSION_PATTERN.sub("", file_name)
+        return file_name
+
+    def get_correct_file_name(self, file_name: str) -> str:
+        """Возвращает имя файла без служебных слов, висящих дефисов и пустых скобок."""
+        return self.__cached("correct_file_name", file_name, lambda: self.__calc_correct_file_name(file_name))
+
+    def split(self, string: str, delimiters: Sequence[str] | None = None) -> list[str]:
+        """Разбивает строку на слова по разделителям (по умолчанию - разделителям классификатора)."""
+        key = (string, tuple(delimiters) if delimiters is not None else None)
+        return list(self.__cached("split", key, lambda: tuple(self.__split(string, delimiters))))
+
+    def get_degree(self, path: str | list[str]) -> str:
+        """Возвращает сегмент пути, больше всего похожий на степень образования."""
+        return self.__get_best_segment(path, "degree", self.__degree_matcher)
+
+    def get_education_form(self, path: str | list[str]) -> str:
+        """Возвращает сегмент пути, больше всего похожий на форму обучения."""
+        return self.__get_best_segment(path, "education_form", self.__education_form_matcher)
+
+    def get_faculty(self, path: str | list[str]) -> str:
+        """Возвращает сегмент пути, больше всего похожий на факультет."""
+        return self.__get_best_segment(path, "faculty", self.__faculty_matcher)
+
+    def get_course_list(self, name: str) -> list[int]:
+        """Извлекает список номеров курсов из имени файла."""
+        parts = self.split(name.lower())
+        result = []
+        for i, part in enumerate(parts):
+            if any(cw in part for cw in self.__course_words) and i + 1 < len(parts):
+                try:
+                    result.extend(self.__parse_course_string(parts[i + 1]))
+                except Exception:
+                    pass
+        return sorted(set(result))
+
+    def reset_stats(self) -> None:
+        """Обнуляет счётчики кэшей сегментов (записи кэшей сохраняются)."""
+        for cache in self.__caches.values():
+            cache.reset_stats()
+
+    def get_stats(self) -> dict[str, dict]:
+        """Возвращает статистику кэшей сегментов по названиям кэшей."""
+        return {name: cache.get_stats() for name, cache in self.__caches.items()}
+
+    def log_stats(self) -> None:
+        """Выводит статистику кэшей сегментов в лог."""
+        for cache in self.__caches.values():
+            cache.log_stats()
+
+    # ------------------- ПРИВАТНЫЕ МЕТОДЫ ------------------- #
+
+    def __cached(self, cache_name: str, key, compute):
+        return self.__caches[cache_name].get(key, compute)
+
+    def __split(self, string: str, delimiters: Sequence[str] | None = None) -> list[str]:
+        pattern = self.__split_pattern if delimiters is None else _compile_split_pattern(tuple(delimiters))
+        return pattern.split(string)
+
+    def __calc_correct_file_name(self, file_name: str) -> str:
+        name = self.__remove_extra_spaces(file_name)
+        for word in self.__get_matched_words(self.split(name), self.__words_to_delete_matcher):
+            name = name.replace(word, "")
+        while True:
+            before = name
+            name = self._TRAILING_DASH_PATTERN.sub("", name)
+            name = self._EMPTY_BRACKETS_PATTERN.sub("", name)
+            name = self.__remove_extra_spaces(name)
+            if name == before:
+                break
+        return name
+
+    def __get_best_segment(self, path: str | list[str], cache_name: str, matcher: FuzzyMatcher) -> str:
+        """Возвращает первый сегмент пути с наибольшим количеством слов, похожих на слова словаря."""
+        if isinstance(path, str):
+            path = path.split("/")
+        best, best_score = "", 0
+        for segment in path:
+            score = self.__cached(cache_name, segment, lambda: self.__count_matched_words(segment, matcher))
+            if score > best_score:
+                best, best_score = segment, score
+        return best
+
+    def __count_matched_words(self, segment: str, matcher: FuzzyMatcher) -> int:
+        return len(self.__get_matched_words(self.split(segment.lower()), matcher))
+
+    def __get_matched_words(self, words: list[str], matcher: FuzzyMatcher) -> list[str]:
+        """Возвращает различные слова, похожие на какое-либо слово словаря не меньше, чем на confidence."""
+        return [word for word in dict.fromkeys(words) if matcher.match(word, self.__confidence) is not None]
+
+    def __remove_extra_spaces(self, string: str) -> str:
+        return self._SPACES_PATTERN.sub(" ", string).strip()
+
+    @staticmethod
+    def __parse_course_string(string: str) -> list[int]:
+        numbers = []
+        for part in string.split(","):
+            part = part.strip()
+            if "-" in part:
+                bounds = part.split("-")
+                numbers.extend(range(int(bounds[0]), int(bounds[-1]) + 1))
+            elif part.isdigit():
+                numbers.append(int(part))
+        return numbers
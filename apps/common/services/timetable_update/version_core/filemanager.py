@@ -1,19 +1,66 @@
 import hashlib
+import json
 import logging
 import os
-import shutil
+from collections.abc import Callable, Iterator
+from contextlib import closing
 from datetime import datetime
+from functools import partial
 from pathlib import Path
+from typing import NamedTuple
 
 from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
 
 from apps.common.models import Resource, FileVersion, Setting
+from apps.common.selectors import LatestVersion
 from .parser import WebParser
-from .file_data import FileData
+from .blob_store import BlobStore
+from .crawl_budget import CrawlBudget
+from .crawl_cache import CrawlCache
+from .file_data import DownloadResult, FileData
+from .hashing import (
+    get_file_hash,
+    get_legacy_excel_file_hash,
+    is_excel_file,
+    is_legacy_excel_hash,
+)
+from .html_backend import HtmlParserBackend
+from .http_client import HttpClient
+from .pipeline import StagedPipeline
+from .query_counter import QueryCounter
+from .resource_index import ResourceIndex
+from .shared_downloads import SharedDownloads
+from .validator_store import ValidatorStore
 
 logger = logging.getLogger(__name__)
 
 
+class _UpdateContext(NamedTuple):
+    """Общие для всех стадий конвейера объекты одного запуска обновления"""
+
+    client: HttpClient  # HTTP-клиент
+    validators: ValidatorStore  # Хранилище валидаторов для условных запросов
+    downloads: SharedDownloads  # Скачанные файлы по URL
+    resources: ResourceIndex  # Ресурсы и их последние версии
+    full_check: bool  # Скачивать файлы с неизменившейся датой обновления на сайте
+
+
+class _UpdateItem:
+    """Файл, проходящий через стадии конвейера обновления"""
+
+    __slots__ = ("file_data", "resource_type", "unchanged", "download", "hashsum", "failed")
+
+    def __init__(self, file_data: FileData, resource_type: str) -> None:
+        self.file_data = file_data
+        self.resource_type = resource_type
+        self.unchanged: Resource | None = None  # Ресурс, если файл пропущен по дате обновления на сайте
+        self.download: DownloadResult | None = None  # Скачанный файл (None при ответе 304)
+        self.hashsum: str | None = None  # Хэш содержимого скачанного файла
+        self.failed = False  # Файл не удалось скачать или посчитать его хэш
+
+
 class FileManager:
     """
     Управляет процессом обновления расписания:
@@ -22,10 +69,12 @@ class FileManager:
     """
 
     TIMETABLE_START_PATH = ["Расписания/Расписание занятий/"]
+    RUN_NUMBER_SETTING_KEY = "update_run_number"
 
     def __init__(self) -> None:
         self._temp_dir: Path = settings.TEMP_DIR
         self._storage_dir: Path = settings.DATA_STORAGE_DIR
+        self._blob_store = BlobStore.from_settings()
         os.environ["TMPDIR"] = str(self._temp_dir)
 
         try:
@@ -41,105 +90,311 @@ class FileManager:
         """
         Основной метод: обходит все ссылки, скачивает файлы,
         проверяет изменения по хэшу и сохраняет новые версии.
+        Обход сайта, скачивание, подсчёт хэшей и запись в БД выполняются конвейером одновременно:
+        файлы скачиваются, пока обход сайта ещё продолжается. Запись в БД выполняется в текущем потоке
+        в порядке обхода сайта. Потоки конвейера к БД не обращаются, поэтому в лог выводится
+        количество всех запросов обновления.
         """
         logger.info("Starting timetable update")
+        query_counter = QueryCounter()
+        with query_counter.track():
+            self._update_timetable()
+        query_counter.log_stats()
+        logger.info("Timetable update completed")
+
+    def _update_timetable(self) -> None:
+        # Классификатор файлов создаётся до обхода сайта, его кэши сегментов сохраняются между запусками
+        classifier = FileData.get_classifier()
+        classifier.reset_stats()
+        self._blob_store.reset_stats()
         used_resource_ids: set[int] = set()
+        validators = ValidatorStore.load()
+        crawl_cache = CrawlCache.load()
+        resources = ResourceIndex.load()
+        html_backend = HtmlParserBackend.from_settings()
+        budget = CrawlBudget.from_settings()
+        full_check = self._start_run()
+        skipped_by_timestamp = 0
 
-        for ind, link in enumerate(self._timetable_links):
-            logger.info(f"Processing link {ind + 1}/{len(self._timetable_links)}: {link}")
-            files = WebParser.get_files_from_webpage(link, self.TIMETABLE_START_PATH[ind])
-            logger.info(f"Found {len(files)} files")
-
-            for file_data in files:
-                logger.info(f"Processing: {file_data.get_path()} / {file_data.get_name()}")
-
-                try:
-                    file_path = file_data.download_file(self._temp_dir)
-                    # file_path = self._convert_xls_to_xlsx(file_path)
-                except Exception as e:
-                    logger.error(f"Failed to download/convert file: {e}", exc_info=True)
-                    continue
-
-                resource_type = "Занятия" if ind == 0 else "Экзамены"
-
-                try:
-                    resource, file_version = self._process_file(file_data, file_path, resource_type)
-                    if resource:
-                        used_resource_ids.add(resource.id)
-                except Exception as e:
-                    logger.error(f"Failed to process file {file_data.get_name()}: {e}", exc_info=True)
-                finally:
-                    if file_path.is_file():
-                        file_path.unlink()
-
-        deprecated_count = self._mark_deprecated(used_resource_ids)
+        downloads = SharedDownloads()
+        pipeline = StagedPipeline(settings.TIMETABLE_PIPELINE_QUEUE_SIZE)
+        try:
+            with HttpClient.from_settings() as client:
+                context = _UpdateContext(client, validators, downloads, resources, full_check)
+                pipeline.add_stage(
+                    "download", partial(self._download_item, context=context), settings.TIMETABLE_DOWNLOAD_WORKERS
+                )
+                pipeline.add_stage("hash", partial(self._hash_item, context=context), settings.TIMETABLE_HASH_WORKERS)
+                source = self._iter_update_items(context, crawl_cache, html_backend, budget)
+
+                with closing(pipeline.run(source, source_name="crawl", sink_name="persist")) as items:
+                    for item in items:
+                        url = item.file_data.get_url()
+                        try:
+                            if item.unchanged is not None:
+                                logger.info(f"No changes detected for: {item.unchanged.name} (same site timestamp)")
+                                used_resource_ids.add(item.unchanged.id)
+                                skipped_by_timestamp += 1
+                                continue
+
+                            if item.failed:
+                                validators.discard(url)
+                                continue
+
+                            try:
+                                resource, file_version = self._process_file(
+                                    item.file_data, item.download, item.resource_type, resources, item.hashsum
+                                )
+                                # id новых ресурсов появятся после сохранения части (flush)
+                                if resource is not None and resource.pk is not None:
+                                    used_resource_ids.add(resource.id)
+                                validators.confirm(url)
+                            except Exception as e:
+                                logger.error(f"Failed to process file {item.file_data.get_name()}: {e}", exc_info=True)
+                                validators.discard(url)
+                        finally:
+                            downloads.release(url)
+
+                        if resources.is_chunk_full():
+                            used_resource_ids.update(resource.id for resource in resources.flush())
+
+                used_resource_ids.update(resource.id for resource in resources.flush())
+                resources.log_stats()
+                client.log_stats()
+                budget.log_stats()
+                pipeline.log_stats()
+                classifier.log_stats()
+                self._blob_store.log_stats()
+        finally:
+            downloads.close()
+
+        validators.save()
+        crawl_cache.save()
+        if skipped_by_timestamp:
+            logger.info(f"Skipped {skipped_by_timestamp} downloads by site timestamp")
+        if downloads.get_reused_count():
+            logger.info(f"Reused {downloads.get_reused_count()} downloads of files linked under several paths")
+
+        revived_count, deprecated_count = self._mark_deprecated(used_resource_ids)
+        if revived_count:
+            logger.info(f"Revived {revived_count} deprecated resources")
         if deprecated_count:
             logger.info(f"Marked {deprecated_count} resources as deprecated")
 
-        logger.info("Timetable update completed")
+    # ------------------- СТАДИИ КОНВЕЙЕРА ------------------- #
+
+    def _iter_update_items(
+        self,
+        context: "_UpdateContext",
+        crawl_cache: CrawlCache,
+        html_backend: HtmlParserBackend,
+        budget: CrawlBudget,
+    ) -> Iterator["_UpdateItem"]:
+        """Стадия обхода: выдаёт найденные на сайте файлы по мере загрузки страниц."""
+        for ind, link in enumerate(self._timetable_links):
+            logger.info(f"Processing link {ind + 1}/{len(self._timetable_links)}: {link}")
+            resource_type = "Занятия" if ind == 0 else "Экзамены"
+            found = 0
+            for file_data in WebParser.iter_files_from_webpage(
+                link,
+                self.TIMETABLE_START_PATH[ind],
+                max_workers=settings.TIMETABLE_CRAWL_WORKERS,
+                validators=context.validators,
+                client=context.client,
+                crawl_cache=crawl_cache,
+                html_backend=html_backend,
+                budget=budget,
+            ):
+                context.downloads.acquire(file_data.get_url())
+                found += 1
+                yield _UpdateItem(file_data, resource_type)
+            logger.info(f"Found {found} files from webpage: {link}")
+
+        context.downloads.seal()
+
+    def _download_item(self, item: "_UpdateItem", context: "_UpdateContext") -> "_UpdateItem":
+        """
+        Стадия скачивания: пропускает файл с неизменившейся датой обновления на сайте
+        (кроме запусков с полной проверкой), иначе скачивает его.
+        """
+        file_data = item.file_data
+        logger.info(f"Processing: {file_data.get_path()} / {file_data.get_name()}")
+
+        if not context.full_check:
+            item.unchanged = self._get_unchanged_resource(file_data, context.resources)
+            if item.unchanged is not None:
+                return item
+
+        try:
+            item.download = context.downloads.get(
+                file_data.get_url(),
+                lambda: file_data.download_file(self._temp_dir, validators=context.validators, client=context.client),
+            )
+            # file_path = self._convert_xls_to_xlsx(file_path)
+        except Exception as e:
+            logger.error(f"Failed to download/convert file: {e}", exc_info=True)
+            item.failed = True
+        return item
+
+    @staticmethod
+    def _hash_item(item: "_UpdateItem", context: "_UpdateContext") -> "_UpdateItem":
+        """
+        Стадия подсчёта хэша: хэш файла Excel считается в потоке стадии, для остальных файлов берётся хэш байтов.
+        Пул процессов не используется: воркеры Celery (prefork) - демонические процессы,
+        которые не могут запускать дочерние процессы.
+        """
+        download = item.download
+        if download is None or item.failed:
+            return item
+
+        try:
+            if is_excel_file(download.path):
+                item.hashsum = get_file_hash(download.path)
+            else:
+                item.hashsum = download.raw_digest
+        except Exception as e:
+            logger.error(f"Failed to hash file {item.file_data.get_name()}: {e}", exc_info=True)
+            item.failed = True
+        return item
 
     # ------------------- ПРИВАТНЫЕ МЕТОДЫ ------------------- #
 
     def _process_file(
-        self, file_data: FileData, file_path: Path, resource_type: str
+        self,
+        file_data: FileData,
+        download: DownloadResult | None,
+        resource_type: str,
+        resources: ResourceIndex,
+        hashsum: str | None = None,
     ) -> tuple[Resource | None, FileVersion | None]:
         """
         Обрабатывает скачанный файл:
         - получает или создаёт Resource
         - сравнивает хэш с последней версией
         - если файл изменился — сохраняет его локально и создаёт FileVersion
+        Если download равен None, файл не изменился на сайте (ответ 304) и учитывается без скачивания.
+        Новая версия (и новый ресурс) добавляется в resources и сохраняется в БД вместе с частью (ResourceIndex.flush).
+        Файл по пути ресурса заменяется новой версией только после фиксации транзакции этой части.
+        hashsum - хэш содержимого файла, если он уже посчитан.
         """
-        resource = self._get_or_create_resource(file_data, resource_type)
-        new_version = file_data.get_file_version(file_path)
+        resource = self._get_or_create_resource(file_data, resource_type, resources)
+        is_new = resource.pk is None
+        last_version = resources.get_latest_version(resource)
 
-        last_version = (
-            FileVersion.objects.filter(resource=resource)
-            .order_by("-timestamp")
-            .first()
-        )
+        if download is None:
+            if last_version is None:
+                raise FileNotFoundError(f"Got 304 for file without stored version: {file_data.get_url()}")
+            logger.info(f"No changes detected for: {resource.name} (unchanged via 304)")
+            return resource, None
+
+        new_version = file_data.get_file_version(download.path, download.raw_digest, hashsum)
+
+        if last_version is not None and last_version.hashsum != new_version.hashsum:
+            last_version = self._upgrade_legacy_hash(last_version, new_version, download.path)
+            resources.set_latest_version(resource, last_version)
 
         if last_version is not None and last_version.hashsum == new_version.hashsum:
             logger.info(f"No changes detected for: {resource.name}")
             return resource, None
 
         logger.info(f"New version detected for: {resource.name}, saving file")
-        self._save_file_locally(file_path, resource)
+        link = self._save_file_locally(download.path, resource, file_data.get_file_name(), new_version)
 
         new_version.resource = resource
-        new_version.save()
-        logger.info(f"FileVersion created: id={new_version.id}")
+        resources.add(resource, new_version, on_saved=link)
+        logger.info(f"FileVersion queued for {'new' if is_new else 'existing'} resource: {resource.path}")
 
         return resource, new_version
 
-    def _get_or_create_resource(self, file_data: FileData, resource_type: str) -> Resource:
+    @staticmethod
+    def _upgrade_legacy_hash(last_version: LatestVersion, new_version: FileVersion, file_path: Path) -> LatestVersion:
+        """
+        Хэши файлов Excel, сохранённые до перехода на потоковый хэш, не совпадают с новыми.
+        Если сохранённый хэш совпадает с хэшем скачанного файла, посчитанным прежним способом,
+        он заменяется новым хэшем: файл не считается изменившимся, а прежний способ больше не понадобится.
+        Возвращает последнюю версию с заменённым хэшем или без изменений.
+        """
+        if not is_excel_file(file_path) or not is_legacy_excel_hash(last_version.hashsum):
+            return last_version
+        if get_legacy_excel_file_hash(file_path) != last_version.hashsum:
+            return last_version
+
+        FileVersion.objects.filter(id=last_version.id).update(hashsum=new_version.hashsum)
+        logger.info(f"Upgraded legacy Excel hash of FileVersion id={last_version.id}")
+        return last_version._replace(hashsum=new_version.hashsum)
+
+    def _start_run(self) -> bool:
         """
-        Ищет существующий Resource по пути или создаёт новый.
-        Снимает флаг deprecated если ресурс был помечен устаревшим.
+        Увеличивает номер запуска обновления, хранимый в настройках.
+        Возвращает True, если в этом запуске нужна полная проверка файлов (каждый N-й запуск),
+        и False, если можно пропускать файлы с неизменившейся датой обновления на сайте.
+        """
+        full_check_every = settings.TIMETABLE_FULL_CHECK_EVERY
+        setting, _ = Setting.objects.get_or_create(
+            key=self.RUN_NUMBER_SETTING_KEY,
+            defaults={
+                "value": "0",
+                "description": "Номер запуска обновления расписания (для полной проверки файлов каждые N запусков)",
+            },
+        )
+        try:
+            run_number = int(setting.value) + 1
+        except ValueError:
+            run_number = 1
+        setting.value = str(run_number)
+        setting.save(update_fields=["value"])
+
+        full_check = full_check_every <= 1 or run_number % full_check_every == 0
+        if full_check:
+            logger.info(f"Run #{run_number}: full verification of all files")
+        else:
+            logger.info(f"Run #{run_number}: skipping files with unchanged site timestamp")
+        return full_check
+
+    @staticmethod
+    def _get_unchanged_resource(file_data: FileData, resources: ResourceIndex) -> Resource | None:
+        """
+        Быстрая проверка без скачивания: сравнивает дату изменения файла по данным сайта
+        с датой изменения последней сохранённой версии ресурса.
+        Возвращает ресурс, если даты совпадают, иначе None. Ресурс не изменяется, БД не используется.
+        """
+        last_changed = file_data.get_last_changed_datetime()
+        if last_changed is None:
+            return None
+
+        resource = resources.get(file_data.get_correct_path())
+        if resource is None or resource.pk is None:
+            return None
+        last_version = resources.get_latest_version(resource)
+        if last_version is None or last_version.last_changed != last_changed:
+            return None
+        return resource
+
+    def _get_or_create_resource(self, file_data: FileData, resource_type: str, resources: ResourceIndex) -> Resource:
+        """
+        Ищет существующий Resource по пути в загруженных ресурсах или создаёт новый несохранённый ресурс.
+        Новый ресурс сохраняется в БД вместе с его первой версией (ResourceIndex.add).
+        Флаг deprecated снимается в конце обновления (_mark_deprecated).
         """
         correct_path = file_data.get_correct_path()
-        resource = Resource.objects.filter(path=correct_path).first()
+        resource = resources.get(correct_path)
 
         if resource is None:
             resource = file_data.get_resource(resource_type)
-            resource.save()
-            logger.debug(f"Created new resource: {resource.name}")
-        elif resource.deprecated:
-            resource.deprecated = False
-            resource.save()
+            logger.debug(f"New resource: {resource.name}")
 
         return resource
 
-    def _save_file_locally(self, file_path: Path, resource: Resource) -> Path:
+    def _save_file_locally(
+        self, file_path: Path, resource: Resource, file_name: str, version: FileVersion
+    ) -> Callable[[], Path]:
         """
-        Сохраняет файл в DATA_STORAGE_DIR по пути ресурса.
-        Возвращает итоговый путь к сохранённому файлу.
+        Сохраняет содержимое версии файла в хранилище по хэшу (BlobStore).
+        Возвращает функцию, создающую ссылку на содержимое в DATA_STORAGE_DIR по пути ресурса под именем file_name.
+        Она вызывается после записи версии в БД, чтобы файл по пути ресурса не заменялся версией, которой нет в БД.
         """
-        dest_dir = self._storage_dir / (resource.path or resource.name)
-        dest_dir.mkdir(parents=True, exist_ok=True)
-        dest_file = dest_dir / file_path.name
-        shutil.copy2(file_path, dest_file)
-        logger.debug(f"File saved to: {dest_file}")
-        return dest_file
+        blob_path = self._blob_store.put(file_path, version)
+        return partial(self._blob_store.link, blob_path, Path(resource.path or resource.name) / file_name)
 
     @staticmethod
     def _convert_xls_to_xlsx(file_path: Path) -> Path:
@@ -165,12 +420,27 @@ class FileManager:
         return file_path
 
     @staticmethod
-    def _mark_deprecated(used_resource_ids: set[int]) -> int:
-        """Помечает устаревшими ресурсы, которых не было в текущем обновлении."""
-        resources = Resource.objects.exclude(id__in=used_resource_ids).filter(deprecated=False)
-        count = 0
-        for resource in resources:
-            resource.deprecated = True
-            resource.save()
-            count += 1
-        return count
+    def _mark_deprecated(used_resource_ids: set[int]) -> tuple[int, int]:
+        """
+        Снимает флаг deprecated с ресурсов текущего обновления и помечает устаревшими остальные ресурсы
+        двумя запросами UPDATE (без сохранения каждого ресурса и без изменения last_update).
+        Возвращает количество восстановленных и помеченных устаревшими ресурсов.
+        """
+        used = FileManager._get_ids_subquery(used_resource_ids)
+        with transaction.atomic():
+            revived = Resource.objects.filter(deprecated=True, id__in=used).update(deprecated=False)
+            deprecated = Resource.objects.filter(deprecated=False).exclude(id__in=used).update(deprecated=True)
+        return revived, deprecated
+
+    @staticmethod
+    def _get_ids_subquery(ids: set[int]) -> RawSQL | list[int]:
+        """
+        Возвращает подзапрос, выбирающий переданные id из одного параметра запроса (массив PostgreSQL
+        или JSON в SQLite), а не из длинного списка параметров IN / NOT IN.
+        Для других СУБД возвращает список id.
+        """
+        if connection.vendor == "postgresql":
+            return RawSQL("SELECT unnest(%s::bigint[])", (list(ids),))
+        if connection.vendor == "sqlite":
+            return RawSQL("SELECT value FROM json_each(%s)", (json.dumps(list(ids)),))
+        return list(ids)
@@ -0,0 +1,123 @@
+import difflib
+from collections import Counter
+from collections.abc import Sequence
+from functools import lru_cache
+
+
+class _VocabularyEntry:
+    """Строка словаря с заранее посчитанными длиной и количеством каждого символа"""
+
+    __slots__ = ("index", "string", "length", "counts")
+
+    def __init__(self, index: int, string: str) -> None:
+        self.index = index  # Позиция строки в словаре: при равных коэффициентах выигрывает первая строка
+        self.string = string
+        self.length = len(string)
+        self.counts = Counter(string)
+
+
+class FuzzyMatcher:
+    """
+    Поиск максимально похожей строки из словаря с теми же коэффициентами, что у difflib.SequenceMatcher
+    (quick_ratio или ratio), без создания SequenceMatcher для каждой пары строк.
+    Словарь обрабатывается один раз: строки группируются по длине, для каждой считается количество символов.
+    Для строки запроса группы перебираются по убыванию верхней оценки коэффициента по длинам строк,
+    quick_ratio считается пересечением количеств символов, а ratio - только для строк,
+    чей quick_ratio (верхняя оценка ratio) ещё может превысить лучший найденный коэффициент.
+    Объект не изменяется после создания и может использоваться из нескольких потоков.
+    """
+
+    def __init__(self, vocabulary: Sequence[str], quick: bool = True) -> None:
+        """
+        :param vocabulary: строки для сравнения
+        :param quick: использовать quick_ratio вместо ratio
+        """
+        self.__quick = quick
+        self.__buckets: dict[int, list[_VocabularyEntry]] = {}  # Длина строки -> строки словаря этой длины
+        for index, string in enumerate(vocabulary):
+            entry = _VocabularyEntry(index, string)
+            self.__buckets.setdefault(entry.length, []).append(entry)
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def get(vocabulary: tuple[str, ...], quick: bool = True) -> "FuzzyMatcher":
+        """Возвращает общий поисковик для словаря, создавая его при первом обращении."""
+        return FuzzyMatcher(vocabulary, quick)
+
+    def match(self, string: str, min_ratio: float = 0.0) -> tuple[str, float] | None:
+        """
+        Ищет максимально похожую строку словаря.
+        При равных коэффициентах выбирается строка, стоящая в словаре раньше.
+        :param string: строка запроса
+        :param min_ratio: строки словаря с коэффициентом меньше min_ratio не рассматриваются
+        :return: строка словаря и коэффициент или None, если словарь пуст или нет строки с коэффициентом >= min_ratio
+        """
+        length = len(string)
+        counts: Counter | None = None
+        best: _VocabularyEntry | None = None
+        best_ratio = -1.0
+        candidates: list[tuple[float, int, _VocabularyEntry]] = []  # Для ratio: (-quick_ratio, позиция, строка)
+
+        for bound, bucket in self.__get_buckets(length):
+            if bound < best_ratio or bound < min_ratio:
+                break
+            if counts is None:
+                counts = Counter(string)
+            for entry in bucket:
+                if bound == best_ratio and entry.index > best.index:
+                    continue
+                ratio = self.__calculate_ratio(self.__count_matches(counts, entry.counts), length + entry.length)
+                if ratio < min_ratio:
+                    continue
+                if not self.__quick:
+                    candidates.append((-ratio, entry.index, entry))
+                elif self.__is_better(ratio, entry, best_ratio, best):
+                    best, best_ratio = entry, ratio
+
+        # ratio не превышает quick_ratio: строки проверяются по убыванию quick_ratio,
+        # пока он ещё может превысить лучший найденный коэффициент
+        candidates.sort(key=lambda candidate: candidate[:2])
+        for negative_bound, _, entry in candidates:
+            if -negative_bound < best_ratio:
+                break
+            ratio = difflib.SequenceMatcher(None, string, entry.string).ratio()
+            if ratio >= min_ratio and self.__is_better(ratio, entry, best_ratio, best):
+                best, best_ratio = entry, ratio
+
+        if best is None:
+            return None
+        return best.string, best_ratio
+
+    # ------------------- ПРИВАТНЫЕ МЕТОДЫ ------------------- #
+
+    def __get_buckets(self, length: int) -> list[tuple[float, list[_VocabularyEntry]]]:
+        """
+        Возвращает группы строк словаря с верхней оценкой коэффициента по длинам строк,
+        по убыванию оценки: совпадающих символов не больше, чем длина более короткой строки.
+        """
+        buckets = [
+            (self.__calculate_ratio(min(length, bucket_length), length + bucket_length), bucket)
+            for bucket_length, bucket in self.__buckets.items()
+        ]
+        buckets.sort(key=lambda item: -item[0])
+        return buckets
+
+    @staticmethod
+    def __count_matches(counts: Counter, other_counts: Counter) -> int:
+        """Возвращает количество совпадающих символов без учёта порядка (как в SequenceMatcher.quick_ratio)."""
+        if len(other_counts) < len(counts):
+            counts, other_counts = other_counts, counts
+        return sum(min(count, other_counts[char]) for char, count in counts.items() if char in other_counts)
+
+    @staticmethod
+    def __calculate_ratio(matches: int, length: int) -> float:
+        """Повторяет difflib._calculate_ratio, чтобы коэффициенты совпадали до последнего знака."""
+        if length:
+            return 2.0 * matches / length
+        return 1.0
+
+    @staticmethod
+    def __is_better(
+        ratio: float, entry: _VocabularyEntry, best_ratio: float, best: _VocabularyEntry | None
+    ) -> bool:
+        return ratio > best_ratio or (ratio == best_ratio and entry.index < best.index)
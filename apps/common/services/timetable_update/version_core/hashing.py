@@ -0,0 +1,126 @@
+import hashlib
+import json
+from collections.abc import Iterator
+from pathlib import Path
+
+from openpyxl import load_workbook
+
+EXCEL_EXTENSIONS = (".xls", ".xlsx", ".xlsm")
+# Префикс потокового хэша файлов Excel, отличающий его от хэшей, посчитанных прежним способом
+EXCEL_HASH_PREFIX = "v2:"
+
+_SHEET_SEPARATOR = b"\x1c"
+_ROW_SEPARATOR = b"\n"
+
+
+def is_excel_file(file_path: Path | str) -> bool:
+    """Проверяет, хэшируется ли файл по содержимому ячеек, а не по байтам."""
+    return Path(file_path).suffix in EXCEL_EXTENSIONS
+
+
+def get_file_hash(file_path: Path | str, raw_digest: str | None = None) -> str:
+    """
+    Возвращает хэш содержимого файла: для Excel - хэш значений ячеек, для остальных файлов - SHA-256 байтов.
+    :param file_path: путь к локальному файлу
+    :param raw_digest: SHA-256 байтов файла, если он уже посчитан при скачивании
+    """
+    file_path = Path(file_path)
+    if is_excel_file(file_path):
+        return get_excel_file_hash(file_path)
+    if raw_digest is not None:
+        return raw_digest
+    return get_bin_file_hash(file_path)
+
+
+def get_excel_file_hash(file_path: Path) -> str:
+    """
+    Возвращает потоковый хэш значений ячеек всех листов книги Excel.
+    Строки читаются по одной (openpyxl в режиме read_only, xlrd с on_demand) и сразу добавляются в SHA-256,
+    поэтому расход памяти не зависит от размера книги.
+    Хэш не совпадает с хэшем get_legacy_excel_file_hash и отличается от него префиксом EXCEL_HASH_PREFIX.
+    """
+    sha256 = hashlib.sha256()
+    for sheet_rows in _iter_excel_sheets(file_path):
+        sha256.update(_SHEET_SEPARATOR)
+        empty_rows = 0  # Пустые строки в конце листа не учитываются
+        for row in sheet_rows:
+            line = _serialize_row(row)
+            if line is None:
+                empty_rows += 1
+                continue
+            sha256.update(_ROW_SEPARATOR * empty_rows)
+            sha256.update(line)
+            sha256.update(_ROW_SEPARATOR)
+            empty_rows = 0
+    return EXCEL_HASH_PREFIX + sha256.hexdigest()
+
+
+def get_legacy_excel_file_hash(file_path: Path) -> str:
+    """
+    Возвращает хэш значений ячеек книги Excel, посчитанный прежним способом (вся книга в памяти).
+    Используется только для сравнения с хэшами версий, сохранёнными до перехода на get_excel_file_hash.
+    """
+    if file_path.suffix.lower() == '.xls':
+        import xlrd
+        wb = xlrd.open_workbook(str(file_path))
+        data = []
+        for sheet in wb.sheets():
+            for row in range(sheet.nrows):
+                data.append(tuple(sheet.row_values(row)))
+        return hashlib.sha256(str(data).encode("utf-8")).hexdigest()
+    else:
+        wb = load_workbook(str(file_path), data_only=True)
+        data = [tuple(row) for sheet in wb.worksheets for row in sheet.iter_rows(values_only=True)]
+        return hashlib.sha256(str(data).encode("utf-8")).hexdigest()
+
+
+def is_legacy_excel_hash(hashsum: str) -> bool:
+    """Проверяет, посчитан ли хэш файла Excel прежним способом."""
+    return not hashsum.startswith(EXCEL_HASH_PREFIX)
+
+
+def _iter_excel_sheets(file_path: Path) -> Iterator[Iterator[tuple]]:
+    """Выдаёт для каждого листа книги итератор значений его строк."""
+    if file_path.suffix.lower() == '.xls':
+        import xlrd
+        wb = xlrd.open_workbook(str(file_path), on_demand=True)
+        try:
+            for index in range(wb.nsheets):
+                sheet = wb.sheet_by_index(index)
+                yield (sheet.row_values(row) for row in range(sheet.nrows))
+                wb.unload_sheet(index)
+        finally:
+            wb.release_resources()
+    else:
+        wb = load_workbook(str(file_path), read_only=True, data_only=True)
+        try:
+            for sheet in wb.worksheets:
+                # В режиме read_only размеры листа берутся из тега <dimension>, который в файлах сайта
+                # бывает устаревшим: без сброса ячейки за его пределами не попадут в хэш
+                sheet.reset_dimensions()
+                yield sheet.iter_rows(values_only=True)
+        finally:
+            wb.close()
+
+
+def _serialize_row(row) -> bytes | None:
+    """
+    Возвращает стабильное представление строки листа или None для пустой строки.
+    Пустые ячейки в конце строки не учитываются: их количество зависит от размеров листа, записанных в файле.
+    """
+    values = list(row)
+    while values and values[-1] in (None, ""):
+        values.pop()
+    if not values:
+        return None
+    return json.dumps(values, ensure_ascii=False, default=str, separators=(",", ":")).encode("utf-8")
+
+
+def get_bin_file_hash(file_path: Path) -> str:
+    """Возвращает SHA-256 байтов файла."""
+    sha256 = hashlib.sha256()
+    with file_path.open("rb") as f:
+        for chunk in iter(lambda: f.read(4096), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
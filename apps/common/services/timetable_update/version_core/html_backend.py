@@ -0,0 +1,54 @@
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.builder import builder_registry
+from django.core.exceptions import ImproperlyConfigured
+
+
+class HtmlParserBackend:
+    """
+    Способ разбора HTML страниц сайта.
+    Позволяет выбрать парсер BeautifulSoup (html.parser или более быстрый lxml)
+    и режим, в котором в дерево попадает только основной контент страницы (блок content-wrapper),
+    а шапка, меню и подвал сайта пропускаются без создания узлов.
+    """
+
+    CONTENT_CLASS = "content-wrapper"
+    DEFAULT_FEATURES = "html.parser"
+
+    def __init__(self, features: str = DEFAULT_FEATURES, only_content: bool = False) -> None:
+        """
+        :param features: парсер BeautifulSoup ("html.parser" или "lxml")
+        :param only_content: строить дерево только для основного контента страницы (SoupStrainer)
+        :raises ImproperlyConfigured: парсер не установлен
+        """
+        if not self.is_available(features):
+            raise ImproperlyConfigured(
+                f"HTML parser {features!r} is not installed: install it (for lxml: uv sync --extra lxml) "
+                f"or set TIMETABLE_HTML_PARSER={self.DEFAULT_FEATURES}"
+            )
+
+        self.__features = features
+        self.__strainer = SoupStrainer(class_=self.CONTENT_CLASS) if only_content else None
+
+    @staticmethod
+    def is_available(features: str) -> bool:
+        """Проверяет, установлен ли парсер BeautifulSoup."""
+        return builder_registry.lookup(features) is not None
+
+    @classmethod
+    def from_settings(cls) -> "HtmlParserBackend":
+        """Создаёт способ разбора с параметрами из настроек Django."""
+        from django.conf import settings
+
+        return cls(settings.TIMETABLE_HTML_PARSER, settings.TIMETABLE_HTML_ONLY_CONTENT)
+
+    def get_name(self) -> str:
+        """Возвращает название способа разбора для логов и бенчмарков."""
+        return self.__features + ("+strainer" if self.__strainer is not None else "")
+
+    def find_content(self, html: str):
+        """
+        Разбирает HTML и возвращает основной контент страницы или None, если он не найден.
+        :param html: HTML страницы или её основного контента
+        """
+        soup = BeautifulSoup(html, self.__features, parse_only=self.__strainer)
+        return soup.find(class_=self.CONTENT_CLASS)
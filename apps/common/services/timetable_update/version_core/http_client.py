@@ -0,0 +1,161 @@
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import PoolManager
+from urllib3.connectionpool import HTTPConnectionPool
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+
+class _CountingPoolManager(PoolManager):
+    """Менеджер пулов соединений, запоминающий выданные пулы для статистики переиспользования соединений"""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.__seen_pools: dict[int, HTTPConnectionPool] = {}
+        self.__seen_lock = threading.Lock()
+
+    def connection_from_pool_key(self, pool_key, request_context=None) -> HTTPConnectionPool:
+        pool = super().connection_from_pool_key(pool_key, request_context)
+        with self.__seen_lock:
+            self.__seen_pools.setdefault(id(pool), pool)
+        return pool
+
+    def get_seen_pools(self) -> list[HTTPConnectionPool]:
+        """Возвращает все выданные пулы, в том числе уже вытесненные из менеджера."""
+        with self.__seen_lock:
+            return list(self.__seen_pools.values())
+
+
+class _CountingAdapter(HTTPAdapter):
+    """Адаптер requests, использующий _CountingPoolManager"""
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs) -> None:
+        super().init_poolmanager(connections, maxsize, block, **pool_kwargs)
+        self.poolmanager = _CountingPoolManager(num_pools=connections, maxsize=maxsize, block=block, **pool_kwargs)
+
+
+class HttpClient:
+    """
+    HTTP-клиент сервиса обновления расписания, общий для обхода страниц и скачивания файлов.
+    Поддерживает keep-alive соединения с ограничением их количества на хост, явные таймауты
+    и повтор запросов с экспоненциальной задержкой при ошибках 5xx и обрывах соединения.
+    Сессия requests потокобезопасна для GET-запросов, поэтому клиент можно использовать из нескольких потоков.
+    """
+
+    RETRY_STATUSES = (500, 502, 503, 504)
+
+    def __init__(
+        self,
+        pool_size: int = 8,
+        connect_timeout: float = 10,
+        read_timeout: float = 30,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+    ) -> None:
+        """
+        :param pool_size: максимальное количество соединений с одним хостом
+        :param connect_timeout: таймаут установки соединения в секундах
+        :param read_timeout: таймаут ожидания данных в секундах
+        :param retries: количество повторов запроса
+        :param backoff_factor: множитель экспоненциальной задержки между повторами
+        """
+        self.__timeout = (connect_timeout, read_timeout)
+        self.__requests_count = 0
+        self.__retries_count = 0
+        self.__lock = threading.Lock()
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            raise_on_status=False,
+        )
+        # pool_block: при исчерпании пула поток ждёт освобождения соединения, а не открывает новое
+        self.__adapter = _CountingAdapter(pool_maxsize=pool_size, pool_block=True, max_retries=retry)
+        self.__session = requests.Session()
+        self.__session.mount("http://", self.__adapter)
+        self.__session.mount("https://", self.__adapter)
+
+    @classmethod
+    def from_settings(cls) -> "HttpClient":
+        """Создаёт клиент с параметрами из настроек Django."""
+        from django.conf import settings
+
+        return cls(
+            pool_size=settings.TIMETABLE_HTTP_POOL_SIZE,
+            connect_timeout=settings.TIMETABLE_HTTP_CONNECT_TIMEOUT,
+            read_timeout=settings.TIMETABLE_HTTP_READ_TIMEOUT,
+            retries=settings.TIMETABLE_HTTP_RETRIES,
+            backoff_factor=settings.TIMETABLE_HTTP_BACKOFF_FACTOR,
+        )
+
+    def get(self, url: str, headers: dict[str, str] | None = None, stream: bool = False) -> requests.Response:
+        """
+        Выполняет GET-запрос через общий пул соединений.
+        :param url: ссылка
+        :param headers: дополнительные заголовки запроса
+        :param stream: не загружать тело ответа сразу (для скачивания файлов)
+        """
+        response = self.__session.get(url, headers=headers, timeout=self.__timeout, stream=stream)
+
+        retries = response.raw.retries if response.raw is not None else None
+        with self.__lock:
+            self.__requests_count += 1
+            if retries is not None:
+                self.__retries_count += len(retries.history)
+
+        return response
+
+    def get_stats(self) -> dict[str, int]:
+        """Возвращает статистику запросов и переиспользования соединений."""
+        connections = 0
+        pool_requests = 0
+        for pool in self.__adapter.poolmanager.get_seen_pools():
+            connections += pool.num_connections
+            pool_requests += pool.num_requests
+
+        return {
+            "requests": self.__requests_count,
+            "retries": self.__retries_count,
+            "connections": connections,
+            "reused_connections": max(0, pool_requests - connections),
+        }
+
+    def log_stats(self) -> None:
+        """Выводит статистику клиента в лог."""
+        stats = self.get_stats()
+        logger.info(
+            f"HTTP client: {stats['requests']} requests, {stats['retries']} retries, "
+            f"{stats['connections']} connections opened, {stats['reused_connections']} reused"
+        )
+
+    def close(self) -> None:
+        """Закрывает все соединения пула."""
+        self.__session.close()
+
+    def __enter__(self) -> "HttpClient":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+_default_client: HttpClient | None = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> HttpClient:
+    """Возвращает общий для процесса клиент, если клиент не был передан явно."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = HttpClient.from_settings()
+        return _default_client
@@ -0,0 +1,87 @@
+import logging
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class LruMemo:
+    """
+    Потокобезопасный кэш результатов вычислений с вытеснением давно не использованных записей (LRU).
+    Ведёт счётчики попаданий и промахов. Кэш очищается, если изменилась сигнатура данных,
+    от которых зависят результаты (например, словари для классификации).
+    """
+
+    def __init__(self, name: str, maxsize: int = 2048) -> None:
+        """
+        :param name: название кэша для логов
+        :param maxsize: максимальное количество записей
+        """
+        self.name = name
+        self.__maxsize = maxsize
+        self.__entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self.__signature: Hashable = None
+        self.__hits = 0
+        self.__misses = 0
+        self.__lock = threading.Lock()
+
+    def get(self, key: Hashable, compute: Callable[[], Any], signature: Hashable = None) -> Any:
+        """
+        Возвращает результат для ключа, вычисляя его при отсутствии в кэше.
+        :param key: ключ
+        :param compute: функция вычисления результата
+        :param signature: сигнатура данных, от которых зависит результат
+        """
+        with self.__lock:
+            if signature != self.__signature:
+                self.__entries.clear()
+                self.__signature = signature
+            try:
+                value = self.__entries[key]
+            except KeyError:
+                self.__misses += 1
+            else:
+                self.__entries.move_to_end(key)
+                self.__hits += 1
+                return value
+
+        # Вычисление выполняется без блокировки: при одновременном промахе результат посчитается дважды
+        value = compute()
+        with self.__lock:
+            if signature == self.__signature:
+                self.__entries[key] = value
+                if len(self.__entries) > self.__maxsize:
+                    self.__entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        """Удаляет все записи."""
+        with self.__lock:
+            self.__entries.clear()
+
+    def reset_stats(self) -> None:
+        """Обнуляет счётчики попаданий и промахов."""
+        with self.__lock:
+            self.__hits = 0
+            self.__misses = 0
+
+    def get_stats(self) -> dict:
+        """Возвращает количество попаданий, промахов, записей и долю попаданий."""
+        with self.__lock:
+            total = self.__hits + self.__misses
+            return {
+                "hits": self.__hits,
+                "misses": self.__misses,
+                "size": len(self.__entries),
+                "hit_rate": self.__hits / total if total else 0.0,
+            }
+
+    def log_stats(self) -> None:
+        """Выводит статистику кэша в лог."""
+        stats = self.get_stats()
+        logger.info(
+            f"Cache {self.name}: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.1%} hit rate), {stats['size']} entries"
+        )
@@ -1,15 +1,55 @@
 import logging
 import re
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import NamedTuple
 
 import requests
-from bs4 import BeautifulSoup
 
+from .crawl_budget import CrawlBudget
+from .crawl_cache import CrawlCache
 from .file_data import FileData
+from .html_backend import HtmlParserBackend
+from .http_client import HttpClient, get_default_client
+from .validator_store import ValidatorStore
 
 # Создаем логгер для текущего модуля
 logger = logging.getLogger(__name__)
 
 
+class _PageLink(NamedTuple):
+    """Ссылка на дочернюю страницу, найденная при разборе страницы"""
+
+    url: str  # Ссылка на дочернюю страницу
+    path: str  # Путь к файлам дочерней страницы
+
+
+class _CrawlContext(NamedTuple):
+    """Общие для всех страниц одного обхода объекты"""
+
+    client: HttpClient  # HTTP-клиент
+    html_backend: HtmlParserBackend  # Способ разбора HTML
+    validators: ValidatorStore | None  # Хранилище валидаторов для условных запросов страниц
+    crawl_cache: CrawlCache | None  # Кэш результатов разбора страниц
+
+
+class _PageNode:
+    """
+    Узел дерева обхода сайта.
+    Хранит найденные на странице файлы и дочерние страницы в порядке их следования на странице
+    """
+
+    __slots__ = ("url", "path", "depth", "entries", "done")
+
+    def __init__(self, url: str, path: str, depth: int = 0) -> None:
+        self.url = url
+        self.path = path
+        self.depth = depth
+        self.entries: list["FileData | _PageNode"] = []
+        self.done = False
+
+
 class WebParser:
     """
     Класс занимается парсингом сайта
@@ -29,25 +69,184 @@ class WebParser:
         last_update: str = ""  # Время последнего обновления файла
 
     @staticmethod
-    def get_files_from_webpage(web_link: str, current_path: str = "") -> list[FileData]:
+    def get_files_from_webpage(
+        web_link: str,
+        current_path: str = "",
+        max_workers: int = 1,
+        validators: ValidatorStore | None = None,
+        client: HttpClient | None = None,
+        crawl_cache: CrawlCache | None = None,
+        html_backend: HtmlParserBackend | None = None,
+        budget: CrawlBudget | None = None,
+    ) -> list[FileData]:
         """
         Ищет на странице и в её дочерних страницах все файлы
         :param web_link: Ссылка на страницу
         :param current_path: Текущий путь к файлу
+        :param max_workers: Максимальное количество одновременно загружаемых страниц
+        :param validators: Хранилище валидаторов для условных запросов страниц
+        :param client: HTTP-клиент (по умолчанию общий клиент процесса)
+        :param crawl_cache: Кэш результатов разбора страниц
+        :param html_backend: Способ разбора HTML (по умолчанию html.parser)
+        :param budget: Ограничения обхода (по умолчанию только глубина)
         :return: Список всех найденных файлов
         """
-        # Контейнер файлов
-        files = []
+        files = list(
+            WebParser.iter_files_from_webpage(
+                web_link, current_path, max_workers, validators, client, crawl_cache, html_backend, budget
+            )
+        )
+
+        # Логируем количество найденных файлов
+        logger.info(f"Found {len(files)} files from webpage: {web_link}")
+
+        # Возвращаем список всех файлов
+        return files
+
+    @classmethod
+    def iter_files_from_webpage(
+        cls,
+        web_link: str,
+        current_path: str = "",
+        max_workers: int = 1,
+        validators: ValidatorStore | None = None,
+        client: HttpClient | None = None,
+        crawl_cache: CrawlCache | None = None,
+        html_backend: HtmlParserBackend | None = None,
+        budget: CrawlBudget | None = None,
+    ) -> Iterator[FileData]:
+        """
+        Обходит страницу и её дочерние страницы, загружая до max_workers страниц одновременно.
+        Файлы выдаются в том же порядке, что и при последовательном обходе в глубину,
+        как только все предшествующие им страницы загружены.
+        Каждая страница загружается один раз: повторные ссылки на неё (в том числе циклические) пропускаются.
+        Результаты страниц обрабатываются в порядке постановки в очередь (в ширину), поэтому при нескольких ссылках
+        на одну страницу её файлы всегда относятся к ближайшей к началу обхода ссылке
+        :param web_link: Ссылка на страницу
+        :param current_path: Текущий путь к файлу
+        :param max_workers: Максимальное количество одновременно загружаемых страниц
+        :param validators: Хранилище валидаторов для условных запросов страниц
+        :param client: HTTP-клиент (по умолчанию общий клиент процесса)
+        :param crawl_cache: Кэш результатов разбора страниц
+        :param html_backend: Способ разбора HTML (по умолчанию html.parser)
+        :param budget: Ограничения обхода (по умолчанию только глубина)
+        :return: Итератор найденных файлов
+        """
+        context = _CrawlContext(
+            client or get_default_client(), html_backend or HtmlParserBackend(), validators, crawl_cache
+        )
+        budget = budget or CrawlBudget()
+        visited: set[str] = set()  # Канонические ссылки страниц, уже поставленных в очередь
+        root = _PageNode(web_link, current_path)
+        if not budget.admit(visited, root.url, root.depth):
+            return
+
+        # Стек обхода готовых узлов: (узел, индекс следующего элемента)
+        stack: list[list] = [[root, 0]]
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="crawler") as executor:
+            # Очередь загружаемых страниц в порядке постановки
+            frontier: deque[tuple[Future, _PageNode]] = deque()
+            frontier.append((executor.submit(cls.__get_page_entries, root.url, root.path, context), root))
+
+            try:
+                while frontier:
+                    future, node = frontier.popleft()
+                    for entry in future.result():
+                        if isinstance(entry, _PageLink):
+                            if not budget.admit(visited, entry.url, node.depth + 1):
+                                continue
+                            # Дочернюю страницу загружаем параллельно с остальными
+                            child = _PageNode(entry.url, entry.path, node.depth + 1)
+                            future = executor.submit(cls.__get_page_entries, child.url, child.path, context)
+                            frontier.append((future, child))
+                            entry = child
+                        node.entries.append(entry)
+                    node.done = True
+
+                    # Выдаём все файлы, порядок которых уже определён
+                    yield from cls.__pop_ready_files(stack)
+            finally:
+                # Если обход прерван потребителем, не загружаем оставшиеся страницы
+                for future, _ in frontier:
+                    future.cancel()
+
+    @staticmethod
+    def __pop_ready_files(stack: list[list]) -> Iterator[FileData]:
+        """
+        Выдаёт файлы из загруженных узлов в порядке обхода в глубину.
+        Останавливается на первой ещё не загруженной странице
+        :param stack: Стек обхода (узел, индекс следующего элемента)
+        :return: Итератор файлов
+        """
+        while stack:
+            cursor = stack[-1]
+            node, index = cursor
+            if not node.done:
+                return
+            if index >= len(node.entries):
+                stack.pop()
+                continue
+            cursor[1] += 1
+            entry = node.entries[index]
+            if isinstance(entry, _PageNode):
+                stack.append([entry, 0])
+            else:
+                yield entry
+
+    @classmethod
+    def __get_page_entries(cls, web_link: str, current_path: str, context: _CrawlContext) -> list[FileData | _PageLink]:
+        """
+        Загружает одну страницу и ищет на ней файлы и ссылки на дочерние страницы.
+        Если основной контент страницы не изменился, элементы берутся из кэша без разбора страницы
+        :param web_link: Ссылка на страницу
+        :param current_path: Текущий путь к файлу
+        :param context: Общие объекты обхода
+        :return: Список файлов и ссылок на дочерние страницы в порядке их следования на странице
+        """
+        crawl_cache = context.crawl_cache
 
         # Пытаемся получить основной контент страницы
         try:
-            content = WebParser.__get_page_content(web_link)
+            content_html, content = cls.__get_page_content(web_link, context)
         except Exception as e:
             logger.error(
                 f"Error in get_files_from_webpage for URL {web_link}: {e}",
                 exc_info=True,
             )
-            return files
+            return []
+
+        # Контент не изменился - берём элементы из кэша
+        digest = ""
+        if crawl_cache is not None:
+            digest = crawl_cache.get_digest(content_html)
+            cached_entries = crawl_cache.get_entries(web_link, digest)
+            if cached_entries is not None:
+                logger.debug(f"Reused {len(cached_entries)} cached entries for webpage: {web_link}")
+                return cls.__entries_from_cache(cached_entries, current_path)
+
+        # Контент был взят из хранилища валидаторов без разбора
+        if content is None:
+            content = cls.__find_content(content_html, web_link, context.html_backend)
+
+        entries = cls.__parse_content(content, web_link, current_path)
+
+        if crawl_cache is not None:
+            crawl_cache.put(web_link, digest, cls.__entries_to_cache(entries, current_path))
+
+        return entries
+
+    @classmethod
+    def __parse_content(cls, content, web_link: str, current_path: str) -> list[FileData | _PageLink]:
+        """
+        Ищет в основном контенте страницы файлы и ссылки на дочерние страницы
+        :param content: Основной контент страницы
+        :param web_link: Ссылка на страницу
+        :param current_path: Текущий путь к файлу
+        :return: Список файлов и ссылок на дочерние страницы в порядке их следования на странице
+        """
+        # Контейнер элементов страницы
+        entries = []
 
         header3_text = ""  # Заголовок 3 уровня
         header4_text = ""  # Заголовок 4 уровня
@@ -70,30 +269,30 @@ class WebParser:
             # Проверяем список
             elif element.name == "ul":
                 # Формируем полный путь
-                full_path = WebParser.__add_to_path_some_elements(
+                full_path = cls.__add_to_path_some_elements(
                     current_path, [header3_text, header4_text]
                 )
 
                 # Анализируем все гиперссылки
                 for li in element.find_all("li"):
-                    files += WebParser.__find_files_from_li(li, web_link, full_path)
+                    entries += cls.__find_files_from_li(li, web_link, full_path)
 
-        # Логируем количество найденных файлов
-        logger.info(f"Found {len(files)} files from webpage: {web_link}")
+        # Логируем количество найденных элементов
+        logger.debug(f"Found {len(entries)} entries on webpage: {web_link}")
 
-        # Возвращаем список всех файлов
-        return files
+        # Возвращаем список всех элементов
+        return entries
 
     @classmethod
-    def __find_files_from_li(cls, li, web_url, current_path):
+    def __find_files_from_li(cls, li, web_url, current_path) -> list[FileData | _PageLink]:
         """
-        Получает все файлы из элемента <li>
+        Получает файл или ссылку на дочернюю страницу из элемента <li>
         :param li: Элемента <li>
         :param web_url: Ссылка на текущую страницу, на которой размещён этот элемент
         :param current_path: Текущий путь к файлам
-        :return: Список файлов, найденных по ссылке
+        :return: Список из найденного файла или ссылки на дочернюю страницу
         """
-        files = []
+        entries = []
         link_tag = li.find("a", href=True)
         if link_tag:
             # Получаем имя ссылки
@@ -117,7 +316,7 @@ class WebParser:
                     f"Found file - Path: {current_path}, URL: {link_url}, Last update: {last_update}"
                 )
 
-                files.append(file_data)
+                entries.append(file_data)
 
             else:
                 # Добавляем новую директорию в путь
@@ -126,38 +325,103 @@ class WebParser:
                 # Логируем переход по ссылке для отладки
                 logger.debug(f"Following link: {link_name} -> {link_url}")
 
-                # Добавляем в список все файлы, которые сможем найти на веб странице по этой ссылке
-                files += cls.get_files_from_webpage(link_url, current_path)
+                # Дочерняя страница будет загружена отдельно
+                entries.append(_PageLink(link_url, current_path))
 
-        # Вернуть список файлов
-        return files
+        # Вернуть найденные элементы
+        return entries
+
+    @staticmethod
+    def __entries_to_cache(entries: list[FileData | _PageLink], current_path: str) -> list[dict]:
+        """
+        Преобразует элементы страницы в записи кэша с путями относительно пути страницы
+        :param entries: Элементы страницы
+        :param current_path: Путь страницы
+        :return: Список записей кэша
+        """
+        cached_entries = []
+        for entry in entries:
+            if isinstance(entry, _PageLink):
+                cached_entries.append({"url": entry.url, "path": entry.path[len(current_path):], "page": True})
+            else:
+                cached_entries.append({
+                    "url": entry.get_url(),
+                    "path": entry.get_path()[len(current_path):],
+                    "last_update": entry.get_last_changed(),
+                })
+        return cached_entries
 
     @staticmethod
-    def __get_page_content(url: str):
+    def __entries_from_cache(cached_entries: list[dict], current_path: str) -> list[FileData | _PageLink]:
         """
-        Получает основной контент с Web страницы
+        Восстанавливает элементы страницы из записей кэша
+        :param cached_entries: Список записей кэша
+        :param current_path: Путь страницы
+        :return: Элементы страницы
+        """
+        entries = []
+        for cached in cached_entries:
+            path = current_path + cached["path"]
+            if cached.get("page"):
+                entries.append(_PageLink(cached["url"], path))
+            else:
+                entries.append(FileData(path, cached["url"], cached["last_update"]))
+        return entries
+
+    @staticmethod
+    def __find_content(html: str, url: str, html_backend: HtmlParserBackend):
+        """
+        Разбирает HTML и находит в нём основной контент страницы
+        :param html: HTML страницы или её основного контента
         :param url: ссылка Web страницы
+        :param html_backend: Способ разбора HTML
         :return: Основной контент страницы
         """
+        # Распарсить HTML страницу сайта и получить основной контент
+        content_wrapper = html_backend.find_content(html)
+        if not content_wrapper:
+            raise Exception(f"Can't find main content on web page. URL: {url}")
+
+        return content_wrapper
+
+    @staticmethod
+    def __get_page_content(url: str, context: _CrawlContext) -> tuple:
+        """
+        Получает основной контент с Web страницы.
+        Если страница не изменилась с прошлого обновления (ответ 304), контент берётся из хранилища валидаторов
+        и не разбирается
+        :param url: ссылка Web страницы
+        :param context: Общие объекты обхода
+        :return: HTML основного контента и разобранный основной контент (None, если контент взят из хранилища)
+        """
+        validators = context.validators
+
+        # Заголовки условного запроса, если контент страницы был сохранён ранее
+        headers = validators.get_conditional_headers(url, require_content=True) if validators else {}
+
         # Получение web страницы
-        response = requests.get(url)
+        response = context.client.get(url, headers=headers)
+        if response.status_code == 304 and headers:
+            validators.mark_not_modified(url)
+            return validators.get_content(url), None
         if response.status_code != 200:
             raise Exception(f"Error opening web page. URL: {url}")
 
         # Распарсить HTML страницу сайта
         response.encoding = "utf-8"
-        soup = BeautifulSoup(response.text, "html.parser")
+        content_wrapper = WebParser.__find_content(response.text, url, context.html_backend)
+        content_html = str(content_wrapper)
 
-        # Получение основного контента на странице
-        content_wrapper = soup.find(class_="content-wrapper")
-        if not content_wrapper:
-            raise Exception(f"Can't find main content on web page. URL: {url}")
+        # Запоминаем валидаторы вместе с контентом для следующего обновления
+        if validators:
+            validators.remember(url, response, content_html)
+            validators.confirm(url)
 
         # Логируем успешное получение контента
         logger.debug(f"Successfully retrieved content from: {url}")
 
         # Вернуть основной контент
-        return content_wrapper
+        return content_html, content_wrapper
 
     @staticmethod
     def __get_update_time_from_text(text, error_text=__TEXT_NO_LAST_UPDATE_TIME):
@@ -0,0 +1,312 @@
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Маркер конца элементов в очереди
+_END = object()
+
+
+class _Cancelled(Exception):
+    """Конвейер остановлен из-за ошибки в другой стадии или в вызывающем коде"""
+
+
+class _TrackedQueue(queue.Queue):
+    """Ограниченная очередь, запоминающая максимальное количество находившихся в ней элементов"""
+
+    def __init__(self, maxsize: int) -> None:
+        super().__init__(maxsize)
+        self.high_water = 0
+
+    def _put(self, item) -> None:
+        super()._put(item)
+        if item is not _END:
+            self.high_water = max(self.high_water, len(self.queue))
+
+
+class StageStats:
+    """Статистика стадии конвейера: количество элементов, время работы и заполненность входной очереди"""
+
+    def __init__(self, name: str, workers: int, input_queue: _TrackedQueue | None = None) -> None:
+        self.name = name
+        self.workers = workers
+        self.input_queue = input_queue
+        self.items = 0
+        self.busy = 0.0  # Суммарное время обработки элементов всеми потоками стадии, секунды
+        self.started: float | None = None  # Начало обработки первого элемента
+        self.finished: float | None = None  # Окончание обработки последнего элемента
+        self.__lock = threading.Lock()
+
+    def add(self, started: float, finished: float) -> None:
+        """Учитывает обработку одного элемента."""
+        with self.__lock:
+            self.items += 1
+            self.busy += finished - started
+            if self.started is None or started < self.started:
+                self.started = started
+            if self.finished is None or finished > self.finished:
+                self.finished = finished
+
+    def get_wall_time(self) -> float:
+        """Возвращает время от начала обработки первого элемента до окончания последнего, секунды."""
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+    def as_dict(self) -> dict:
+        wall = self.get_wall_time()
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "items": self.items,
+            "busy_s": round(self.busy, 3),
+            "wall_s": round(wall, 3),
+            "items_per_s": round(self.items / wall, 2) if wall else 0.0,
+            "queue_high_water": self.input_queue.high_water if self.input_queue is not None else None,
+            "queue_size": self.input_queue.maxsize if self.input_queue is not None else None,
+        }
+
+
+class _Stage:
+    """Промежуточная стадия конвейера"""
+
+    def __init__(self, name: str, handler: Callable[[Any], Any], workers: int) -> None:
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+
+
+class StagedPipeline:
+    """
+    Конвейер из нескольких стадий, связанных ограниченными очередями.
+    Источник элементов выполняется в отдельном потоке, каждая промежуточная стадия - в своих потоках,
+    а последняя стадия - в вызывающем потоке, который получает элементы из run().
+    Когда очередь заполнена, предыдущая стадия ждёт, поэтому быстрые стадии не накапливают элементы.
+    Элементы выдаются в вызывающий поток в том порядке, в котором их выдал источник.
+    Источник ждёт, пока в конвейере находится столько элементов, сколько вмещают очереди и потоки стадий,
+    поэтому элементы, обогнавшие медленный предыдущий, не накапливаются в буфере восстановления порядка.
+    Ошибка в источнике или в обработчике стадии останавливает конвейер и передаётся в вызывающий поток.
+    """
+
+    # Период проверки остановки конвейера при ожидании очереди, секунды
+    _POLL_INTERVAL = 0.1
+
+    def __init__(self, queue_size: int = 16) -> None:
+        """
+        :param queue_size: максимальное количество элементов в каждой очереди между стадиями
+        """
+        self.__queue_size = max(1, queue_size)
+        self.__stages: list[_Stage] = []
+        self.__stats: list[StageStats] = []
+        self.__stop = threading.Event()
+        self.__error: BaseException | None = None
+        self.__error_lock = threading.Lock()
+
+    def add_stage(self, name: str, handler: Callable[[Any], Any], workers: int = 1) -> None:
+        """
+        Добавляет промежуточную стадию.
+        :param name: название стадии для статистики
+        :param handler: обработчик элемента, возвращающий элемент для следующей стадии
+        :param workers: количество потоков стадии
+        """
+        self.__stages.append(_Stage(name, handler, workers))
+
+    def run(self, source: Iterable, source_name: str = "source", sink_name: str = "sink") -> Iterator:
+        """
+        Запускает конвейер и выдаёт обработанные всеми стадиями элементы.
+        Время обработки элемента вызывающим кодом учитывается как последняя стадия.
+        Итератор нужно закрыть (contextlib.closing), чтобы при ошибке в вызывающем коде остановить потоки.
+        :param source: источник элементов (выполняется в отдельном потоке)
+        :param source_name: название стадии источника для статистики
+        :param sink_name: название последней стадии для статистики
+        """
+        self.__stop = threading.Event()
+        self.__error = None
+        queues = [_TrackedQueue(self.__queue_size) for _ in range(len(self.__stages) + 1)]
+        source_stats = StageStats(source_name, 1)
+        stage_stats = [StageStats(stage.name, stage.workers, queues[i]) for i, stage in enumerate(self.__stages)]
+        sink_stats = StageStats(sink_name, 1, queues[-1])
+        self.__stats = [source_stats, *stage_stats, sink_stats]
+        # Элементы, выданные источником и ещё не выданные вызывающему коду
+        in_flight = threading.Semaphore(self.get_window())
+
+        threads = [
+            threading.Thread(
+                target=self.__run_source,
+                args=(source, queues[0], self.__get_workers(0), source_stats, in_flight),
+                name=f"pipeline-{source_name}",
+                daemon=True,
+            )
+        ]
+        for i, stage in enumerate(self.__stages):
+            alive = [stage.workers]
+            alive_lock = threading.Lock()
+            for worker in range(stage.workers):
+                threads.append(
+                    threading.Thread(
+                        target=self.__run_worker,
+                        args=(stage, queues[i], queues[i + 1], self.__get_workers(i + 1), stage_stats[i],
+                              alive, alive_lock),
+                        name=f"pipeline-{stage.name}-{worker}",
+                        daemon=True,
+                    )
+                )
+
+        for thread in threads:
+            thread.start()
+
+        pending: dict[int, Any] = {}  # Элементы, обогнавшие предыдущие, по порядковому номеру
+        next_seq = 0
+        completed = False
+        try:
+            while True:
+                entry = self.__get(queues[-1])
+                if entry is _END:
+                    break
+                seq, item = entry
+                pending[seq] = item
+                while next_seq in pending:
+                    item = pending.pop(next_seq)
+                    next_seq += 1
+                    in_flight.release()
+                    started = time.perf_counter()
+                    yield item
+                    sink_stats.add(started, time.perf_counter())
+            completed = True
+        except _Cancelled:
+            pass
+        finally:
+            if not completed:
+                self.__stop.set()
+            for thread in threads:
+                thread.join()
+
+        if self.__error is not None:
+            raise self.__error
+
+    def get_window(self) -> int:
+        """Возвращает максимальное количество элементов, одновременно находящихся в конвейере."""
+        return self.__queue_size * (len(self.__stages) + 1) + sum(stage.workers for stage in self.__stages)
+
+    def get_stats(self) -> list[dict]:
+        """Возвращает статистику стадий последнего запуска в порядке их следования."""
+        return [stats.as_dict() for stats in self.__stats]
+
+    def log_stats(self) -> None:
+        """Выводит статистику стадий в лог."""
+        for stats in self.get_stats():
+            message = (
+                f"Pipeline stage {stats['stage']}: {stats['items']} items, {stats['items_per_s']} items/s "
+                f"({stats['workers']} workers, busy {stats['busy_s']}s, wall {stats['wall_s']}s)"
+            )
+            if stats["queue_size"] is not None:
+                message += f", input queue high-water {stats['queue_high_water']}/{stats['queue_size']}"
+            logger.info(message)
+
+    # ------------------- ПРИВАТНЫЕ МЕТОДЫ ------------------- #
+
+    def __get_workers(self, index: int) -> int:
+        """Возвращает количество потоков, читающих очередь с номером index."""
+        return self.__stages[index].workers if index < len(self.__stages) else 1
+
+    def __run_source(
+        self,
+        source: Iterable,
+        output: _TrackedQueue,
+        consumers: int,
+        stats: StageStats,
+        in_flight: threading.Semaphore,
+    ) -> None:
+        iterator = iter(source)
+        try:
+            seq = 0
+            started = time.perf_counter()
+            for item in iterator:
+                stats.add(started, time.perf_counter())
+                self.__acquire(in_flight)
+                self.__put(output, (seq, item))
+                seq += 1
+                started = time.perf_counter()
+            for _ in range(consumers):
+                self.__put(output, _END)
+        except _Cancelled:
+            pass
+        except BaseException as e:
+            self.__fail(e)
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+            connections.close_all()
+
+    def __run_worker(
+        self,
+        stage: _Stage,
+        input_queue: _TrackedQueue,
+        output: _TrackedQueue,
+        consumers: int,
+        stats: StageStats,
+        alive: list[int],
+        alive_lock: threading.Lock,
+    ) -> None:
+        try:
+            while True:
+                entry = self.__get(input_queue)
+                if entry is _END:
+                    break
+                seq, item = entry
+                started = time.perf_counter()
+                item = stage.handler(item)
+                stats.add(started, time.perf_counter())
+                self.__put(output, (seq, item))
+
+            # Последний завершившийся поток стадии передаёт конец элементов следующей стадии
+            with alive_lock:
+                alive[0] -= 1
+                last = not alive[0]
+            if last:
+                for _ in range(consumers):
+                    self.__put(output, _END)
+        except _Cancelled:
+            pass
+        except BaseException as e:
+            self.__fail(e)
+        finally:
+            # Потоки стадий могут обращаться к БД: у каждого потока своё соединение Django
+            connections.close_all()
+
+    def __fail(self, error: BaseException) -> None:
+        with self.__error_lock:
+            if self.__error is None:
+                self.__error = error
+        self.__stop.set()
+
+    def __acquire(self, semaphore: threading.Semaphore) -> None:
+        while not semaphore.acquire(timeout=self._POLL_INTERVAL):
+            if self.__stop.is_set():
+                raise _Cancelled()
+
+    def __put(self, output: _TrackedQueue, entry) -> None:
+        while True:
+            if self.__stop.is_set():
+                raise _Cancelled()
+            try:
+                output.put(entry, timeout=self._POLL_INTERVAL)
+                return
+            except queue.Full:
+                pass
+
+    def __get(self, input_queue: _TrackedQueue):
+        while True:
+            if self.__stop.is_set():
+                raise _Cancelled()
+            try:
+                return input_queue.get(timeout=self._POLL_INTERVAL)
+            except queue.Empty:
+                pass
@@ -0,0 +1,35 @@
+import logging
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCounter:
+    """
+    Счётчик запросов к БД для статистики обновления.
+    Подключается к соединению текущего потока как execute_wrapper, поэтому учитывает только запросы этого потока.
+    """
+
+    def __init__(self) -> None:
+        self.__count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.__count += 1
+        return execute(sql, params, many, context)
+
+    @contextmanager
+    def track(self) -> Iterator["QueryCounter"]:
+        """Считает запросы текущего потока внутри блока with."""
+        with connection.execute_wrapper(self):
+            yield self
+
+    def get_count(self) -> int:
+        """Возвращает количество выполненных запросов."""
+        return self.__count
+
+    def log_stats(self) -> None:
+        """Выводит количество запросов в лог."""
+        logger.info(f"Database queries: {self.__count}")
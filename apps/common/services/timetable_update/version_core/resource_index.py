@@ -0,0 +1,153 @@
+import logging
+import threading
+from collections.abc import Callable
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from apps.common.models import FileVersion, Resource
+from apps.common.selectors import LatestVersion, get_latest_versions
+from .tag_resolver import TagResolver
+
+logger = logging.getLogger(__name__)
+
+
+class ResourceIndex:
+    """
+    Ресурсы расписания по пути и последние версии ресурсов. Загружаются из БД двумя запросами в начале обновления,
+    поэтому поиск ресурса и проверка изменения каждого найденного на сайте файла не обращаются к БД.
+    Новые версии файлов и новые ресурсы не сохраняются сразу, а накапливаются и записываются в БД частями
+    по chunk_size версий (flush): каждая часть сохраняется через bulk_create в одной транзакции.
+    Изменяется только из потока записи в БД, читать можно из любого потока.
+    """
+
+    # Поля ресурса, нужные при обновлении
+    FIELDS = ("id", "name", "path", "deprecated")
+
+    def __init__(
+        self,
+        resources: dict[str, Resource] | None = None,
+        latest_versions: dict[int, LatestVersion] | None = None,
+        chunk_size: int = 200,
+    ) -> None:
+        self.__resources: dict[str, Resource] = resources or {}
+        self.__latest_versions: dict[int, LatestVersion] = latest_versions or {}  # id ресурса -> последняя версия
+        self.__chunk_size = max(chunk_size, 1)
+        self.__pending_resources: dict[str, Resource] = {}  # Ресурсы с версиями, ожидающими сохранения, по пути
+        self.__pending_versions: dict[str, list[FileVersion]] = {}  # Версии, ожидающие сохранения, по пути ресурса
+        self.__pending_count = 0
+        self.__pending_callbacks: list[Callable[[], object]] = []  # Вызываются после записи части в БД
+        self.__chunk_count = 0
+        self.__tags = TagResolver()
+        self.__lock = threading.Lock()
+
+    @classmethod
+    def load(cls) -> "ResourceIndex":
+        """
+        Загружает все ресурсы и их последние версии из БД.
+        Если у нескольких ресурсов одинаковый путь, используется первый по id.
+        Размер части сохранения берётся из настройки TIMETABLE_PERSIST_CHUNK_SIZE.
+        """
+        resources: dict[str, Resource] = {}
+        for resource in Resource.objects.only(*cls.FIELDS).order_by("id"):
+            resources.setdefault(resource.path, resource)
+        latest_versions = get_latest_versions()
+        logger.info(f"Loaded {len(resources)} resources, {len(latest_versions)} with file versions")
+        return cls(resources, latest_versions, settings.TIMETABLE_PERSIST_CHUNK_SIZE)
+
+    def get(self, path: str) -> Resource | None:
+        """Возвращает сохранённый или ожидающий сохранения ресурс по пути."""
+        with self.__lock:
+            resource = self.__resources.get(path)
+            if resource is None:
+                resource = self.__pending_resources.get(path)
+            return resource
+
+    def get_latest_version(self, resource: Resource) -> LatestVersion | None:
+        """Возвращает последнюю версию ресурса, в том числе ещё не сохранённую в БД."""
+        with self.__lock:
+            versions = self.__pending_versions.get(resource.path)
+            if versions:
+                return LatestVersion.from_version(versions[-1])
+            if resource.pk is not None:
+                return self.__latest_versions.get(resource.pk)
+            return None
+
+    def set_latest_version(self, resource: Resource, latest_version: LatestVersion) -> None:
+        """Запоминает последнюю версию сохранённого ресурса."""
+        with self.__lock:
+            self.__latest_versions[resource.pk] = latest_version
+
+    def add(self, resource: Resource, version: FileVersion, on_saved: Callable[[], object] | None = None) -> None:
+        """
+        Добавляет новую версию файла ресурса. Версия (и ресурс, если он ещё не сохранён) сохранятся при flush.
+        :param resource: сохранённый или новый ресурс
+        :param version: новая версия файла этого ресурса
+        :param on_saved: функция, вызываемая после фиксации транзакции с этой версией (не вызывается при откате)
+        """
+        with self.__lock:
+            self.__pending_resources.setdefault(resource.path, resource)
+            self.__pending_versions.setdefault(resource.path, []).append(version)
+            self.__pending_count += 1
+            if on_saved is not None:
+                self.__pending_callbacks.append(on_saved)
+
+    def is_chunk_full(self) -> bool:
+        """Возвращает True, если накоплено не меньше chunk_size версий, ожидающих сохранения."""
+        with self.__lock:
+            return self.__pending_count >= self.__chunk_size
+
+    def flush(self) -> list[Resource]:
+        """
+        Сохраняет накопленные версии, новые ресурсы и их теги в одной транзакции. Возвращает созданные ресурсы.
+        Ресурсы, версии и связи с тегами создаются через bulk_create (недостающие теги - одним запросом),
+        ссылки на последние версии записываются одним bulk_update.
+        При ошибке транзакция откатывается целиком, функции on_saved не вызываются, а исключение передаётся
+        вызывающему коду.
+        """
+        with self.__lock:
+            resources = list(self.__pending_resources.values())
+            versions_by_path = dict(self.__pending_versions)
+            callbacks = list(self.__pending_callbacks)
+        if not resources:
+            return []
+        new_resources = [resource for resource in resources if resource.pk is None]
+        versions = [version for path_versions in versions_by_path.values() for version in path_versions]
+
+        with transaction.atomic():
+            if connection.features.can_return_rows_from_bulk_insert:
+                Resource.objects.bulk_create(new_resources)
+                # resource_id версий берётся из уже сохранённых ресурсов
+                FileVersion.objects.bulk_create(versions)
+            else:
+                # Без RETURNING у созданных объектов не будет id, нужного для тегов и ссылок на последние версии
+                for resource in new_resources:
+                    resource.save()
+                for version in versions:
+                    version.save()
+            tag_links = self.__tags.attach_pending_tags(new_resources)
+            for resource in resources:
+                resource.latest_version = versions_by_path[resource.path][-1]
+            Resource.objects.bulk_update(resources, ["latest_version"])
+            for callback in callbacks:
+                transaction.on_commit(callback, robust=True)
+
+        with self.__lock:
+            for resource in resources:
+                self.__resources.setdefault(resource.path, resource)
+                self.__latest_versions[resource.pk] = LatestVersion.from_version(versions_by_path[resource.path][-1])
+            self.__pending_resources.clear()
+            self.__pending_versions.clear()
+            self.__pending_count = 0
+            self.__pending_callbacks.clear()
+            self.__chunk_count += 1
+        logger.info(
+            f"Saved chunk {self.__chunk_count}: {len(versions)} file versions, "
+            f"{len(new_resources)} new resources and {tag_links} tag links"
+        )
+        return new_resources
+
+    def log_stats(self) -> None:
+        """Выводит статистику сохранения и тегов в лог."""
+        logger.info(f"Persisted file versions in {self.__chunk_count} chunks (chunk size {self.__chunk_size})")
+        self.__tags.log_stats()
@@ -0,0 +1,101 @@
+import logging
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future
+
+from .file_data import DownloadResult
+
+logger = logging.getLogger(__name__)
+
+
+class _SharedDownload:
+    """Скачивание одного URL и количество ещё не обработанных ссылок на него"""
+
+    __slots__ = ("refs", "future")
+
+    def __init__(self) -> None:
+        self.refs = 0
+        self.future: Future | None = None
+
+
+class SharedDownloads:
+    """
+    Файлы, скачанные за один запуск обновления, по URL.
+    Файл, ссылка на который встречается под несколькими путями, скачивается один раз:
+    остальные потоки ждут окончания первого скачивания.
+    Временный файл удаляется после обработки последней ссылки на него, но не раньше окончания обхода сайта,
+    пока могут быть найдены новые ссылки на тот же файл.
+    """
+
+    def __init__(self) -> None:
+        self.__downloads: dict[str, _SharedDownload] = {}
+        self.__sealed = False  # Обход сайта закончен, новых ссылок не будет
+        self.__reused = 0  # Количество ссылок, получивших уже скачанный файл
+        self.__lock = threading.Lock()
+
+    def acquire(self, url: str) -> None:
+        """Учитывает найденную при обходе ссылку на файл."""
+        with self.__lock:
+            self.__downloads.setdefault(url, _SharedDownload()).refs += 1
+
+    def get(self, url: str, download: Callable[[], DownloadResult | None]) -> DownloadResult | None:
+        """
+        Возвращает результат скачивания файла, скачивая его при первом обращении.
+        Ошибка скачивания передаётся всем ссылкам на файл.
+        :param url: ссылка на файл, учтённая через acquire
+        :param download: функция скачивания файла
+        """
+        with self.__lock:
+            shared = self.__downloads[url]
+            owner = shared.future is None
+            if owner:
+                shared.future = Future()
+            else:
+                self.__reused += 1
+
+        if owner:
+            try:
+                shared.future.set_result(download())
+            except BaseException as e:
+                shared.future.set_exception(e)
+        return shared.future.result()
+
+    def release(self, url: str) -> None:
+        """Отмечает ссылку на файл обработанной и удаляет временный файл, если ссылок на него больше не будет."""
+        with self.__lock:
+            shared = self.__downloads[url]
+            shared.refs -= 1
+            if shared.refs or not self.__sealed:
+                return
+            del self.__downloads[url]
+        self.__remove(shared)
+
+    def seal(self) -> None:
+        """Отмечает окончание обхода сайта и удаляет временные файлы, все ссылки на которые уже обработаны."""
+        with self.__lock:
+            self.__sealed = True
+            released = [url for url, shared in self.__downloads.items() if not shared.refs]
+            removed = [self.__downloads.pop(url) for url in released]
+        for shared in removed:
+            self.__remove(shared)
+
+    def close(self) -> None:
+        """Удаляет все оставшиеся временные файлы."""
+        with self.__lock:
+            removed = list(self.__downloads.values())
+            self.__downloads.clear()
+        for shared in removed:
+            self.__remove(shared)
+
+    def get_reused_count(self) -> int:
+        """Возвращает количество ссылок, получивших уже скачанный файл."""
+        return self.__reused
+
+    @staticmethod
+    def __remove(shared: _SharedDownload) -> None:
+        future = shared.future
+        if future is None or not future.done() or future.exception() is not None:
+            return
+        download = future.result()
+        if download is not None:
+            download.path.unlink(missing_ok=True)
@@ -1,4 +1,4 @@
-import difflib
+from .fuzzy_matcher import FuzzyMatcher
 
 class StringListAnalyzer:
     """
@@ -7,11 +7,15 @@ class StringListAnalyzer:
     строка из списка для сравнения. Также между этими строками вычисляется коэффициент сравнения.
     """
 
-    def __init__(self, analyze_strings:list[str] = None, compare_strings:list[str] = None, quick_analyze:bool = True):
+    def __init__(self, analyze_strings:list[str] = None, compare_strings:list[str] = None, quick_analyze:bool = True,
+                 min_ratio:float = 0.0):
         """
         Выполняет сравнение двух списков строк
         :param analyze_strings: Список строк для анализа
         :param compare_strings: Список строк для сравнения
+        :param quick_analyze: Использовать быстрый анализ (quick_ratio вместо ratio)
+        :param min_ratio: Минимальный учитываемый коэффициент. Строки, для которых нет строки для сравнения
+        с коэффициентом не меньше min_ratio, считаются не имеющими похожих строк (коэффициент 0)
         """
         # создание переменных класса
         self.__analyze_strings = [] # Список строк для анализа
@@ -19,6 +23,7 @@ class StringListAnalyzer:
         self.__most_similar_strings = dict() # Словарь (строка) -> (максимально похожая строка)
         self.__max_ratio_strings = dict() # Словарь (строка) -> (степень максимальной похожести)
         self.__quick_analyze = quick_analyze # Использовать быстрый анализ
+        self.__min_ratio = min_ratio # Минимальный учитываемый коэффициент
 
         # Задание значений спискам
         if analyze_strings is not None:
@@ -35,19 +40,15 @@ class StringListAnalyzer:
         Выполняет сравнение двух списков строк
         :return: Текущий экземпляр класса
         """
-        # Для каждой пары строк из списка анализируемых и сравниваемых строк
-        for analyze_string in self.__analyze_strings:
-            for compare_string in self.__compare_strings:
-                # Рассчитать коэффициент похожести
-                if (self.__quick_analyze):
-                    ratio = difflib.SequenceMatcher(None, analyze_string, compare_string).quick_ratio()
-                else:
-                    ratio = difflib.SequenceMatcher(None, analyze_string, compare_string).ratio()
-
-                # Обновить значения, если текущий коэффициент больше предыдущего
-                if ratio > self.__max_ratio_strings.get(analyze_string, -1):
-                    self.__max_ratio_strings[analyze_string] = ratio
-                    self.__most_similar_strings[analyze_string] = compare_string
+        # Поисковик по списку строк для сравнения, общий для всех анализаторов с тем же списком
+        matcher = FuzzyMatcher.get(tuple(self.__compare_strings), self.__quick_analyze)
+
+        # Для каждой строки из списка анализируемых строк (повторяющиеся строки анализируются один раз)
+        for analyze_string in dict.fromkeys(self.__analyze_strings):
+            # Найти максимально похожую строку и коэффициент похожести
+            match = matcher.match(analyze_string, self.__min_ratio)
+            if match is not None:
+                self.__most_similar_strings[analyze_string], self.__max_ratio_strings[analyze_string] = match
 
         return self
 
@@ -0,0 +1,72 @@
+import logging
+from collections.abc import Iterable
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+
+from apps.common.models import Resource, Tag
+
+logger = logging.getLogger(__name__)
+
+TagKey = tuple[str, str]  # (название, категория)
+
+
+class TagResolver:
+    """
+    Кэш id тегов по названию и категории на время обновления.
+    Теги загружаются одним запросом при первом обращении, недостающие создаются одним bulk_create,
+    связи новых ресурсов с тегами записываются одной вставкой в промежуточную таблицу.
+    """
+
+    def __init__(self) -> None:
+        self.__ids: dict[TagKey, int] | None = None  # (название, категория) -> id тега
+        self.__created_count = 0
+
+    def resolve(self, tags: Iterable[Tag]) -> dict[TagKey, int]:
+        """
+        Возвращает id тегов, создавая отсутствующие в БД.
+        :param tags: теги (сохранённые или нет)
+        :return: словарь (название, категория) -> id для переданных тегов
+        """
+        if self.__ids is None:
+            rows = Tag.objects.values_list("name", "category", "id")
+            self.__ids = {(name, category): tag_id for name, category, tag_id in rows}
+
+        keys = {(tag.name, tag.category) for tag in tags}
+        missing = keys - self.__ids.keys()
+        if missing:
+            # Тег мог создать параллельный процесс: конфликт по unique_name_category не ошибка
+            Tag.objects.bulk_create(
+                [Tag(name=name, category=category) for name, category in missing], ignore_conflicts=True
+            )
+            condition = reduce(or_, (Q(name=name, category=category) for name, category in missing))
+            for name, category, tag_id in Tag.objects.filter(condition).values_list("name", "category", "id"):
+                self.__ids[(name, category)] = tag_id
+            self.__created_count += len(missing)
+
+        return {key: self.__ids[key] for key in keys}
+
+    def attach_pending_tags(self, resources: Iterable[Resource]) -> int:
+        """
+        Сохраняет связи сохранённых ресурсов с тегами, добавленными до сохранения ресурсов (Resource.add_tags).
+        Возвращает количество записанных связей.
+        """
+        pending = [(resource, resource.pop_pending_tags()) for resource in resources]
+        ids = self.resolve(tag for _, tags in pending for tag in tags)
+
+        through = Resource.tags.through
+        links = {
+            (resource.pk, ids[(tag.name, tag.category)])
+            for resource, tags in pending
+            for tag in tags
+        }
+        through.objects.bulk_create(
+            [through(resource_id=resource_id, tag_id=tag_id) for resource_id, tag_id in links],
+            ignore_conflicts=True,
+        )
+        return len(links)
+
+    def log_stats(self) -> None:
+        """Выводит статистику тегов в лог."""
+        logger.info(f"Tags: {len(self.__ids or {})} cached, {self.__created_count} created")
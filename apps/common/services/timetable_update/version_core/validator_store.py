@@ -0,0 +1,109 @@
+import logging
+import threading
+
+import requests
+
+from apps.common.models import HttpValidator
+
+logger = logging.getLogger(__name__)
+
+
+class ValidatorStore:
+    """
+    Хранилище валидаторов HTTP-кэша (ETag / Last-Modified) по URL.
+    Загружается из БД одним запросом в начале обновления и сохраняется в конце.
+    Новые валидаторы файла сохраняются только после подтверждения успешной обработки файла,
+    чтобы необработанный файл не был пропущен при следующем обновлении из-за ответа 304.
+    """
+
+    def __init__(self, validators: dict[str, HttpValidator] | None = None) -> None:
+        self.__validators: dict[str, HttpValidator] = validators or {}
+        self.__pending: dict[str, HttpValidator] = {}  # Новые валидаторы, ожидающие подтверждения
+        self.__confirmed: dict[str, HttpValidator] = {}  # Валидаторы для сохранения в БД
+        self.__discarded: set[str] = set()  # URL, валидаторы которых нужно удалить из БД
+        self.__not_modified_count = 0  # Количество ответов 304
+        self.__lock = threading.Lock()
+
+    @classmethod
+    def load(cls) -> "ValidatorStore":
+        """Загружает все валидаторы из БД."""
+        validators = {validator.url: validator for validator in HttpValidator.objects.all()}
+        logger.info(f"Loaded {len(validators)} HTTP validators")
+        return cls(validators)
+
+    def get_conditional_headers(self, url: str, require_content: bool = False) -> dict[str, str]:
+        """
+        Возвращает заголовки условного запроса (If-None-Match / If-Modified-Since) для URL.
+        :param url: ссылка на страницу или файл
+        :param require_content: не использовать валидаторы без сохранённого контента страницы
+        """
+        validator = self.__validators.get(url)
+        if validator is None or (require_content and validator.content is None):
+            return {}
+
+        headers = {}
+        if validator.etag:
+            headers["If-None-Match"] = validator.etag
+        if validator.last_modified:
+            headers["If-Modified-Since"] = validator.last_modified
+        return headers
+
+    def get_content(self, url: str) -> str | None:
+        """Возвращает сохранённый контент страницы (используется при ответе 304)."""
+        validator = self.__validators.get(url)
+        return validator.content if validator is not None else None
+
+    def mark_not_modified(self, url: str) -> None:
+        """Учитывает ответ 304 для URL в статистике."""
+        with self.__lock:
+            self.__not_modified_count += 1
+        logger.debug(f"Not modified (304): {url}")
+
+    def remember(self, url: str, response: requests.Response, content: str | None = None) -> None:
+        """
+        Запоминает валидаторы из ответа сервера. В БД они попадут только после confirm(url).
+        :param url: ссылка на страницу или файл
+        :param response: ответ сервера с кодом 200
+        :param content: основной контент страницы (для файлов не передаётся)
+        """
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+
+        with self.__lock:
+            self.__pending[url] = HttpValidator(url=url, etag=etag, last_modified=last_modified, content=content)
+
+    def confirm(self, url: str) -> None:
+        """Подтверждает, что страница или файл успешно обработаны и их валидаторы можно сохранить."""
+        with self.__lock:
+            validator = self.__pending.pop(url, None)
+            if validator is not None:
+                self.__confirmed[url] = validator
+                self.__discarded.discard(url)
+
+    def discard(self, url: str) -> None:
+        """Удаляет валидаторы URL, чтобы при следующем обновлении он был загружен полностью."""
+        with self.__lock:
+            self.__pending.pop(url, None)
+            self.__confirmed.pop(url, None)
+            if url in self.__validators:
+                self.__discarded.add(url)
+
+    def save(self) -> None:
+        """Сохраняет подтверждённые валидаторы в БД и удаляет отброшенные."""
+        if self.__discarded:
+            HttpValidator.objects.filter(url__in=self.__discarded).delete()
+
+        if self.__confirmed:
+            HttpValidator.objects.bulk_create(
+                self.__confirmed.values(),
+                update_conflicts=True,
+                unique_fields=["url"],
+                update_fields=["etag", "last_modified", "content", "updated"],
+            )
+
+        logger.info(
+            f"HTTP validators: {self.__not_modified_count} not modified (304), "
+            f"{len(self.__confirmed)} saved, {len(self.__discarded)} discarded"
+        )
@@ -0,0 +1,29 @@
+import time
+
+from apps.common.services.timetable_update.version_core import blob_store as blob_store_module
+from apps.common.services.timetable_update.version_core.blob_store import BlobStore
+
+
+def test_new_store_keeps_temp_files_of_running_update(tmp_path):
+    temp_dir = tmp_path / BlobStore.TEMP_BLOB_DIR
+    temp_dir.mkdir(parents=True)
+    in_progress = temp_dir / ".abc_resource.xlsx"
+    in_progress.write_bytes(b"copy in progress")
+
+    BlobStore(tmp_path)
+
+    assert in_progress.read_bytes() == b"copy in progress"
+
+
+def test_new_store_removes_stale_temp_files(tmp_path, monkeypatch):
+    temp_dir = tmp_path / BlobStore.TEMP_BLOB_DIR
+    temp_dir.mkdir(parents=True)
+    stale = temp_dir / ".abc_resource.xlsx"
+    stale.write_bytes(b"left after crash")
+    now = time.time()
+    monkeypatch.setattr(blob_store_module.time, "time", lambda: now + BlobStore.STALE_TEMP_AGE + 1)
+
+    BlobStore(tmp_path)
+
+    assert not stale.exists()
+    assert temp_dir.is_dir()
@@ -0,0 +1,114 @@
+import logging
+
+import pytest
+import requests
+
+from apps.common.services.timetable_update.version_core.crawl_budget import CrawlBudget, canonicalize_url
+from apps.common.services.timetable_update.version_core.parser import WebParser
+
+BUDGET_LOGGER = "apps.common.services.timetable_update.version_core.crawl_budget"
+
+
+@pytest.mark.parametrize(
+    ("url", "canonical"),
+    [
+        ("https://www.vstu.ru/student/", "https://www.vstu.ru/student/"),
+        ("HTTPS://WWW.VSTU.RU/student/", "https://www.vstu.ru/student/"),
+        ("https://www.vstu.ru:443/student/#top", "https://www.vstu.ru/student/"),
+        ("http://www.vstu.ru:80", "http://www.vstu.ru/"),
+        ("http://www.vstu.ru:8080/a?b=1#c", "http://www.vstu.ru:8080/a?b=1"),
+        ("https://www.vstu.ru/Student/", "https://www.vstu.ru/Student/"),
+    ],
+)
+def test_canonicalize_url(url, canonical):
+    assert canonicalize_url(url) == canonical
+
+
+def test_admit_skips_duplicate_and_equivalent_urls():
+    budget = CrawlBudget()
+    visited = set()
+
+    assert budget.admit(visited, "https://www.vstu.ru/a/", 0)
+    assert not budget.admit(visited, "https://www.vstu.ru/a/", 1)
+    assert not budget.admit(visited, "HTTPS://www.vstu.ru:443/a/#files", 1)
+    assert budget.admit(visited, "https://www.vstu.ru/b/", 1)
+    assert visited == {"https://www.vstu.ru/a/", "https://www.vstu.ru/b/"}
+
+
+def test_admit_limits_depth_and_page_count():
+    budget = CrawlBudget(max_depth=1, max_pages=2)
+    visited = set()
+
+    assert budget.admit(visited, "https://www.vstu.ru/", 0)
+    assert not budget.admit(visited, "https://www.vstu.ru/deep/", 2)
+    assert budget.admit(visited, "https://www.vstu.ru/a/", 1)
+    assert not budget.admit(visited, "https://www.vstu.ru/b/", 1)
+    # Пропущенные страницы не отмечаются посещёнными
+    assert visited == {"https://www.vstu.ru/", "https://www.vstu.ru/a/"}
+
+
+def test_log_stats_reports_saved_fetches(caplog):
+    budget = CrawlBudget(max_depth=1, max_pages=3)
+    visited = set()
+    for url, depth in [("/", 0), ("/", 1), ("/#x", 1), ("/a", 1), ("/deep", 2), ("/b", 1), ("/c", 1)]:
+        budget.admit(visited, "https://www.vstu.ru" + url, depth)
+
+    with caplog.at_level(logging.INFO, logger=BUDGET_LOGGER):
+        budget.log_stats()
+
+    assert caplog.messages[-1] == (
+        "Crawl: 3 pages fetched, 2 fetches saved by URL dedupe, 1 skipped by depth, 1 skipped by page budget"
+    )
+
+
+class CountingClient:
+    """HTTP-клиент с интерфейсом HttpClient, отдающий страницы из словаря и считающий запросы"""
+
+    def __init__(self, pages: dict[str, str]) -> None:
+        self.pages = pages
+        self.requested: list[str] = []
+
+    def get(self, url: str, headers: dict[str, str] | None = None, stream: bool = False) -> requests.Response:
+        self.requested.append(url)
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = self.pages[url].encode("utf-8")
+        return response
+
+
+def _page(*items: str) -> str:
+    links = "".join(f'<li><a href="{href}">{text}</a></li>' for href, text in items)
+    return f'<html><body><div class="content-wrapper"><ul>{links}</ul></div></body></html>'
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_crawl_fetches_each_page_once_despite_cycles(max_workers):
+    root = "https://www.vstu.ru/raspisanie/"
+    pages = {
+        root: _page(("a/", "А"), ("b/", "Б"), ("a/#files", "А ещё раз")),
+        root + "a/": _page(("/upload/a.xlsx", "Файл А"), ("../", "Назад"), ("../b/", "Б")),
+        root + "b/": _page(
+            ("/upload/b.xlsx", "Файл Б"), ("../a/", "А"), ("https://WWW.vstu.ru:443/raspisanie/", "В начало")
+        ),
+    }
+    client = CountingClient(pages)
+
+    files = WebParser.get_files_from_webpage(root, "", max_workers=max_workers, client=client)
+
+    assert sorted(file.get_url() for file in files) == [
+        "https://www.vstu.ru/upload/a.xlsx",
+        "https://www.vstu.ru/upload/b.xlsx",
+    ]
+    assert sorted(client.requested) == sorted(pages)
+
+
+def test_crawl_stops_at_max_depth():
+    root = "https://www.vstu.ru/raspisanie/"
+    pages = {root + "1/" * depth: _page(("1/", "Дальше"), ("/upload/f%d.xlsx" % depth, "Файл")) for depth in range(5)}
+    client = CountingClient(pages)
+
+    files = WebParser.get_files_from_webpage(root, "", client=client, budget=CrawlBudget(max_depth=2))
+
+    assert sorted(file.get_url() for file in files) == [f"https://www.vstu.ru/upload/f{i}.xlsx" for i in range(3)]
+    assert len(client.requested) == 3
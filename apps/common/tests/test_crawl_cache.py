@@ -0,0 +1,117 @@
+import pytest
+import requests
+
+from apps.common.services.timetable_update.version_core.crawl_cache import CrawlCache
+from apps.common.services.timetable_update.version_core.parser import WebParser
+
+START_URL = "https://www.vstu.ru/student/raspisaniya/zanyatiy/"
+FACULTY_URL = "https://www.vstu.ru/student/raspisaniya/zanyatiy/feu/"
+
+
+def _page(body: str) -> str:
+    return f'<html><body><nav><a href="/">Меню</a></nav><div class="content-wrapper">{body}</div></body></html>'
+
+
+PAGES = {
+    START_URL: _page('<h3>Бакалавриат</h3><ul><li><a href="feu/">Факультет экономики и управления</a></li></ul>'),
+    FACULTY_URL: _page(
+        "<h4>Очная форма обучения</h4><ul>"
+        '<li><a href="/upload/FEU_1.xlsx">ФЭУ 1 курс</a> 2025-01-01 10:00:00</li>'
+        '<li><a href="/upload/FEU_2.xlsx">ФЭУ 2 курс</a></li>'
+        "</ul>"
+    ),
+}
+
+
+class PageClient:
+    """HTTP-клиент с интерфейсом HttpClient, отдающий страницы из словаря"""
+
+    def __init__(self, pages: dict[str, str]) -> None:
+        self.pages = pages
+
+    def get(self, url: str, headers: dict[str, str] | None = None, stream: bool = False) -> requests.Response:
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = self.pages[url].encode("utf-8")
+        return response
+
+
+@pytest.fixture
+def parsed_pages(monkeypatch) -> list[str]:
+    """Ссылки страниц, контент которых разбирался (не был взят из кэша)"""
+    parsed = []
+    parse_content = WebParser._WebParser__parse_content
+
+    def track(content, web_link: str, current_path: str):
+        parsed.append(web_link)
+        return parse_content(content, web_link, current_path)
+
+    monkeypatch.setattr(WebParser, "_WebParser__parse_content", track)
+    return parsed
+
+
+def _crawl(pages: dict[str, str], crawl_cache: CrawlCache) -> list[tuple[str, str, str]]:
+    files = WebParser.iter_files_from_webpage(
+        START_URL, "Расписания/", client=PageClient(pages), crawl_cache=crawl_cache
+    )
+    return [(file.get_path(), file.get_url(), file.get_last_changed()) for file in files]
+
+
+@pytest.mark.django_db
+def test_unchanged_pages_are_not_parsed_again(parsed_pages):
+    crawl_cache = CrawlCache.load()
+    first = _crawl(PAGES, crawl_cache)
+    crawl_cache.save()
+    parsed_pages.clear()
+
+    second = _crawl(PAGES, CrawlCache.load())
+
+    assert first == [
+        (
+            "Расписания/Бакалавриат/Факультет экономики и управления/Очная форма обучения/ФЭУ 1 курс",
+            "https://www.vstu.ru/upload/FEU_1.xlsx",
+            "2025-01-01 10:00:00",
+        ),
+        (
+            "Расписания/Бакалавриат/Факультет экономики и управления/Очная форма обучения/ФЭУ 2 курс",
+            "https://www.vstu.ru/upload/FEU_2.xlsx",
+            "Неизвестно",
+        ),
+    ]
+    assert second == first
+    assert parsed_pages == []
+
+
+def test_changed_page_is_parsed_again(parsed_pages):
+    crawl_cache = CrawlCache()
+    _crawl(PAGES, crawl_cache)
+    parsed_pages.clear()
+
+    changed = {**PAGES, FACULTY_URL: PAGES[FACULTY_URL].replace("2025-01-01 10:00:00", "2025-02-01 10:00:00")}
+    files = _crawl(changed, crawl_cache)
+
+    assert parsed_pages == [FACULTY_URL]
+    assert files[0][2] == "2025-02-01 10:00:00"
+
+
+def test_changes_outside_main_content_do_not_change_digest(parsed_pages):
+    crawl_cache = CrawlCache()
+    _crawl(PAGES, crawl_cache)
+    parsed_pages.clear()
+
+    changed = {url: html.replace("Меню", "Новое меню") for url, html in PAGES.items()}
+    _crawl(changed, crawl_cache)
+
+    assert parsed_pages == []
+
+
+def test_format_version_invalidates_entries(parsed_pages, monkeypatch):
+    crawl_cache = CrawlCache()
+    _crawl(PAGES, crawl_cache)
+    parsed_pages.clear()
+
+    monkeypatch.setattr(CrawlCache, "FORMAT_VERSION", CrawlCache.FORMAT_VERSION + "-next")
+    _crawl(PAGES, crawl_cache)
+
+    assert parsed_pages == [START_URL, FACULTY_URL]
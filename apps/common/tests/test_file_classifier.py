@@ -0,0 +1,262 @@
+import pytest
+
+from apps.common.services.timetable_update.version_core.file_classifier import FileClassifier
+from apps.common.services.timetable_update.version_core.file_data import FileData
+
+# Пути и результаты классификации прежним FileData (базовый коммит e903cfa, до FileClassifier):
+# (путь, имя без служебных слов, сокращённый путь ресурса, степень, форма обучения, факультет, курсы)
+EXPECTED = [
+    (
+        "Расписания/Расписание занятий/Бакалавриат/Факультет технологии пищевых производств/"
+        "ФЭУ 1,2 курс (весна 2021) - .xls",
+        "ФЭУ 1,2 курс (весна 2021)",
+        "РЗ/Б/ФТПП/Н",
+        "Бакалавриат",
+        "",
+        "Факультет технологии пищевых производств",
+        (),
+    ),
+    (
+        "Расписания/Расписание сессии/Бакалавриат/Факультет автоматизированных систем, транспорта и вооружений/"
+        "ХТФ 4 курс (осень 2025).xlsx",
+        "ХТФ 4 курс (осень 2025)",
+        "РЭ/Б/ФАСТВ/Н",
+        "Бакалавриат",
+        "",
+        "Факультет автоматизированных систем, транспорта и вооружений",
+        (),
+    ),
+    (
+        "Расписания/Расписание экзаменов/Бакалавриат/Факультет автомобильного транспорта/Очная/"
+        "ФТПП 1,2 курс (осень 2019).xlsx",
+        "ФТПП 1,2 курс (осень 2019)",
+        "РЭ/Б/ФАТ/О/Н",
+        "Бакалавриат",
+        "Очная",
+        "Факультет автомобильного транспорта",
+        (),
+    ),
+    (
+        "Расписания/Расписание сессии/Бакалавриат/Факультет технологии пищевых производств/Очная/"
+        "ФАСТИВ 3 курс (осень 2020).xls",
+        "ФАСТИВ 3 курс (осень 2020)",
+        "РЭ/Б/ФТПП/О/Н",
+        "Бакалавриат",
+        "Очная",
+        "Факультет технологии пищевых производств",
+        (),
+    ),
+    (
+        "Расписания/Расписание экзаменов/Специалитет/Химико-технологический факультет/Заочная форма обучения/"
+        "ФТКМ курс 3 (осень 2025).pdf",
+        "ФТКМ курс 3 (осень 2025)",
+        "РЭ/С/ХФ/ЗФО/К3",
+        "Специалитет",
+        "Заочная форма обучения",
+        "Химико-технологический факультет",
+        (3,),
+    ),
+    (
+        "Расписания/Расписание сессии/Бакалавриат/Факультет электроники и вычислительной техники/"
+        "Заочная форма обучения/"
+        "ФТПП 1-2 курс (весна 2022).xls",
+        "ФТПП 1-2 курс (весна 2022)",
+        "РЭ/Б/ФЭВТ/ЗФО/Н",
+        "Бакалавриат",
+        "Заочная форма обучения",
+        "Факультет электроники и вычислительной техники",
+        (),
+    ),
+    (
+        "Расписания/Расписание занятий/Специалитет/Инженерный факультет/Очная форма обучения/"
+        "ФТПП 5 курс (весна 2019).pdf",
+        "ФТПП 5 курс (весна 2019)",
+        "РЗ/С/ИФ/ОФО/Н",
+        "Специалитет",
+        "Очная форма обучения",
+        "Инженерный факультет",
+        (),
+    ),
+    (
+        "Расписания/Расписание занятий/Бакалавриат, специалитет/Инженерный факультет/Очная форма обучения/"
+        "ФПИК 4 курс (осень 2023).xls",
+        "ФПИК 4 курс (осень 2023)",
+        "РЗ/БС/ИФ/ОФО/Н",
+        "Бакалавриат, специалитет",
+        "Очная форма обучения",
+        "Инженерный факультет",
+        (),
+    ),
+    (
+        "Расписания/Расписание экзаменов/Магистратура/Факультет автомобильного транспорта/Очная/"
+        "ХТФ 1 курс (осень 2023).pdf",
+        "ХТФ 1 курс (осень 2023)",
+        "РЭ/М/ФАТ/О/Н",
+        "Магистратура",
+        "Очная",
+        "Факультет автомобильного транспорта",
+        (),
+    ),
+    (
+        "Расписания/Расписание занятий/Аспирантура/Факультет автомобильного транспорта/Заочная форма обучения/"
+        "ФПИК 1-2 курс (осень 2020).pdf",
+        "ФПИК 1-2 курс (осень 2020)",
+        "РЗ/А/ФАТ/ЗФО/Н",
+        "Аспирантура",
+        "Заочная форма обучения",
+        "Факультет автомобильного транспорта",
+        (),
+    ),
+    (
+        "Расписания/Расписание сессии/Аспирантура/Вечерний факультет/Заочная форма обучения/"
+        "Копия АТФ курс 3 (осень 2019) - .xls",
+        "АТФ курс 3 (осень 2019)",
+        "РЭ/А/ВФ/ЗФО/К3",
+        "Аспирантура",
+        "Заочная форма обучения",
+        "Вечерний факультет",
+        (3,),
+    ),
+    (
+        "Расписания/Расписание экзаменов/Аспирантура/Вечерний факультет/Заочная форма обучения/"
+        "ФАСТИВ 1 курс (осень 2026) - .xls",
+        "ФАСТИВ 1 курс (осень 2026)",
+        "РЭ/А/ВФ/ЗФО/Н",
+        "Аспирантура",
+        "Заочная форма обучения",
+        "Вечерний факультет",
+        (),
+    ),
+    (
+        "Расписания/Расписание экзаменов/Аспирантура/Факультет автомобильного транспорта/Очная форма обучения/"
+        "ХТФ курс 3 (весна 2024).xlsx",
+        "ХТФ курс 3 (весна 2024)",
+        "РЭ/А/ФАТ/ОФО/К3",
+        "Аспирантура",
+        "Очная форма обучения",
+        "Факультет автомобильного транспорта",
+        (3,),
+    ),
+    (
+        "Расписания/Расписание экзаменов/Магистратура/Очная форма обучения/"
+        "ФПИК 4 курс (весна 2023).xls",
+        "ФПИК 4 курс (весна 2023)",
+        "РЭ/М/ОФО/Н",
+        "Магистратура",
+        "Очная форма обучения",
+        "",
+        (),
+    ),
+    (
+        "Расписания/Расписание экзаменов/Магистратура/Факультет экономики и управления/Заочная форма обучения/"
+        "Копия ФЭУ 1,2 курс (осень 2024).xls",
+        "ФЭУ 1,2 курс (осень 2024)",
+        "РЭ/М/ФЭУ/ЗФО/Н",
+        "Магистратура",
+        "Заочная форма обучения",
+        "Факультет экономики и управления",
+        (),
+    ),
+    (
+        "Расписания/Расписание занятий/Аспирантура/Иностранный факультет/"
+        "Автосохраненный ФПИК курс 3 - .xlsx",
+        "ФПИК курс 3",
+        "РЗ/А/ИФ/К3",
+        "Аспирантура",
+        "",
+        "Иностранный факультет",
+        (3,),
+    ),
+    (
+        "Расписания/Расписание занятий/"
+        "Расписание без курса.pdf",
+        "Расписание без курса",
+        "РЗ/Н",
+        "",
+        "",
+        "",
+        (),
+    ),
+    (
+        "Расписания/Расписание%20занятий/Бакалавриат/Вечерний%20факультет/"
+        "ВФ%202%20год.xlsx",
+        "ВФ 2 год",
+        "РЗ/Б/Н",
+        "Бакалавриат",
+        "",
+        "",
+        (),
+    ),
+]
+
+
+@pytest.mark.parametrize("expected", EXPECTED, ids=lambda expected: expected[1])
+def test_file_data_matches_previous_classification(expected):
+    path, correct_name, correct_path, degree, education_form, faculty, course = expected
+
+    file_data = FileData(path, "https://www.vstu.ru/upload/" + path.rsplit("/", 1)[-1], "2025-01-01 00:00:00")
+
+    assert file_data.get_name() == correct_name
+    assert file_data.get_correct_path() == correct_path
+    assert FileData._get_degree(path) == degree
+    assert FileData._get_education_form(path) == education_form
+    assert FileData._get_faculty(path) == faculty
+    assert FileData._get_course_list(FileData.get_file_name_from_path(path)) == list(course)
+
+
+def test_classifier_matches_previous_classification():
+    classifier = FileClassifier()
+    paths = [expected[0] for expected in EXPECTED]
+
+    # Повторные пути берутся из кэша сегментов и должны давать тот же результат
+    classifications = classifier.classify_many(paths + paths[::-1])
+
+    for classification, expected in zip(classifications, EXPECTED + EXPECTED[::-1]):
+        path, correct_name, _, degree, education_form, faculty, course = expected
+        assert classification.correct_name == correct_name, path
+        assert classification.degree == degree, path
+        assert classification.education_form == education_form, path
+        assert classification.faculty == faculty, path
+        assert classification.course == course, path
+
+
+def test_classifier_is_recreated_when_vocabulary_changes(monkeypatch):
+    path = "Расписания/Расписание занятий/Ординатура/ФЭУ 1 курс.xlsx"
+    classifier = FileData.get_classifier()
+    assert FileData.get_classifier() is classifier
+    assert FileData._get_degree(path) == ""
+
+    monkeypatch.setattr(FileData, "_DEGREE_WORDS", [*FileData._DEGREE_WORDS, "ординатура"])
+    changed = FileData.get_classifier()
+
+    # Результат, закэшированный прежним классификатором, не используется
+    assert changed is not classifier
+    assert FileData.get_classifier() is changed
+    assert FileData._get_degree(path) == "Ординатура"
+
+    monkeypatch.undo()
+    assert FileData.get_classifier() is not changed
+    assert FileData._get_degree(path) == ""
+
+
+def test_file_data_classifies_lazily_once(monkeypatch):
+    calls = []
+    classify = FileClassifier.classify
+
+    def counting_classify(self, path):
+        calls.append(path)
+        return classify(self, path)
+
+    monkeypatch.setattr(FileClassifier, "classify", counting_classify)
+    path, correct_name, correct_path, *_ = EXPECTED[0]
+
+    file_data = FileData(path, "https://www.vstu.ru/upload/file.xls", "2025-01-01 00:00:00")
+    assert file_data.get_path() == path
+    assert file_data.get_url() == "https://www.vstu.ru/upload/file.xls"
+    assert calls == []
+
+    assert file_data.get_name() == correct_name
+    assert file_data.get_correct_path() == correct_path
+    assert file_data.get_name() == correct_name
+    file_data.get_resource("Занятия")
+    assert calls == [path]
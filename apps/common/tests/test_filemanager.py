@@ -0,0 +1,296 @@
+import hashlib
+from datetime import datetime, timezone
+
+import pytest
+import requests
+from django.utils import timezone as django_timezone
+from openpyxl import Workbook
+
+from apps.common.models import FileVersion, HttpValidator, Resource, Setting
+from apps.common.services.timetable_update.version_core.file_data import DownloadResult, FileData
+from apps.common.services.timetable_update.version_core.filemanager import FileManager, _UpdateContext, _UpdateItem
+from apps.common.services.timetable_update.version_core.hashing import (
+    EXCEL_HASH_PREFIX,
+    get_bin_file_hash,
+    get_excel_file_hash,
+    get_legacy_excel_file_hash,
+)
+from apps.common.services.timetable_update.version_core.resource_index import ResourceIndex
+from apps.common.services.timetable_update.version_core.shared_downloads import SharedDownloads
+from apps.common.services.timetable_update.version_core.validator_store import ValidatorStore
+
+PATH = "Расписания/Расписание занятий/Бакалавриат/Факультет экономики и управления/Очная форма обучения/ФЭУ 1 курс.pdf"
+URL = "https://www.vstu.ru/upload/raspisanie/FEU_1_kurs.pdf"
+ETAG = '"v1"'
+
+
+class FakeClient:
+    """HTTP-клиент с интерфейсом HttpClient, отвечающий заданным кодом и запоминающий заголовки запросов"""
+
+    def __init__(self, status_code: int = 200, content: bytes = b"", headers: dict[str, str] | None = None) -> None:
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.requests: list[dict[str, str]] = []
+
+    def get(self, url: str, headers: dict[str, str] | None = None, stream: bool = False) -> requests.Response:
+        self.requests.append(headers or {})
+        response = requests.Response()
+        response.status_code = self.status_code
+        response.url = url
+        response.headers.update(self.headers)
+        response._content = self.content
+        response._content_consumed = True
+        return response
+
+
+class StreamingRaw:
+    """Поток тела ответа, отдающий данные блоками и, при необходимости, обрывающийся после заданного блока"""
+
+    def __init__(self, chunks: list[bytes], fail_after: int | None = None) -> None:
+        self.chunks = list(chunks)
+        self.fail_after = fail_after
+        self.reads = 0
+        self.closed = False
+
+    def read(self, size: int = -1, decode_content: bool = True) -> bytes:
+        if self.fail_after is not None and self.reads >= self.fail_after:
+            raise ConnectionResetError("connection reset by peer")
+        self.reads += 1
+        return self.chunks.pop(0) if self.chunks else b""
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class StreamingClient:
+    """HTTP-клиент с интерфейсом HttpClient, отдающий тело ответа потоком StreamingRaw"""
+
+    def __init__(self, raw: StreamingRaw) -> None:
+        self.raw = raw
+
+    def get(self, url: str, headers: dict[str, str] | None = None, stream: bool = False) -> requests.Response:
+        assert stream
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.raw = self.raw
+        return response
+
+
+@pytest.fixture
+def file_manager(settings, tmp_path, monkeypatch) -> FileManager:
+    settings.TEMP_DIR = tmp_path / "temp"
+    settings.DATA_STORAGE_DIR = tmp_path / "data"
+    monkeypatch.setenv("TMPDIR", str(tmp_path))
+    return FileManager()
+
+
+def _file_data() -> FileData:
+    return FileData(PATH, URL, "2025-01-01 00:00:00")
+
+
+def _make_workbook(path, rows: list[list]) -> DownloadResult:
+    wb = Workbook()
+    for row in rows:
+        wb.active.append(row)
+    wb.save(path)
+    return DownloadResult(path, get_bin_file_hash(path))
+
+
+def _create_version(file_data: FileData, hashsum: str, last_changed: datetime | None = None) -> FileVersion:
+    resource = Resource.objects.create(name=file_data.get_name(), path=file_data.get_correct_path())
+    return FileVersion.objects.create(
+        resource=resource,
+        hashsum=hashsum,
+        mimetype=".pdf",
+        url=URL,
+        last_changed=last_changed or datetime(2025, 1, 1, tzinfo=timezone.utc),
+    )
+
+
+def _update_context(client: FakeClient, resources: ResourceIndex, full_check: bool) -> _UpdateContext:
+    downloads = SharedDownloads()
+    downloads.acquire(URL)
+    return _UpdateContext(client, ValidatorStore(), downloads, resources, full_check)
+
+
+def test_download_sends_conditional_headers_and_returns_none_on_304(tmp_path):
+    validators = ValidatorStore({URL: HttpValidator(url=URL, etag=ETAG, last_modified="Wed, 01 Jan 2025 00:00:00 GMT")})
+    client = FakeClient(304)
+
+    result = _file_data().download_file(tmp_path, validators=validators, client=client)
+
+    assert result is None
+    assert client.requests == [{"If-None-Match": ETAG, "If-Modified-Since": "Wed, 01 Jan 2025 00:00:00 GMT"}]
+    assert not list(tmp_path.iterdir())
+
+
+def test_download_digest_matches_bytes_on_disk(tmp_path):
+    chunks = [bytes(range(256)) * 4, b"%PDF-1.7\n", b"x" * 1000]
+    raw = StreamingRaw(chunks)
+
+    result = _file_data().download_file(tmp_path, chunk_size=512, client=StreamingClient(raw))
+
+    content = result.path.read_bytes()
+    assert content == b"".join(chunks)
+    assert result.raw_digest == hashlib.sha256(content).hexdigest()
+    assert result.path.parent == tmp_path
+
+
+def test_interrupted_download_removes_partial_file(tmp_path):
+    raw = StreamingRaw([b"a" * 512, b"b" * 512, b"c" * 512], fail_after=2)
+
+    with pytest.raises(ConnectionResetError):
+        _file_data().download_file(tmp_path, chunk_size=512, client=StreamingClient(raw))
+
+    assert raw.reads == 2
+    assert not list(tmp_path.iterdir())
+    assert raw.closed
+
+
+def test_304_without_conditional_request_is_an_error(tmp_path):
+    with pytest.raises(Exception, match="Status: 304"):
+        _file_data().download_file(tmp_path, validators=ValidatorStore(), client=FakeClient(304))
+
+
+@pytest.mark.django_db
+def test_process_file_keeps_resource_unchanged_on_304(file_manager):
+    file_data = _file_data()
+    version = _create_version(file_data, "stored")
+    resources = ResourceIndex.load()
+
+    resource, new_version = file_manager._process_file(file_data, None, "Занятия", resources)
+
+    assert resource.id == version.resource_id
+    assert new_version is None
+    assert resources.flush() == []
+    assert list(FileVersion.objects.values_list("hashsum", flat=True)) == ["stored"]
+    assert Resource.objects.get().latest_version_id == version.id
+
+
+@pytest.mark.django_db
+def test_process_file_rejects_304_without_stored_version(file_manager):
+    with pytest.raises(FileNotFoundError):
+        file_manager._process_file(_file_data(), None, "Занятия", ResourceIndex.load())
+
+
+@pytest.mark.django_db
+def test_validators_are_saved_only_after_confirmation(tmp_path):
+    validators = ValidatorStore()
+    client = FakeClient(200, b"%PDF", {"ETag": ETAG})
+    confirmed, discarded = _file_data(), FileData(PATH, URL + "?other", "2025-01-01 00:00:00")
+
+    for file_data in (confirmed, discarded):
+        assert file_data.download_file(tmp_path, validators=validators, client=client) is not None
+    validators.confirm(confirmed.get_url())
+    validators.discard(discarded.get_url())
+    validators.save()
+
+    assert list(HttpValidator.objects.values_list("url", "etag")) == [(URL, ETAG)]
+    assert ValidatorStore.load().get_conditional_headers(URL) == {"If-None-Match": ETAG}
+
+
+@pytest.mark.django_db
+def test_legacy_excel_hash_is_upgraded_for_unchanged_file(file_manager, tmp_path):
+    file_data = FileData(PATH.replace(".pdf", ".xlsx"), URL.replace(".pdf", ".xlsx"), "2025-01-01 00:00:00")
+    download = _make_workbook(tmp_path / "download.xlsx", [["Группа", "Пара"], ["ФЭУ-101", 1]])
+    legacy_hash = get_legacy_excel_file_hash(download.path)
+    version = _create_version(file_data, legacy_hash)
+    resources = ResourceIndex.load()
+
+    resource, new_version = file_manager._process_file(file_data, download, "Занятия", resources)
+
+    new_hash = get_excel_file_hash(download.path)
+    assert new_hash.startswith(EXCEL_HASH_PREFIX)
+    assert new_version is None
+    assert resources.get_latest_version(resource).hashsum == new_hash
+    assert list(FileVersion.objects.values_list("id", "hashsum")) == [(version.id, new_hash)]
+
+    # Следующее обновление сравнивает уже новый хэш и прежний способ не использует
+    assert file_manager._process_file(file_data, download, "Занятия", ResourceIndex.load())[1] is None
+
+
+@pytest.mark.django_db
+def test_legacy_excel_hash_of_changed_file_is_kept(file_manager, tmp_path):
+    file_data = FileData(PATH.replace(".pdf", ".xlsx"), URL.replace(".pdf", ".xlsx"), "2025-01-01 00:00:00")
+    old = _make_workbook(tmp_path / "old.xlsx", [["Группа", "Пара"], ["ФЭУ-101", 1]])
+    legacy_hash = get_legacy_excel_file_hash(old.path)
+    version = _create_version(file_data, legacy_hash)
+    download = _make_workbook(tmp_path / "download.xlsx", [["Группа", "Пара"], ["ФЭУ-101", 2]])
+    resources = ResourceIndex.load()
+
+    resource, new_version = file_manager._process_file(file_data, download, "Занятия", resources)
+    resources.flush()
+
+    assert new_version.hashsum == get_excel_file_hash(download.path)
+    assert FileVersion.objects.get(id=version.id).hashsum == legacy_hash
+    assert Resource.objects.get(id=resource.id).latest_version.hashsum == new_version.hashsum
+
+
+@pytest.mark.django_db
+def test_unchanged_site_timestamp_skips_download(file_manager):
+    file_data = _file_data()
+    version = _create_version(file_data, "stored", file_data.get_last_changed_datetime())
+    client = FakeClient(200, b"%PDF")
+    context = _update_context(client, ResourceIndex.load(), full_check=False)
+
+    assert FileManager._get_unchanged_resource(file_data, context.resources).id == version.resource_id
+    item = file_manager._download_item(_UpdateItem(file_data, "Занятия"), context)
+
+    assert item.unchanged.id == version.resource_id
+    assert item.download is None
+    assert client.requests == []
+
+
+@pytest.mark.django_db
+def test_changed_site_timestamp_or_full_check_downloads_file(file_manager):
+    file_data = _file_data()
+    _create_version(file_data, "stored", datetime(2024, 12, 31, tzinfo=timezone.utc))
+    resources = ResourceIndex.load()
+    assert FileManager._get_unchanged_resource(file_data, resources) is None
+
+    FileVersion.objects.update(last_changed=file_data.get_last_changed_datetime())
+    client = FakeClient(200, b"%PDF")
+    context = _update_context(client, ResourceIndex.load(), full_check=True)
+    item = file_manager._download_item(_UpdateItem(file_data, "Занятия"), context)
+
+    assert item.unchanged is None
+    assert item.download.path.read_bytes() == b"%PDF"
+    assert len(client.requests) == 1
+
+
+@pytest.mark.django_db
+def test_unknown_site_timestamp_is_never_skipped(file_manager, tmp_path):
+    file_data = FileData(PATH, URL, "Неизвестно")
+    assert file_data.get_last_changed_datetime() is None
+
+    # Дата версии файла с неизвестной датой обновления - время скачивания
+    download = file_data.download_file(tmp_path, validators=ValidatorStore(), client=FakeClient(200, b"%PDF"))
+    before = django_timezone.now()
+    version = file_data.get_file_version(download.path, download.raw_digest)
+    assert before <= version.last_changed <= django_timezone.now()
+
+    _create_version(file_data, "stored", version.last_changed)
+    assert FileManager._get_unchanged_resource(file_data, ResourceIndex.load()) is None
+
+
+@pytest.mark.django_db
+def test_full_check_every_n_runs(file_manager, settings):
+    settings.TIMETABLE_FULL_CHECK_EVERY = 3
+
+    assert [file_manager._start_run() for _ in range(6)] == [False, False, True, False, False, True]
+    assert Setting.objects.get(key=FileManager.RUN_NUMBER_SETTING_KEY).value == "6"
+
+    settings.TIMETABLE_FULL_CHECK_EVERY = 1
+    assert file_manager._start_run()
+
+
+@pytest.mark.django_db
+def test_invalid_run_number_restarts_counter(file_manager, settings):
+    settings.TIMETABLE_FULL_CHECK_EVERY = 2
+    Setting.objects.create(key=FileManager.RUN_NUMBER_SETTING_KEY, value="не число")
+
+    assert not file_manager._start_run()
+    assert file_manager._start_run()
+    assert Setting.objects.get(key=FileManager.RUN_NUMBER_SETTING_KEY).value == "2"
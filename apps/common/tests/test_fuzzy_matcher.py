@@ -0,0 +1,43 @@
+import difflib
+
+import pytest
+
+from apps.common.benchmarks.string_matching import SEGMENT_WORDS, VOCABULARIES
+from apps.common.services.timetable_update.version_core.fuzzy_matcher import FuzzyMatcher
+
+# Слова сегментов путей и строки, на которых легко ошибиться: пустая строка, повторы символов, равные коэффициенты
+QUERIES = sorted({word.lower() for word in SEGMENT_WORDS}) + ["", "а", "аааа", "очно", "заочно-очная", "степень"]
+
+
+def _difflib_match(vocabulary: list[str], string: str, quick: bool, min_ratio: float) -> tuple[str, float] | None:
+    """Прежний перебор всех пар через difflib.SequenceMatcher: при равных коэффициентах выигрывает первая строка."""
+    best = None
+    for candidate in vocabulary:
+        matcher = difflib.SequenceMatcher(None, string, candidate)
+        ratio = matcher.quick_ratio() if quick else matcher.ratio()
+        if ratio >= min_ratio and (best is None or ratio > best[1]):
+            best = (candidate, ratio)
+    return best
+
+
+@pytest.mark.parametrize("quick", [True, False])
+@pytest.mark.parametrize("min_ratio", [0.0, 0.5, 0.8])
+@pytest.mark.parametrize("vocabulary", VOCABULARIES, ids=["degrees", "forms", "faculties"])
+def test_match_is_identical_to_difflib(vocabulary, quick, min_ratio):
+    matcher = FuzzyMatcher(vocabulary, quick)
+
+    for query in QUERIES:
+        assert matcher.match(query, min_ratio) == _difflib_match(vocabulary, query, quick, min_ratio), query
+
+
+def test_equal_ratios_prefer_earlier_vocabulary_string():
+    matcher = FuzzyMatcher(["ab", "ba", "abc"])
+
+    assert matcher.match("ab") == ("ab", 1.0)
+    assert matcher.match("ba") == ("ab", 1.0)
+    assert FuzzyMatcher(["ba", "ab"], quick=False).match("ab") == ("ab", 1.0)
+
+
+def test_empty_vocabulary_and_unreachable_threshold():
+    assert FuzzyMatcher([]).match("очная") is None
+    assert FuzzyMatcher(["очная"]).match("xyz", min_ratio=0.1) is None
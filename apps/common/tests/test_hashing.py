@@ -0,0 +1,49 @@
+import re
+import zipfile
+from pathlib import Path
+
+from openpyxl import Workbook
+
+from apps.common.services.timetable_update.version_core.hashing import (
+    get_excel_file_hash,
+    get_legacy_excel_file_hash,
+)
+
+
+def _make_workbook(path: Path, c3: int, dimension: str | None = None) -> Path:
+    """Создаёт книгу 3x3 и при необходимости записывает в лист тег <dimension> с неверными размерами."""
+    wb = Workbook()
+    for row in range(1, 4):
+        wb.active.append([row * 10 + col for col in range(1, 4)])
+    wb.active["C3"] = c3
+    wb.save(path)
+    if dimension is not None:
+        _set_dimension(path, dimension)
+    return path
+
+
+def _set_dimension(path: Path, dimension: str) -> None:
+    with zipfile.ZipFile(path) as zf:
+        members = {info: zf.read(info) for info in zf.infolist()}
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for info, data in members.items():
+            if info.filename == "xl/worksheets/sheet1.xml":
+                data, count = re.subn(rb'<dimension ref="[^"]*"\s*/>', f'<dimension ref="{dimension}"/>'.encode(), data)
+                assert count == 1
+            zf.writestr(info, data)
+
+
+def test_stale_dimension_tag_does_not_hide_changed_cells(tmp_path):
+    before = _make_workbook(tmp_path / "before.xlsx", 33, dimension="A1")
+    after = _make_workbook(tmp_path / "after.xlsx", 99, dimension="A1")
+
+    assert get_legacy_excel_file_hash(before) != get_legacy_excel_file_hash(after)
+    assert get_excel_file_hash(before) != get_excel_file_hash(after)
+
+
+def test_hash_does_not_depend_on_dimension_tag(tmp_path):
+    correct = _make_workbook(tmp_path / "correct.xlsx", 33)
+    stale = _make_workbook(tmp_path / "stale.xlsx", 33, dimension="A1")
+    too_large = _make_workbook(tmp_path / "too_large.xlsx", 33, dimension="A1:Z100")
+
+    assert get_excel_file_hash(correct) == get_excel_file_hash(stale) == get_excel_file_hash(too_large)
@@ -0,0 +1,27 @@
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+
+from apps.common.services.timetable_update.version_core.html_backend import HtmlParserBackend
+
+PAGE = '<html><body><nav>menu</nav><div class="content-wrapper"><a href="/a.xlsx">A</a></div></body></html>'
+
+
+@pytest.mark.parametrize("only_content", [False, True])
+def test_find_content(only_content):
+    backend = HtmlParserBackend(only_content=only_content)
+
+    content = backend.find_content(PAGE)
+
+    assert [a["href"] for a in content.find_all("a")] == ["/a.xlsx"]
+
+
+def test_missing_parser_is_a_configuration_error():
+    with pytest.raises(ImproperlyConfigured, match="TIMETABLE_HTML_PARSER"):
+        HtmlParserBackend("not-installed-parser")
+
+
+def test_from_settings_does_not_fall_back_silently(settings):
+    settings.TIMETABLE_HTML_PARSER = "not-installed-parser"
+
+    with pytest.raises(ImproperlyConfigured):
+        HtmlParserBackend.from_settings()
@@ -0,0 +1,106 @@
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from apps.common.services.timetable_update.version_core.http_client import HttpClient
+
+
+class _Server(ThreadingHTTPServer):
+    """Локальный HTTP-сервер, отвечающий по сценарию теста и считающий запросы и соединения"""
+
+    daemon_threads = True
+
+    def __init__(self, failures: int = 0, delay: float = 0) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.failures = failures  # Количество первых запросов, на которые сервер отвечает 503
+        self.delay = delay  # Время обработки запроса, секунды
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+        self.clients: set[tuple[str, int]] = set()
+        self.lock = threading.Lock()
+
+    def get_url(self, path: str = "/") -> str:
+        return f"http://127.0.0.1:{self.server_port}{path}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self) -> None:
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            failed = server.requests <= server.failures
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            server.clients.add(self.client_address)
+        try:
+            time.sleep(server.delay)
+            body = b"unavailable" if failed else b"ok"
+            self.send_response(503 if failed else 200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+def _start(server: _Server) -> Iterator[_Server]:
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture
+def flaky_server() -> Iterator[_Server]:
+    yield from _start(_Server(failures=2))
+
+
+@pytest.fixture
+def slow_server() -> Iterator[_Server]:
+    yield from _start(_Server(delay=0.05))
+
+
+def test_5xx_is_retried(flaky_server):
+    with HttpClient(retries=3, backoff_factor=0) as client:
+        response = client.get(flaky_server.get_url())
+
+        assert response.status_code == 200
+        assert response.content == b"ok"
+        assert flaky_server.requests == 3
+        assert client.get_stats()["retries"] == 2
+
+
+def test_5xx_is_returned_after_retries_are_exhausted(flaky_server):
+    with HttpClient(retries=1, backoff_factor=0) as client:
+        response = client.get(flaky_server.get_url())
+
+        assert response.status_code == 503
+        assert flaky_server.requests == 2
+
+
+def test_connections_per_host_are_limited_and_reused(slow_server):
+    pool_size = 2
+    with HttpClient(pool_size=pool_size) as client:
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            responses = list(executor.map(lambda i: client.get(slow_server.get_url(f"/{i}")), range(12)))
+
+        assert [response.status_code for response in responses] == [200] * 12
+        assert slow_server.max_active <= pool_size
+        assert len(slow_server.clients) <= pool_size
+        stats = client.get_stats()
+        assert stats["requests"] == 12
+        assert stats["connections"] == len(slow_server.clients)
+        assert stats["reused_connections"] == 12 - stats["connections"]
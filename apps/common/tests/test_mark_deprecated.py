@@ -0,0 +1,69 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.common.models import Resource
+from apps.common.services.timetable_update.version_core.filemanager import FileManager
+
+
+def _create_resources(*deprecated_flags: bool) -> list[Resource]:
+    return [
+        Resource.objects.create(name=f"resource {i}", path=f"path/{i}", deprecated=deprecated)
+        for i, deprecated in enumerate(deprecated_flags)
+    ]
+
+
+@pytest.mark.django_db
+def test_mark_deprecated_returns_revived_and_deprecated_counts():
+    used_active, used_deprecated, unused_active, unused_deprecated = _create_resources(False, True, False, True)
+
+    revived, deprecated = FileManager._mark_deprecated({used_active.id, used_deprecated.id})
+
+    assert (revived, deprecated) == (1, 1)
+    flags = dict(Resource.objects.values_list("id", "deprecated"))
+    assert flags == {
+        used_active.id: False,
+        used_deprecated.id: False,
+        unused_active.id: True,
+        unused_deprecated.id: True,
+    }
+
+
+@pytest.mark.django_db
+def test_mark_deprecated_with_no_used_resources_deprecates_all():
+    _create_resources(False, False, True)
+
+    assert FileManager._mark_deprecated(set()) == (0, 2)
+    assert not Resource.objects.filter(deprecated=False).exists()
+
+
+@pytest.mark.django_db
+def test_mark_deprecated_query_count_does_not_depend_on_used_ids():
+    resources = _create_resources(*[False] * 50)
+    used_ids = {resource.id for resource in resources[:40]}
+
+    with CaptureQueriesContext(connection) as few:
+        FileManager._mark_deprecated(used_ids)
+    with CaptureQueriesContext(connection) as many:
+        FileManager._mark_deprecated(used_ids | set(range(10_000, 20_000)))
+
+    assert len(few) == len(many)
+    assert sum(query["sql"].startswith("UPDATE") for query in many.captured_queries) == 2
+
+
+@pytest.mark.django_db
+def test_mark_deprecated_does_not_touch_last_update():
+    (resource,) = _create_resources(False)
+    last_update = Resource.objects.get(id=resource.id).last_update
+
+    FileManager._mark_deprecated(set())
+
+    assert Resource.objects.get(id=resource.id).last_update == last_update
+
+
+@pytest.mark.django_db
+def test_mark_deprecated_can_run_twice_on_one_connection():
+    (resource,) = _create_resources(True)
+
+    assert FileManager._mark_deprecated({resource.id}) == (1, 0)
+    assert FileManager._mark_deprecated({resource.id}) == (0, 0)
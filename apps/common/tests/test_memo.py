@@ -0,0 +1,67 @@
+import logging
+
+from apps.common.services.timetable_update.version_core.memo import LruMemo
+
+
+class Compute:
+    """Функция вычисления, считающая вызовы для каждого ключа"""
+
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+
+    def __call__(self, key: str):
+        return lambda: self.calls.append(key) or key.upper()
+
+
+def test_least_recently_used_entry_is_evicted():
+    memo = LruMemo("test", maxsize=2)
+    compute = Compute()
+
+    memo.get("a", compute("a"))
+    memo.get("b", compute("b"))
+    # Обращение к "a" делает вытесняемой записью "b"
+    assert memo.get("a", compute("a")) == "A"
+    memo.get("c", compute("c"))
+
+    assert memo.get("a", compute("a")) == "A"
+    assert memo.get("b", compute("b")) == "B"
+    assert compute.calls == ["a", "b", "c", "b"]
+    assert memo.get_stats()["size"] == 2
+
+
+def test_stats_count_hits_and_misses():
+    memo = LruMemo("test")
+    compute = Compute()
+    assert memo.get_stats() == {"hits": 0, "misses": 0, "size": 0, "hit_rate": 0.0}
+
+    for key in ["a", "b", "a", "a"]:
+        memo.get(key, compute(key))
+
+    assert memo.get_stats() == {"hits": 2, "misses": 2, "size": 2, "hit_rate": 0.5}
+
+    memo.reset_stats()
+    memo.get("b", compute("b"))
+    assert memo.get_stats() == {"hits": 1, "misses": 0, "size": 2, "hit_rate": 1.0}
+
+
+def test_changed_signature_clears_entries():
+    memo = LruMemo("test")
+    compute = Compute()
+
+    memo.get("a", compute("a"), signature=("words", 1))
+    memo.get("a", compute("a"), signature=("words", 1))
+    memo.get("a", compute("a"), signature=("words", 2))
+
+    assert compute.calls == ["a", "a"]
+    assert memo.get_stats()["size"] == 1
+
+
+def test_log_stats(caplog):
+    memo = LruMemo("segments")
+    for key in ["a", "a", "a", "b"]:
+        memo.get(key, lambda: key)
+
+    with caplog.at_level(logging.INFO, logger="apps.common.services.timetable_update.version_core.memo"):
+        memo.log_stats()
+
+    assert caplog.messages == ["Cache segments: 2 hits, 2 misses (50.0% hit rate), 2 entries"]
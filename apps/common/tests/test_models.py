@@ -0,0 +1,51 @@
+import importlib
+
+import pytest
+from django.apps import apps
+
+from apps.common.models import FileVersion, Resource
+
+fill_latest_version = importlib.import_module(
+    "apps.common.migrations.0004_file_version_indexes_latest_version"
+).fill_latest_version
+
+
+def _get_latest_version_id(resource: Resource) -> int | None:
+    return Resource.objects.values_list("latest_version_id", flat=True).get(id=resource.id)
+
+
+@pytest.mark.django_db
+def test_new_version_becomes_latest_version():
+    resource = Resource.objects.create(name="resource", path="a/b")
+    first = FileVersion.objects.create(resource=resource, hashsum="first")
+    assert _get_latest_version_id(resource) == first.id
+
+    second = FileVersion.objects.create(resource=resource, hashsum="second")
+    assert _get_latest_version_id(resource) == second.id
+
+    # Изменение старой версии не делает её последней
+    first.url = "https://www.vstu.ru/upload/a.xlsx"
+    first.save()
+    assert _get_latest_version_id(resource) == second.id
+
+
+@pytest.mark.django_db
+def test_deleting_latest_version_clears_pointer():
+    resource = Resource.objects.create(name="resource", path="a/b")
+    FileVersion.objects.create(resource=resource, hashsum="first").delete()
+
+    assert _get_latest_version_id(resource) is None
+    assert Resource.objects.filter(id=resource.id).exists()
+
+
+@pytest.mark.django_db
+def test_migration_fills_latest_version_from_history():
+    with_versions = Resource.objects.create(name="with versions", path="a/b")
+    versions = [FileVersion.objects.create(resource=with_versions, hashsum=f"v{i}") for i in range(3)]
+    without_versions = Resource.objects.create(name="without versions", path="a/c")
+    Resource.objects.update(latest_version=None)
+
+    fill_latest_version(apps, None)
+
+    assert _get_latest_version_id(with_versions) == versions[-1].id
+    assert _get_latest_version_id(without_versions) is None
@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from apps.common.services.timetable_update.version_core.parser import WebParser
+
+ROOT_URL = "https://www.vstu.ru/student/raspisaniya/zanyatiy/"
+
+
+def _page(body: str) -> str:
+    return f'<html><body><div class="content-wrapper">{body}</div></body></html>'
+
+
+def _files(prefix: str) -> str:
+    return "".join(f'<li><a href="/upload/{prefix}_{i}.xlsx">{prefix} {i} курс</a></li>' for i in range(1, 3))
+
+
+PAGES = {
+    ROOT_URL: _page(
+        "<h3>Бакалавриат</h3><ul>"
+        '<li><a href="fat/">Факультет автоматизированных систем</a></li>'
+        '<li><a href="/upload/root.xlsx">Общее расписание</a></li>'
+        '<li><a href="feu/">Факультет экономики и управления</a></li>'
+        '<li><a href="htf/">Химико-технологический факультет</a></li>'
+        "</ul>"
+    ),
+    ROOT_URL + "fat/": _page(f'<h4>Очная форма</h4><ul>{_files("FAT")}<li><a href="mag/">Магистратура</a></li></ul>'),
+    ROOT_URL + "fat/mag/": _page(f"<h4>Магистратура</h4><ul>{_files('FAT_MAG')}</ul>"),
+    ROOT_URL + "feu/": _page(f"<h4>Очная форма</h4><ul>{_files('FEU')}</ul>"),
+    ROOT_URL + "htf/": _page(f"<h4>Заочная форма</h4><ul>{_files('HTF')}</ul>"),
+}
+
+# Задержки ответа: страницы, стоящие раньше в обходе, загружаются дольше
+DELAYS = {ROOT_URL + "fat/": 0.15, ROOT_URL + "fat/mag/": 0.1, ROOT_URL + "feu/": 0.05}
+
+
+class DelayedClient:
+    """HTTP-клиент с интерфейсом HttpClient, отдающий страницы из словаря с задержкой и запоминающий порядок ответов"""
+
+    def __init__(self, pages: dict[str, str], delays: dict[str, float]) -> None:
+        self.pages = pages
+        self.delays = delays
+        self.finished: list[str] = []
+        self.__lock = threading.Lock()
+
+    def get(self, url: str, headers: dict[str, str] | None = None, stream: bool = False) -> requests.Response:
+        time.sleep(self.delays.get(url, 0))
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = self.pages[url].encode("utf-8")
+        with self.__lock:
+            self.finished.append(url)
+        return response
+
+
+def _crawl(max_workers: int, client: DelayedClient) -> list[tuple[str, str, str]]:
+    files = WebParser.iter_files_from_webpage(ROOT_URL, "Расписания/", max_workers=max_workers, client=client)
+    return [(file.get_path(), file.get_name(), file.get_url()) for file in files]
+
+
+@pytest.mark.parametrize("max_workers", [2, 4])
+def test_concurrent_crawl_keeps_sequential_order(max_workers):
+    sequential = _crawl(1, DelayedClient(PAGES, {}))
+    client = DelayedClient(PAGES, DELAYS)
+
+    concurrent = _crawl(max_workers, client)
+
+    # Страницы действительно загрузились не в порядке обхода
+    assert client.finished.index(ROOT_URL + "htf/") < client.finished.index(ROOT_URL + "fat/")
+    assert concurrent == sequential
+    assert [url.rsplit("/", 1)[-1] for _, _, url in sequential] == [
+        "FAT_1.xlsx",
+        "FAT_2.xlsx",
+        "FAT_MAG_1.xlsx",
+        "FAT_MAG_2.xlsx",
+        "root.xlsx",
+        "FEU_1.xlsx",
+        "FEU_2.xlsx",
+        "HTF_1.xlsx",
+        "HTF_2.xlsx",
+    ]
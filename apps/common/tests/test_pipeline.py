@@ -0,0 +1,132 @@
+import random
+import threading
+import time
+from contextlib import closing
+
+import pytest
+
+from apps.common.services.timetable_update.version_core.pipeline import StagedPipeline
+
+
+def _pipeline_threads() -> list[threading.Thread]:
+    return [thread for thread in threading.enumerate() if thread.name.startswith("pipeline-")]
+
+
+def _jitter(item: int) -> int:
+    time.sleep(random.random() / 500)
+    return item
+
+
+def test_items_are_persisted_in_source_order():
+    pipeline = StagedPipeline(queue_size=4)
+    pipeline.add_stage("download", _jitter, workers=4)
+    pipeline.add_stage("hash", lambda item: item * 10, workers=3)
+
+    with closing(pipeline.run(range(200))) as items:
+        result = list(items)
+
+    assert result == [item * 10 for item in range(200)]
+    assert not _pipeline_threads()
+
+
+def test_stage_error_is_raised_in_caller_and_threads_stop():
+    def fail_on_fifty(item: int) -> int:
+        if item == 50:
+            raise ValueError("broken item")
+        return item
+
+    pipeline = StagedPipeline(queue_size=2)
+    pipeline.add_stage("download", fail_on_fifty, workers=3)
+    pipeline.add_stage("hash", _jitter, workers=2)
+
+    received = []
+    with pytest.raises(ValueError, match="broken item"):
+        with closing(pipeline.run(range(10_000))) as items:
+            for item in items:
+                received.append(item)
+
+    assert received == list(range(len(received)))
+    assert 50 not in received
+    assert not _pipeline_threads()
+
+
+def test_source_error_is_raised_in_caller():
+    def source():
+        yield from range(10)
+        raise RuntimeError("crawl failed")
+
+    pipeline = StagedPipeline(queue_size=2)
+    pipeline.add_stage("download", _jitter, workers=2)
+
+    with pytest.raises(RuntimeError, match="crawl failed"):
+        with closing(pipeline.run(source())) as items:
+            list(items)
+    assert not _pipeline_threads()
+
+
+def test_error_in_caller_stops_pipeline():
+    pipeline = StagedPipeline(queue_size=2)
+    pipeline.add_stage("download", _jitter, workers=2)
+
+    with pytest.raises(KeyError):
+        with closing(pipeline.run(range(10_000))) as items:
+            for item in items:
+                if item == 5:
+                    raise KeyError(item)
+
+    assert not _pipeline_threads()
+
+
+def test_bounded_queues_hold_back_fast_stages():
+    produced = 0
+
+    def source():
+        nonlocal produced
+        for item in range(100):
+            produced += 1
+            yield item
+
+    pipeline = StagedPipeline(queue_size=3)
+    pipeline.add_stage("download", _jitter, workers=2)
+
+    with closing(pipeline.run(source())) as items:
+        for consumed, _ in enumerate(items, start=1):
+            time.sleep(0.002)
+            # Источник может опередить потребителя не больше, чем на окно конвейера и ожидающий места элемент
+            assert produced - consumed <= pipeline.get_window() + 1
+
+    stats = {stage["stage"]: stage for stage in pipeline.get_stats()}
+    assert stats["download"]["queue_high_water"] <= 3
+    assert stats["sink"]["queue_high_water"] <= 3
+    assert stats["sink"]["items"] == 100
+
+
+def test_slow_item_does_not_grow_reorder_buffer():
+    produced = 0
+    release_head = threading.Event()
+
+    def source():
+        nonlocal produced
+        for item in range(1000):
+            produced += 1
+            yield item
+
+    def slow_head(item: int) -> int:
+        if item == 0:
+            release_head.wait(5)
+        return item
+
+    pipeline = StagedPipeline(queue_size=2)
+    pipeline.add_stage("download", slow_head, workers=4)
+    window = pipeline.get_window()
+
+    with closing(pipeline.run(source())) as items:
+        iterator = iter(items)
+        threading.Timer(0.3, release_head.set).start()
+        first = next(iterator)
+        # Пока первый элемент обрабатывался, остальные потоки не могли выдать больше элементов, чем вмещает окно
+        assert produced <= window + 1
+        result = [first, *iterator]
+
+    assert result == list(range(1000))
+    assert not _pipeline_threads()
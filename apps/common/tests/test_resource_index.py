@@ -0,0 +1,143 @@
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.common.models import FileVersion, Resource, Tag
+from apps.common.services.timetable_update.version_core.blob_store import BlobStore
+from apps.common.services.timetable_update.version_core.resource_index import ResourceIndex
+
+LINK_PATH = "a/b/R.xlsx"
+
+
+@pytest.fixture
+def blob_store(tmp_path) -> BlobStore:
+    return BlobStore(tmp_path / "data")
+
+
+def _new_version(resource: Resource, hashsum: str) -> FileVersion:
+    return FileVersion(
+        resource=resource,
+        hashsum=hashsum,
+        mimetype=".xlsx",
+        last_changed=datetime(2026, 1, 1, tzinfo=timezone.utc),
+    )
+
+
+def _put(blob_store: BlobStore, tmp_path: Path, content: bytes) -> Path:
+    source = tmp_path / "download.xlsx"
+    source.write_bytes(content)
+    return blob_store.put(source, FileVersion(hashsum=content.decode(), mimetype=".xlsx"))
+
+
+@pytest.mark.django_db(transaction=True)
+def test_flush_links_resource_path_after_commit(blob_store, tmp_path):
+    resources = ResourceIndex()
+    resource = Resource(name="resource", path="a/b")
+    for content in (b"first", b"second"):
+        blob_path = _put(blob_store, tmp_path, content)
+        link = partial(blob_store.link, blob_path, LINK_PATH)
+        resources.add(resource, _new_version(resource, content.decode()), on_saved=link)
+
+    created = resources.flush()
+
+    assert [r.path for r in created] == ["a/b"]
+    assert (tmp_path / "data" / LINK_PATH).read_bytes() == b"second"
+    assert Resource.objects.get().latest_version.hashsum == "second"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_failed_flush_rolls_back_and_does_not_link(blob_store, tmp_path, monkeypatch):
+    resources = ResourceIndex()
+    resource = Resource(name="resource", path="a/b")
+    blob_path = _put(blob_store, tmp_path, b"content")
+    linked = []
+
+    def link() -> None:
+        linked.append(blob_store.link(blob_path, LINK_PATH))
+
+    resources.add(resource, _new_version(resource, "content"), on_saved=link)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("database error")
+
+    monkeypatch.setattr(Resource.objects, "bulk_update", fail)
+    with pytest.raises(RuntimeError):
+        resources.flush()
+
+    assert linked == []
+    assert not (tmp_path / "data" / LINK_PATH).exists()
+    assert not Resource.objects.exists()
+    assert not FileVersion.objects.exists()
+
+
+def _add_new_resources(resources: ResourceIndex, count: int, prefix: str) -> None:
+    for i in range(count):
+        resource = Resource(name=f"{prefix} {i}", path=f"{prefix}/{i}")
+        resource.add_tags(Tag(name="Занятия", category="type_timetable"), Tag(name=f"{i % 3}", category="course"))
+        resources.add(resource, _new_version(resource, f"{prefix} {i}"))
+
+
+@pytest.mark.django_db
+def test_load_uses_first_resource_for_duplicate_path():
+    first = Resource.objects.create(name="first", path="a/b")
+    Resource.objects.create(name="second", path="a/b")
+    version = FileVersion.objects.create(resource=first, hashsum="hash", mimetype=".xlsx")
+
+    resources = ResourceIndex.load()
+
+    assert resources.get("a/b").id == first.id
+    assert resources.get_latest_version(resources.get("a/b")).id == version.id
+    assert resources.get("missing") is None
+
+
+def test_pending_resource_and_version_are_visible_before_flush():
+    resources = ResourceIndex(chunk_size=2)
+    resource = Resource(name="resource", path="a/b")
+
+    resources.add(resource, _new_version(resource, "first"))
+    assert resources.get("a/b") is resource
+    assert resources.get_latest_version(resource).hashsum == "first"
+    assert not resources.is_chunk_full()
+
+    resources.add(resource, _new_version(resource, "second"))
+    assert resources.get_latest_version(resource).hashsum == "second"
+    assert resources.is_chunk_full()
+
+
+@pytest.mark.django_db
+def test_flush_saves_resources_versions_and_tags():
+    resources = ResourceIndex()
+    _add_new_resources(resources, 4, "new")
+
+    created = resources.flush()
+
+    assert [resource.path for resource in created] == [f"new/{i}" for i in range(4)]
+    assert resources.flush() == []
+    assert not resources.is_chunk_full()
+    for resource in Resource.objects.prefetch_related("tags"):
+        assert resource.latest_version.hashsum == resource.name
+        assert resources.get(resource.path).id == resource.id
+        assert resources.get_latest_version(resource).hashsum == resource.name
+        assert {(tag.name, tag.category) for tag in resource.tags.all()} == {
+            ("Занятия", "type_timetable"),
+            (str(int(resource.path.rsplit("/", 1)[1]) % 3), "course"),
+        }
+    assert Tag.objects.count() == 4
+
+
+@pytest.mark.django_db
+def test_flush_query_count_does_not_depend_on_chunk_size():
+    few, many = ResourceIndex(), ResourceIndex()
+    _add_new_resources(few, 2, "few")
+    _add_new_resources(many, 20, "many")
+
+    with CaptureQueriesContext(connection) as few_queries:
+        few.flush()
+    with CaptureQueriesContext(connection) as many_queries:
+        many.flush()
+
+    assert len(many_queries) == len(few_queries)
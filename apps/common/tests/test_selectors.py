@@ -0,0 +1,48 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from apps.common.models import FileVersion, Resource
+from apps.common.selectors import LatestVersion, get_latest_versions
+
+
+def _create_resource(name: str, *hashsums: str) -> Resource:
+    resource = Resource.objects.create(name=name, path=f"path/{name}")
+    for day, hashsum in enumerate(hashsums, start=1):
+        FileVersion.objects.create(
+            resource=resource, hashsum=hashsum, last_changed=datetime(2025, 1, day, tzinfo=timezone.utc)
+        )
+    return resource
+
+
+def _get_latest_by_history(resource: Resource) -> LatestVersion:
+    """Последняя версия по истории версий (прежний запрос для каждого ресурса)"""
+    return LatestVersion.from_version(resource.versions.order_by("-timestamp", "-id").first())
+
+
+@pytest.mark.django_db
+def test_latest_versions_match_version_history(django_assert_num_queries):
+    resources = [_create_resource(f"r{i}", *[f"r{i} v{j}" for j in range(i + 1)]) for i in range(5)]
+    without_versions = _create_resource("empty")
+
+    with django_assert_num_queries(1):
+        latest_versions = get_latest_versions()
+
+    assert latest_versions == {resource.id: _get_latest_by_history(resource) for resource in resources}
+    assert without_versions.id not in latest_versions
+    assert latest_versions[resources[2].id].hashsum == "r2 v2"
+    assert latest_versions[resources[2].id].last_changed == datetime(2025, 1, 3, tzinfo=timezone.utc)
+
+
+@pytest.mark.django_db
+def test_latest_versions_for_selected_resources(django_assert_num_queries):
+    first = _create_resource("first", "a", "b")
+    _create_resource("second", "c")
+    empty = _create_resource("empty")
+
+    with django_assert_num_queries(1):
+        latest_versions = get_latest_versions({first.id, empty.id})
+
+    assert list(latest_versions) == [first.id]
+    assert latest_versions[first.id].hashsum == "b"
+    assert get_latest_versions([]) == {}
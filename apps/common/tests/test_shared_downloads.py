@@ -0,0 +1,131 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+from apps.common.services.timetable_update.version_core.file_data import DownloadResult
+from apps.common.services.timetable_update.version_core.shared_downloads import SharedDownloads
+
+URL = "https://www.vstu.ru/upload/raspisanie/shared.xlsx"
+
+
+class CountingDownload:
+    """Функция скачивания, создающая временный файл и считающая вызовы"""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.calls = 0
+
+    def __call__(self) -> DownloadResult:
+        self.calls += 1
+        self.path.write_bytes(b"content")
+        return DownloadResult(self.path, "digest")
+
+
+def test_url_under_several_paths_is_downloaded_once(tmp_path):
+    downloads = SharedDownloads()
+    download = CountingDownload(tmp_path / "shared.xlsx")
+    for _ in range(3):
+        downloads.acquire(URL)
+
+    results = [downloads.get(URL, download) for _ in range(3)]
+
+    assert download.calls == 1
+    assert results == [DownloadResult(download.path, "digest")] * 3
+    assert downloads.get_reused_count() == 2
+
+
+def test_concurrent_callers_wait_for_first_download(tmp_path):
+    downloads = SharedDownloads()
+    started = threading.Event()
+    finish = threading.Event()
+    download = CountingDownload(tmp_path / "shared.xlsx")
+
+    def slow_download() -> DownloadResult:
+        started.set()
+        finish.wait(5)
+        return download()
+
+    downloads.acquire(URL)
+    downloads.acquire(URL)
+    results = []
+    owner = threading.Thread(target=lambda: results.append(downloads.get(URL, slow_download)))
+    owner.start()
+    assert started.wait(5)
+    waiter = threading.Thread(target=lambda: results.append(downloads.get(URL, download)))
+    waiter.start()
+    finish.set()
+    owner.join(5)
+    waiter.join(5)
+
+    assert download.calls == 1
+    assert len(results) == 2 and results[0] == results[1]
+
+
+def test_temp_file_is_removed_after_last_reference_and_seal(tmp_path):
+    downloads = SharedDownloads()
+    download = CountingDownload(tmp_path / "shared.xlsx")
+    downloads.acquire(URL)
+    downloads.acquire(URL)
+
+    downloads.get(URL, download)
+    downloads.release(URL)
+    assert download.path.exists()
+
+    downloads.get(URL, download)
+    downloads.release(URL)
+    # Обход не закончен: на файл ещё может найтись ссылка
+    assert download.path.exists()
+
+    downloads.acquire(URL)
+    assert downloads.get(URL, download).path == download.path
+    downloads.seal()
+    assert download.path.exists()
+
+    downloads.release(URL)
+    assert not download.path.exists()
+    assert download.calls == 1
+
+
+def test_seal_removes_files_without_references(tmp_path):
+    downloads = SharedDownloads()
+    download = CountingDownload(tmp_path / "shared.xlsx")
+    downloads.acquire(URL)
+    downloads.get(URL, download)
+    downloads.release(URL)
+
+    downloads.seal()
+
+    assert not download.path.exists()
+
+
+def test_close_removes_remaining_files(tmp_path):
+    downloads = SharedDownloads()
+    download = CountingDownload(tmp_path / "shared.xlsx")
+    downloads.acquire(URL)
+    downloads.acquire(URL)
+    downloads.get(URL, download)
+
+    downloads.close()
+
+    assert not download.path.exists()
+
+
+def test_download_error_is_passed_to_every_reference():
+    downloads = SharedDownloads()
+    calls = []
+
+    def failing_download() -> DownloadResult:
+        calls.append(1)
+        raise OSError("connection reset")
+
+    downloads.acquire(URL)
+    downloads.acquire(URL)
+    for _ in range(2):
+        with pytest.raises(OSError, match="connection reset"):
+            downloads.get(URL, failing_download)
+    downloads.seal()
+    downloads.release(URL)
+    downloads.release(URL)
+
+    assert len(calls) == 1
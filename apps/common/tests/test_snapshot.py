@@ -0,0 +1,228 @@
+import json
+import os
+import zipfile
+from pathlib import Path
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from apps.common.services.timetable_update import snapshot
+
+MTIME = 1_700_000_000  # Время изменения файлов архивов (ZIP не поддерживает даты до 1980 года)
+
+
+@pytest.fixture
+def storage(settings, tmp_path) -> Path:
+    settings.DATA_STORAGE_DIR = tmp_path / "data"
+    settings.STATIC_ROOT = tmp_path / "static"
+    settings.DATA_STORAGE_DIR.mkdir()
+    return settings.DATA_STORAGE_DIR
+
+
+def _write(storage: Path, relative_path: str, content: bytes, mtime: float) -> Path:
+    path = storage / relative_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def _read_tree(root: Path) -> dict[str, bytes]:
+    return {path.relative_to(root).as_posix(): path.read_bytes() for path in root.rglob("*") if path.is_file()}
+
+
+def test_incremental_chain_restores_each_snapshot(storage, tmp_path):
+    _write(storage, "a/first.xlsx", b"first", 1_000)
+    _write(storage, "a/second.xlsx", b"second", 1_000)
+    _write(storage, "b/removed.xls", b"removed", 1_000)
+    base = snapshot.incremental_backup().parent
+    base_tree = _read_tree(storage)
+
+    _write(storage, "a/first.xlsx", b"first, changed", 2_000)
+    _write(storage, "c/added.xlsx", b"added", 2_000)
+    first_increment = snapshot.incremental_backup().parent
+    first_tree = _read_tree(storage)
+
+    (storage / "b/removed.xls").unlink()
+    second_increment = snapshot.incremental_backup().parent
+    second_tree = _read_tree(storage)
+
+    assert snapshot.get_latest_snapshot() == second_increment
+    chain = [(base, base_tree), (first_increment, first_tree), (second_increment, second_tree)]
+    for snapshot_dir, expected_tree in chain:
+        destination = tmp_path / f"restore_{snapshot_dir.name}"
+        assert snapshot.restore_snapshot(snapshot_dir, destination) == len(expected_tree)
+        assert _read_tree(destination) == expected_tree
+    assert "b/removed.xls" not in _read_tree(tmp_path / f"restore_{second_increment.name}")
+
+
+def test_incremental_snapshot_stores_only_new_content(storage):
+    _write(storage, "a/first.xlsx", b"first", 1_000)
+    _write(storage, "a/copy.xlsx", b"first", 1_000)
+    base = snapshot.incremental_backup().parent
+
+    _write(storage, "a/second.xlsx", b"second", 2_000)
+    (storage / "a/copy.xlsx").unlink()
+    increment = snapshot.incremental_backup().parent
+    unchanged = snapshot.incremental_backup().parent
+
+    base_manifest = json.loads((base / snapshot.MANIFEST_NAME).read_text(encoding="utf-8"))
+    increment_manifest = json.loads((increment / snapshot.MANIFEST_NAME).read_text(encoding="utf-8"))
+    unchanged_manifest = json.loads((unchanged / snapshot.MANIFEST_NAME).read_text(encoding="utf-8"))
+    assert base_manifest["parent"] is None
+    assert increment_manifest["parent"] == base.name
+    assert len(base_manifest["stored"]) == 1
+    assert len(increment_manifest["stored"]) == 1
+    assert unchanged_manifest["stored"] == []
+    assert [entry["path"] for entry in increment_manifest["files"]] == ["a/first.xlsx", "a/second.xlsx"]
+
+
+def test_incremental_snapshots_in_the_same_second_do_not_collide(storage):
+    _write(storage, "a/first.xlsx", b"first", 1_000)
+
+    snapshot_dirs = {snapshot.make_snapshot("Инкрементальный снимок") for _ in range(3)}
+
+    assert len(snapshot_dirs) == 3
+
+
+def test_incremental_snapshot_skips_blob_store_temp_files(storage):
+    _write(storage, "a/first.xlsx", b"first", 1_000)
+    _write(storage, ".blobs/.tmp/.partial", b"partial", 1_000)
+
+    manifest_path = snapshot.incremental_backup()
+
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    assert [entry["path"] for entry in manifest["files"]] == ["a/first.xlsx"]
+
+
+def test_restore_restores_duplicate_content_as_hard_links(storage, tmp_path):
+    _write(storage, ".blobs/ab/cd/blob.xlsx", b"content", 1_000)
+    os.link(storage / ".blobs/ab/cd/blob.xlsx", storage / "resource.xlsx")
+    snapshot_dir = snapshot.incremental_backup().parent
+
+    destination = tmp_path / "restored"
+    snapshot.restore_snapshot(snapshot_dir, destination)
+
+    assert os.path.samefile(destination / ".blobs/ab/cd/blob.xlsx", destination / "resource.xlsx")
+
+
+def test_restore_fails_on_corrupted_object(storage, tmp_path):
+    _write(storage, "a/first.xlsx", b"first", 1_000)
+    snapshot_dir = snapshot.incremental_backup().parent
+    object_path = next((snapshot_dir / snapshot.OBJECTS_DIR).glob("*/*"))
+    object_path.write_bytes(b"broken")
+
+    with pytest.raises(ValueError):
+        snapshot.restore_snapshot(snapshot_dir, tmp_path / "restored")
+
+
+def test_restore_snapshot_command(storage, tmp_path):
+    _write(storage, "a/first.xlsx", b"first", 1_000)
+    snapshot.incremental_backup()
+    _write(storage, "a/first.xlsx", b"changed", 2_000)
+    snapshot.incremental_backup()
+
+    destination = tmp_path / "restored"
+    call_command("restore_snapshot", str(destination))
+
+    assert _read_tree(destination) == {"a/first.xlsx": b"changed"}
+    with pytest.raises(CommandError):
+        call_command("restore_snapshot", str(destination))
+    with pytest.raises(CommandError):
+        call_command("restore_snapshot", str(tmp_path / "other"), snapshot="missing")
+
+
+def _make_blob_storage(storage: Path) -> None:
+    """Хранилище BlobStore: старая версия, последняя версия со ссылкой по пути ресурса и два ресурса с одним файлом"""
+    _write(storage, ".blobs/11/11/old.xlsx", b"old", MTIME)
+    _write(storage, ".blobs/22/22/latest.xlsx", b"latest", MTIME)
+    _write(storage, ".blobs/33/33/shared.xlsx", b"shared", MTIME)
+    (storage / "a").mkdir()
+    (storage / "b").mkdir()
+    os.link(storage / ".blobs/22/22/latest.xlsx", storage / "a/resource.xlsx")
+    os.link(storage / ".blobs/33/33/shared.xlsx", storage / "a/shared.xlsx")
+    os.link(storage / ".blobs/33/33/shared.xlsx", storage / "b/shared.xlsx")
+
+
+def test_local_backup_archives_blob_content_once(storage, tmp_path):
+    _make_blob_storage(storage)
+    progress = []
+
+    archive = snapshot.local_backup(progress.append)
+
+    with zipfile.ZipFile(archive) as zf:
+        assert zf.namelist() == [
+            "a/resource.xlsx", "a/shared.xlsx", "b/shared.xlsx", ".blobs/11/11/old.xlsx", snapshot.HARDLINKS_MEMBER
+        ]
+        hardlinks = json.loads(zf.read(snapshot.HARDLINKS_MEMBER))
+        # Простая распаковка даёт полное дерево ресурсов
+        zf.extractall(tmp_path / "unzipped")
+    assert hardlinks == {".blobs/22/22/latest.xlsx": "a/resource.xlsx", ".blobs/33/33/shared.xlsx": "a/shared.xlsx"}
+    assert _read_tree(tmp_path / "unzipped" / "a") == {"resource.xlsx": b"latest", "shared.xlsx": b"shared"}
+    assert [p.done_members for p in progress] == [1, 2, 3, 4, 5]
+    assert {p.total_members for p in progress} == {5}
+
+
+@pytest.mark.parametrize("backup", ["local", "full"])
+@pytest.mark.django_db
+def test_restore_archive_rebuilds_storage_with_hard_links(storage, tmp_path, backup):
+    _make_blob_storage(storage)
+    archive = snapshot.local_backup() if backup == "local" else snapshot.full_backup()
+
+    destination = tmp_path / "restored"
+    assert snapshot.restore_archive(archive, destination) == 6
+
+    assert _read_tree(destination) == _read_tree(storage)
+    assert os.path.samefile(destination / ".blobs/22/22/latest.xlsx", destination / "a/resource.xlsx")
+    assert os.path.samefile(destination / ".blobs/33/33/shared.xlsx", destination / "a/shared.xlsx")
+    assert (destination / "a/resource.xlsx").stat().st_mtime == MTIME
+
+
+def test_restore_backup_command(storage, tmp_path):
+    _make_blob_storage(storage)
+    archive = snapshot.local_backup()
+
+    destination = tmp_path / "restored"
+    call_command("restore_backup", str(archive), str(destination))
+
+    assert _read_tree(destination) == _read_tree(storage)
+    with pytest.raises(CommandError):
+        call_command("restore_backup", str(archive), str(destination))
+    with pytest.raises(CommandError):
+        call_command("restore_backup", str(tmp_path / "missing.zip"), str(tmp_path / "other"))
+
+
+@pytest.mark.django_db
+def test_full_backup_replaces_temporary_archive(storage):
+    _write(storage, "a/first.xlsx", b"first", MTIME)
+    _write(storage, "a/notes.txt", b"notes" * 100, MTIME)
+
+    archive = snapshot.full_backup()
+
+    assert archive.is_file()
+    assert not archive.with_name(archive.name + ".tmp").exists()
+    with zipfile.ZipFile(archive) as zf:
+        assert zf.namelist() == [snapshot.DATABASE_MEMBER, "local/a/first.xlsx", "local/a/notes.txt"]
+        assert zf.getinfo("local/a/first.xlsx").compress_type == zipfile.ZIP_STORED
+        assert zf.getinfo("local/a/notes.txt").compress_type == zipfile.ZIP_DEFLATED
+        assert zf.read("local/a/first.xlsx") == b"first"
+        json.loads(zf.read(snapshot.DATABASE_MEMBER))
+
+
+@pytest.mark.django_db
+def test_failed_full_backup_removes_temporary_archive(storage, monkeypatch):
+    _write(storage, "a/first.xlsx", b"first", MTIME)
+    _write(storage, "a/second.xlsx", b"second", MTIME)
+    old_archive = snapshot.full_backup()
+    old_content = old_archive.read_bytes()
+    monkeypatch.setattr(snapshot, "_get_timestamp", lambda: "failed")
+
+    def fail_on_second(progress: snapshot.BackupProgress) -> None:
+        if progress.member == "local/a/second.xlsx":
+            raise OSError("disk full")
+
+    with pytest.raises(OSError, match="disk full"):
+        snapshot.full_backup(fail_on_second)
+
+    assert [path.name for path in old_archive.parent.iterdir()] == [old_archive.name]
+    assert old_archive.read_bytes() == old_content
@@ -0,0 +1,61 @@
+import pytest
+
+from apps.common.models import Resource, Tag
+from apps.common.services.timetable_update.version_core.tag_resolver import TagResolver
+
+
+@pytest.mark.django_db
+def test_resolve_creates_missing_tags_and_caches_ids(django_assert_num_queries):
+    existing = Tag.objects.create(name="Занятия", category="type_timetable")
+    resolver = TagResolver()
+    tags = [Tag(name="Занятия", category="type_timetable"), Tag(name="1", category="course")]
+
+    # Загрузка кэша, создание недостающего тега и чтение его id
+    with django_assert_num_queries(3):
+        ids = resolver.resolve(tags)
+    with django_assert_num_queries(0):
+        assert resolver.resolve(tags) == ids
+
+    assert ids == {
+        ("Занятия", "type_timetable"): existing.id,
+        ("1", "course"): Tag.objects.get(name="1", category="course").id,
+    }
+
+
+@pytest.mark.django_db
+def test_resolve_uses_tag_created_by_another_process():
+    resolver = TagResolver()
+    resolver.resolve([])
+    other = Tag.objects.create(name="Магистратура", category="degree")
+
+    ids = resolver.resolve([Tag(name="Магистратура", category="degree")])
+
+    assert ids == {("Магистратура", "degree"): other.id}
+    assert Tag.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_attach_pending_tags_matches_per_resource_save():
+    def add_tags(resource: Resource) -> None:
+        resource.add_tags(
+            Tag(name="Занятия", category="type_timetable"),
+            Tag(name="Бакалавриат", category="degree"),
+            Tag(name="Занятия", category="type_timetable"),
+        )
+
+    saved_one_by_one = Resource(name="one by one", path="a/1")
+    add_tags(saved_one_by_one)
+    saved_one_by_one.save()
+    bulk = [Resource(name=f"bulk {i}", path=f"b/{i}") for i in range(3)]
+    for resource in bulk:
+        add_tags(resource)
+    Resource.objects.bulk_create(bulk)
+
+    assert TagResolver().attach_pending_tags(bulk) == 6
+
+    expected = set(saved_one_by_one.tags.values_list("id", flat=True))
+    assert len(expected) == 2
+    for resource in bulk:
+        assert set(resource.tags.values_list("id", flat=True)) == expected
+        assert resource.pop_pending_tags() == []
+    assert Tag.objects.count() == 2
@@ -158,6 +158,34 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 
+# Сервис обновления расписания
+# Максимальное количество одновременно загружаемых страниц сайта при обходе
+TIMETABLE_CRAWL_WORKERS = dotenv.get_int("TIMETABLE_CRAWL_WORKERS", default=4)
+# Ограничения обхода сайта: максимальная глубина вложенности страниц и максимум страниц за запуск (0 - без ограничения)
+TIMETABLE_CRAWL_MAX_DEPTH = dotenv.get_int("TIMETABLE_CRAWL_MAX_DEPTH", default=10)
+TIMETABLE_CRAWL_MAX_PAGES = dotenv.get_int("TIMETABLE_CRAWL_MAX_PAGES", default=2000)
+# Конвейер обновления: потоки скачивания файлов, потоки подсчёта хэшей файлов Excel и размер очередей между стадиями
+TIMETABLE_DOWNLOAD_WORKERS = dotenv.get_int("TIMETABLE_DOWNLOAD_WORKERS", default=4)
+TIMETABLE_HASH_WORKERS = dotenv.get_int("TIMETABLE_HASH_WORKERS", default=2)
+TIMETABLE_PIPELINE_QUEUE_SIZE = dotenv.get_int("TIMETABLE_PIPELINE_QUEUE_SIZE", default=16)
+# Количество новых версий файлов, записываемых в БД одной транзакцией
+TIMETABLE_PERSIST_CHUNK_SIZE = dotenv.get_int("TIMETABLE_PERSIST_CHUNK_SIZE", default=200)
+# fsync при записи файлов в хранилище: "none", "file" (содержимое файла) или "full" (файл и каталог)
+TIMETABLE_STORAGE_FSYNC = dotenv.get("TIMETABLE_STORAGE_FSYNC", "file")
+# Каждый N-й запуск скачивает и проверяет все файлы, в остальных пропускаются файлы
+# с неизменившейся датой обновления на сайте (1 - проверять все файлы всегда)
+TIMETABLE_FULL_CHECK_EVERY = dotenv.get_int("TIMETABLE_FULL_CHECK_EVERY", default=8)
+# HTTP-клиент: максимум соединений на хост, таймауты (секунды) и повторы с экспоненциальной задержкой
+TIMETABLE_HTTP_POOL_SIZE = dotenv.get_int("TIMETABLE_HTTP_POOL_SIZE", default=8)
+TIMETABLE_HTTP_CONNECT_TIMEOUT = dotenv.get_float("TIMETABLE_HTTP_CONNECT_TIMEOUT", default=10)
+TIMETABLE_HTTP_READ_TIMEOUT = dotenv.get_float("TIMETABLE_HTTP_READ_TIMEOUT", default=30)
+TIMETABLE_HTTP_RETRIES = dotenv.get_int("TIMETABLE_HTTP_RETRIES", default=3)
+TIMETABLE_HTTP_BACKOFF_FACTOR = dotenv.get_float("TIMETABLE_HTTP_BACKOFF_FACTOR", default=0.5)
+# Парсер HTML страниц сайта ("html.parser" или "lxml" из дополнительных зависимостей: uv sync --extra lxml)
+# и разбор только основного контента страницы
+TIMETABLE_HTML_PARSER = dotenv.get("TIMETABLE_HTML_PARSER", "html.parser")
+TIMETABLE_HTML_ONLY_CONTENT = dotenv.get_bool("TIMETABLE_HTML_ONLY_CONTENT", default=True)
+
 # Logging
 LOGS_DIR = BASE_DIR / "logs"
 service_name = dotenv.get("SERVICE_NAME", "django")
@@ -7,6 +7,20 @@ def get_bool(name: str, default: bool = False) -> bool:
     return value in ("1", "true", "yes", "on")
 
 
+def get_int(name: str, default: int = 0) -> int:
+    value = os.getenv(name, "")
+    if not value:
+        return default
+    return int(value)
+
+
+def get_float(name: str, default: float = 0.0) -> float:
+    value = os.getenv(name, "")
+    if not value:
+        return default
+    return float(value)
+
+
 def get_list(name: str, default: list | None = None, sep: str = ',') -> list:
     value = os.getenv(name, "")
     if not value: